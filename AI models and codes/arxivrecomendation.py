@@ -1,7 +1,3 @@
-import datetime
-import requests
-import xmltodict
-import json
 import numpy as np
 import torch
 
@@ -9,6 +5,8 @@ import torch
 # pip install sentence_transformers
 from sentence_transformers import SentenceTransformer, util
 
+import fetcher
+
 ###############################################################################
 # Global Structures
 ###############################################################################
@@ -29,84 +27,7 @@ def fetch_arxiv_papers(query, start_date=None, end_date=None, max_results=5):
     Fetches papers from arXiv given a query string and optional date range,
     returning a list of dictionaries with metadata (title, abstract, etc.).
     """
-
-    results = []
-    search_query = f"all:{query}"
-
-    # Handle date range if provided
-    if start_date and end_date:
-        start_str = start_date.strftime("%Y%m%d000000")
-        end_str = end_date.strftime("%Y%m%d235959")
-        search_query += f" AND submittedDate:[{start_str} TO {end_str}]"
-    elif start_date and not end_date:
-        start_str = start_date.strftime("%Y%m%d000000")
-        search_query += f" AND submittedDate:[{start_str} TO 999912312359]"
-    elif end_date and not start_date:
-        end_str = end_date.strftime("%Y%m%d235959")
-        search_query += f" AND submittedDate:[000001010000 TO {end_str}]"
-
-    base_url = "http://export.arxiv.org/api/query"
-    params = {
-        "search_query": search_query,
-        "start": 0,
-        "max_results": max_results
-    }
-
-    resp = requests.get(base_url, params=params)
-    if resp.status_code == 200:
-        data = xmltodict.parse(resp.text)
-        entries = data['feed'].get('entry', [])
-        if isinstance(entries, dict):
-            # If there's only one entry, it might not be a list
-            entries = [entries]
-        for entry in entries:
-            title = entry.get('title', 'No Title')
-            summary = entry.get('summary', 'No Abstract').strip()
-            authors_raw = entry.get('author', [])
-
-            if isinstance(authors_raw, dict):
-                authors_raw = [authors_raw]
-            authors = [auth.get('name', 'Unknown') for auth in authors_raw]
-
-            links = entry.get('link', [])
-            if isinstance(links, dict):
-                links = [links]
-            pdf_link = None
-            for link in links:
-                if link.get('@type') == 'application/pdf':
-                    pdf_link = link.get('@href')
-
-            categories = []
-            if 'category' in entry:
-                category_data = entry['category']
-                if isinstance(category_data, list):
-                    categories = [cat['@term'] for cat in category_data]
-                elif isinstance(category_data, dict) and '@term' in category_data:
-                    categories = [category_data['@term']]
-
-            # Publication date
-            published_str = entry.get('published', None)
-            pub_date_obj = _safe_parse_arxiv_date(published_str)
-
-            paper = {
-                "title": title,
-                "abstract": summary,
-                "authors": authors,
-                "source": "arXiv",
-                "url": entry.get('id', ''),
-                "pdf_url": pdf_link,
-                "categories": categories,
-                "publication_date": pub_date_obj.isoformat() if pub_date_obj else None
-            }
-            results.append(paper)
-
-    return results
-
-def _safe_parse_arxiv_date(date_str):
-    try:
-        return datetime.datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%SZ").date()
-    except:
-        return datetime.date.today()
+    return fetcher.fetch_arxiv_papers(query, start_date, end_date, max_results)
 
 ###############################################################################
 # Embedding & Storage
@@ -0,0 +1,17 @@
+"""
+The fetcher lives in the server, Server/ReSearch/scraping/fetcher.py. Importing
+this module loads that file and puts it in its place, so the scripts here and
+the server share one implementation.
+"""
+import importlib.util
+import os
+import sys
+
+_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "Server", "ReSearch", "scraping", "fetcher.py"
+)
+
+_spec = importlib.util.spec_from_file_location(__name__, _PATH)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
@@ -1,10 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
 from langchain.embeddings.openai import OpenAIEmbeddings
 from langchain.vectorstores import FAISS
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.docstore.document import Document
 
+import fetcher
+
 # Initialize OpenAI embeddings
 embeddings = OpenAIEmbeddings()
 
@@ -12,77 +12,12 @@ embeddings = OpenAIEmbeddings()
 vector_store = FAISS.load_local("vector_store_index")  # Load or create an index
 
 
-def search_ieee(query, api_key):
-    """Search IEEE Xplore API"""
-    url = f"https://ieeexploreapi.ieee.org/api/v1/search/articles?querytext={query}&apikey={api_key}"
-    response = requests.get(url)
-    return response.json().get("articles", [])
-
-
-def search_sciencedirect(query, api_key):
-    """Search ScienceDirect API"""
-    url = f"https://api.elsevier.com/content/search/scidir?query={query}&apiKey={api_key}"
-    response = requests.get(url)
-    return response.json().get("search-results", {}).get("entry", [])
-
-
-def search_arxiv(query):
-    """Scrape Arxiv for research papers"""
-    url = f"https://export.arxiv.org/api/query?search_query={query}"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, "html.parser")
-    papers = []
-    for entry in soup.find_all("entry"):
-        paper = {
-            "title": entry.title.text.strip(),
-            "summary": entry.summary.text.strip(),
-            "authors": [author.find("name").text for author in entry.find_all("author")],
-            "url": entry.id.text,
-        }
-        papers.append(paper)
-    return papers
-
-
 def query_sources(query):
-    """Query multiple sources and combine results"""
+    """Query multiple sources concurrently and combine results"""
     ieee_api_key = "YOUR_IEEE_API_KEY"
     scidir_api_key = "YOUR_SCIENCEDIRECT_API_KEY"
 
-    ieee_results = search_ieee(query, ieee_api_key)
-    scidir_results = search_sciencedirect(query, scidir_api_key)
-    arxiv_results = search_arxiv(query)
-
-    # Combine all results
-    all_results = []
-
-    for result in ieee_results:
-        all_results.append({
-            "title": result.get("title"),
-            "abstract": result.get("abstract"),
-            "authors": result.get("authors", []),
-            "source": "IEEE",
-            "url": result.get("html_url"),
-        })
-
-    for result in scidir_results:
-        all_results.append({
-            "title": result.get("dc:title"),
-            "abstract": result.get("dc:description", ""),
-            "authors": [author.get("$") for author in result.get("authors", {}).get("author", [])],
-            "source": "ScienceDirect",
-            "url": result.get("link", {}).get("@href"),
-        })
-
-    for result in arxiv_results:
-        all_results.append({
-            "title": result["title"],
-            "abstract": result["summary"],
-            "authors": result["authors"],
-            "source": "Arxiv",
-            "url": result["url"],
-        })
-
-    return all_results
+    return fetcher.query_sources(query, ieee_api_key=ieee_api_key, scidir_api_key=scidir_api_key)
 
 
 def rank_results(query, results):
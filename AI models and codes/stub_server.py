@@ -0,0 +1,122 @@
+"""
+Local stand-in for the arXiv, IEEE and ScienceDirect search APIs, for testing
+fetcher.py without the network.
+
+Each route can be slowed down (`delays`) or made to fail its first N requests
+with a 503 (`failures`). Run it directly with `python stub_server.py --port 8765`
+and point MultiSourceFetcher(urls=server.urls()) at it.
+"""
+import argparse
+import asyncio
+from collections import Counter
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+ARXIV_TOTAL = 25
+
+
+def arxiv_feed(start, count, total=ARXIV_TOTAL):
+    entries = []
+    for i in range(start, min(start + count, total)):
+        entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/2401.{i:05d}v1</id>
+    <published>2024-01-{i % 28 + 1:02d}T00:00:00Z</published>
+    <title>{escape(f"Stub arXiv paper {i}")}</title>
+    <summary>Abstract of stub paper {i}</summary>
+    <author><name>Author {i}</name></author>
+    <link href="http://arxiv.org/pdf/2401.{i:05d}v1" type="application/pdf"/>
+    <category term="cs.LG"/>
+  </entry>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">{''.join(entries)}
+</feed>"""
+
+
+class StubServer:
+    def __init__(self, delays=None, failures=None, arxiv_total=ARXIV_TOTAL):
+        self.delays = delays or {}
+        self.failures = Counter(failures or {})
+        self.arxiv_total = arxiv_total
+        self.requests = Counter()
+        self.runner = None
+        self.port = None
+
+    async def _handle(self, route, request, respond):
+        self.requests[route] += 1
+        await asyncio.sleep(self.delays.get(route, 0))
+        if self.failures[route] > 0:
+            self.failures[route] -= 1
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        return respond(request)
+
+    def _arxiv(self, request):
+        start = int(request.query.get("start", 0))
+        count = int(request.query.get("max_results", 10))
+        return web.Response(text=arxiv_feed(start, count, self.arxiv_total), content_type="application/atom+xml")
+
+    def _ieee(self, request):
+        count = int(request.query.get("max_records", 10))
+        return web.json_response({"articles": [
+            {
+                "title": f"Stub IEEE paper {i}",
+                "abstract": f"IEEE abstract {i}",
+                "authors": {"authors": [{"full_name": f"IEEE Author {i}"}]},
+                "html_url": f"https://ieeexplore.ieee.org/document/{1000 + i}",
+                "publication_date": "2024",
+            }
+            for i in range(count)
+        ]})
+
+    def _scidir(self, request):
+        count = int(request.query.get("count", 10))
+        return web.json_response({"search-results": {"entry": [
+            {
+                "dc:title": f"Stub ScienceDirect paper {i}",
+                "authors": {"author": [{"$": f"SD Author {i}"}]},
+                "link": [{"@ref": "scidir", "@href": f"https://www.sciencedirect.com/science/article/pii/S{i:08d}"}],
+                "prism:coverDate": "2024-02-01",
+            }
+            for i in range(count)
+        ]}})
+
+    def app(self):
+        app = web.Application()
+        routes = {"arxiv": ("/api/query", self._arxiv),
+                  "ieee": ("/api/v1/search/articles", self._ieee),
+                  "sciencedirect": ("/content/search/scidir", self._scidir)}
+        for route, (path, respond) in routes.items():
+            app.router.add_get(path, self._handler(route, respond))
+        return app
+
+    def _handler(self, route, respond):
+        async def handler(request):
+            return await self._handle(route, request, respond)
+        return handler
+
+    async def start(self, port=0):
+        self.runner = web.AppRunner(self.app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    def urls(self):
+        base = f"http://127.0.0.1:{self.port}"
+        return {
+            "arxiv": f"{base}/api/query",
+            "ieee_api": f"{base}/api/v1/search/articles",
+            "sciencedirect": f"{base}/content/search/scidir",
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    web.run_app(StubServer().app(), host="127.0.0.1", port=args.port)
@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+from fetcher import MultiSourceFetcher
+from stub_server import StubServer
+
+NO_RATE_LIMIT = {"arxiv": 0, "ieee": 0, "sciencedirect": 0}
+
+
+async def with_stub(run, **server_options):
+    server = await StubServer(**server_options).start()
+    try:
+        async with MultiSourceFetcher(
+            ieee_api_key="key", scidir_api_key="key", rate_limits=NO_RATE_LIMIT,
+            urls=server.urls(), backoff=0.01,
+        ) as fetcher:
+            return server, await run(fetcher)
+    finally:
+        await server.stop()
+
+
+def test_arxiv_paginates_through_start_offset():
+    server, papers = asyncio.run(with_stub(
+        lambda fetcher: fetcher.fetch_arxiv("cardiology", max_results=100, page_size=10)
+    ))
+    # 25 stub entries: three full or partial pages, then an empty one
+    assert len(papers) == 25
+    assert len({paper["url"] for paper in papers}) == 25
+    assert server.requests["arxiv"] == 4
+    assert papers[0]["pdf_url"].startswith("http://arxiv.org/pdf/")
+
+
+def test_transient_failures_are_retried():
+    server, papers = asyncio.run(with_stub(
+        lambda fetcher: fetcher.fetch_ieee("cardiology", max_results=3),
+        failures={"ieee": 2},
+    ))
+    assert len(papers) == 3
+    assert server.requests["ieee"] == 3
+
+
+def test_sources_are_queried_concurrently():
+    delay = 0.5
+    start = time.monotonic()
+    server, papers = asyncio.run(with_stub(
+        lambda fetcher: fetcher.query_sources("cardiology", max_results=5),
+        delays={"arxiv": delay, "ieee": delay, "sciencedirect": delay},
+    ))
+    elapsed = time.monotonic() - start
+    assert {paper["source"] for paper in papers} == {"arXiv", "IEEE", "ScienceDirect"}
+    # Costs the slowest source, not the sum of all three
+    assert elapsed < delay * 2
+
+
+def test_failing_source_is_skipped():
+    server, papers = asyncio.run(with_stub(
+        lambda fetcher: fetcher.query_sources("cardiology", max_results=2),
+        failures={"sciencedirect": 10},
+    ))
+    assert {paper["source"] for paper in papers} == {"arXiv", "IEEE"}
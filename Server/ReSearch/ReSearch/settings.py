@@ -18,7 +18,24 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Add upload directory path
 UPLOAD_DIR = os.path.join(BASE_DIR, 'uploads')
+# Figures extracted from chat PDFs, one file per image named by content hash
+FIGURE_STORE_DIR = os.path.join(UPLOAD_DIR, 'figures')
 FissIndex = os.path.join(BASE_DIR, 'fissIndex')
+# On-disk FAISS index of research papers used by the recommender
+PAPER_INDEX_DIR = os.path.join(BASE_DIR, 'FissIndex', 'papers')
+# flat (exact) | ivf_flat | ivf_pq | hnsw; compare with `manage.py benchmark_paper_index`
+PAPER_INDEX_TYPE = os.getenv('PAPER_INDEX_TYPE', 'flat')
+PAPER_INDEX_OPTIONS = {
+    'nlist': 1024,
+    'nprobe': 16,
+    'hnsw_m': 32,
+    'ef_search': 128,
+}
+# Extracted pages, embeddings and summaries of chat PDFs, keyed by content hash
+PDF_ARTIFACT_DIR = os.path.join(BASE_DIR, 'FissIndex', 'artifacts')
+PDF_ARTIFACT_CACHE_MAX_BYTES = int(os.getenv('PDF_ARTIFACT_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+# Torch CPU threads for CLIP image embedding; 0 keeps torch's default of one per core
+CLIP_TORCH_THREADS = int(os.getenv('CLIP_TORCH_THREADS', 0))
 # SECURITY WARNING: keep the secret key used in production secret!
 # SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'your-development-key')
 
@@ -90,11 +107,29 @@ CHANNEL_LAYERS = {
 }
 
 
-CACHES = {
-    'default': {
+# Cache backend: 'file' (local disk), 'redis' (shared) or 'tiered' (per-process LRU in front of Redis)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/1"
+CACHE_BACKENDS = {
+    'file': {
         'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
         'LOCATION': BASE_DIR / 'django_cache',
-    }
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    },
+    'tiered': {
+        'BACKEND': 'ReSearch.tiered_cache.TieredCache',
+        'LOCATION': CACHE_REDIS_URL,
+        'OPTIONS': {
+            'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+            'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 60)),
+        },
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND]
 }
 # Celery configuration
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/0"  # Redis as the message broker
@@ -102,6 +137,22 @@ CELERY_ACCEPT_CONTENT = ['json']  # Content type for tasks
 CELERY_TASK_SERIALIZER = 'json'  # Serialization format
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL  # Use Redis for task results
 CELERY_TIMEZONE = 'UTC'  # Match the Django timezone
+# Fail fast when publishing so a missing broker cannot stall web requests
+CELERY_BROKER_TRANSPORT_OPTIONS = {'max_retries': 1, 'interval_start': 0, 'interval_step': 0.2, 'interval_max': 0.5}
+CELERY_BEAT_SCHEDULE = {
+    'nightly-recommendation-refresh': {
+        'task': 'scraping.tasks.nightly_recommendation_refresh',
+        'schedule': 60 * 60 * 24,
+    },
+    'hourly-counter-reconciliation': {
+        'task': 'scraping.tasks.reconcile_denormalized_counters',
+        'schedule': 60 * 60,
+    },
+    'nightly-reading-rollup-reconciliation': {
+        'task': 'scraping.tasks.reconcile_reading_rollups',
+        'schedule': 60 * 60 * 24,
+    },
+}
 
 
 INSTALLED_APPS = [
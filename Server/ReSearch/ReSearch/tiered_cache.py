@@ -0,0 +1,308 @@
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+CLEAR_ALL = b'*'
+
+class LocalLRU:
+    """Bounded, thread-safe LRU of pickled values with a per-entry expiry.
+
+    ``generation`` moves on with every invalidation. A fill tagged with the
+    generation read before fetching from L2 is dropped if an invalidation
+    arrived in the meantime, since the fetched value may predate it.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def reset_after_fork(self):
+        # The parent's lock may have been held by a thread that does not exist here
+        self._lock = threading.Lock()
+        self._entries.clear()
+        self.generation += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, pickled = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return pickled
+
+    def set(self, key, pickled, ttl: float, generation=None):
+        if ttl <= 0:
+            self.discard(key)
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, pickled)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self.generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+class ProcessTier:
+    """The L1 and invalidation listener of one (LOCATION, channel) in this process.
+
+    Django builds a cache backend per thread, so these live in a module-level
+    registry that every backend instance of the process shares. Published
+    invalidations carry ``origin`` so the listener skips the process's own,
+    which were already applied locally when they were sent.
+    """
+
+    def __init__(self, server: str, channel: str, max_entries: int):
+        self.server = server
+        self.channel = channel
+        self.l1 = LocalLRU(max_entries)
+        self.origin = uuid.uuid4().hex.encode()
+        self.listener = None
+        self._listener_lock = threading.Lock()
+
+    def reset_after_fork(self):
+        # A forked worker inherits the registry but not the listener thread
+        self.origin = uuid.uuid4().hex.encode()
+        self.listener = None
+        self._listener_lock = threading.Lock()
+        self.l1.reset_after_fork()
+
+    def ensure_listener(self):
+        if self.listener is not None:
+            return
+        with self._listener_lock:
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self._listen, name='tiered-cache-invalidation', daemon=True
+                )
+                self.listener.start()
+
+    def message(self, key) -> bytes:
+        key = key if isinstance(key, bytes) else key.encode()
+        return self.origin + b' ' + key
+
+    def handle(self, data: bytes):
+        origin, _, key = data.partition(b' ')
+        if origin == self.origin:
+            return
+        if key == CLEAR_ALL:
+            self.l1.clear()
+        else:
+            self.l1.discard(key.decode())
+
+    def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(self.server).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything may have changed while we were not subscribed
+                self.l1.clear()
+                backoff = 1
+                for message in pubsub.listen():
+                    self.handle(message['data'])
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected: {str(e)}")
+                self.l1.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+_tiers: Dict[Tuple[str, str], ProcessTier] = {}
+_tiers_lock = threading.Lock()
+
+def process_tier(server: str, channel: str, max_entries: int) -> ProcessTier:
+    with _tiers_lock:
+        tier = _tiers.get((server, channel))
+        if tier is None:
+            tier = _tiers[(server, channel)] = ProcessTier(server, channel, max_entries)
+        return tier
+
+def _reset_after_fork():
+    global _tiers_lock
+    _tiers_lock = threading.Lock()
+    for tier in _tiers.values():
+        tier.reset_after_fork()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+class TieredCache(BaseCache):
+    """Per-process LRU (L1) in front of Redis (L2), shared by every thread.
+
+    Every write goes to Redis and is broadcast on a pub/sub channel, so other
+    processes drop the key from their L1. L1 entries also expire after
+    ``L1_TIMEOUT`` seconds, which bounds staleness if a message is missed,
+    and never later than the key expires in Redis.
+
+    OPTIONS: ``L1_MAX_ENTRIES`` (1000), ``L1_TIMEOUT`` (60), ``CHANNEL``.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2 = RedisCache(server, {**params, 'OPTIONS': options.get('REDIS_OPTIONS', {})})
+        server = server[0] if isinstance(server, (list, tuple)) else server.split(',')[0]
+        self._tier = process_tier(
+            server,
+            options.get('CHANNEL', 'tiered-cache-invalidation'),
+            int(options.get('L1_MAX_ENTRIES', 1000)),
+        )
+        self._l1 = self._tier.l1
+        self._l1_timeout = float(options.get('L1_TIMEOUT', 60))
+
+    # Invalidation
+
+    def _invalidate(self, *keys):
+        for key in keys:
+            if key == CLEAR_ALL:
+                self._l1.clear()
+            else:
+                self._l1.discard(key)
+        try:
+            client = self._l2._cache.get_client(write=True)
+            for key in keys:
+                client.publish(self._tier.channel, self._tier.message(key))
+        except Exception as e:
+            logger.error(f"Could not publish cache invalidation: {str(e)}")
+
+    def _l1_ttl(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self._l1_timeout
+        return min(self._l1_timeout, timeout - time.time())
+
+    def _l1_ttl_from_pttl(self, pttl: int) -> float:
+        """L1 lifetime for a value whose Redis key has ``pttl`` milliseconds left"""
+        if pttl == -1:  # no expiry in Redis
+            return self._l1_timeout
+        return min(self._l1_timeout, pttl / 1000)
+
+    def _fetch(self, full_keys):
+        """Values and remaining Redis TTLs of ``full_keys``, in one round trip"""
+        cache = self._l2._cache
+        client = cache.get_client(None)
+        with client.pipeline(transaction=False) as pipe:
+            pipe.mget(full_keys)
+            for full_key in full_keys:
+                pipe.pttl(full_key)
+            raw_values, *pttls = pipe.execute()
+        return {
+            full_key: (cache._serializer.loads(raw), pttl)
+            for full_key, raw, pttl in zip(full_keys, raw_values, pttls)
+            if raw is not None
+        }
+
+    def _fill(self, full_key, value, pttl, generation):
+        self._l1.set(
+            full_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self._l1_ttl_from_pttl(pttl), generation
+        )
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        self._tier.ensure_listener()
+        full_key = self.make_and_validate_key(key, version=version)
+        pickled = self._l1.get(full_key)
+        if pickled is not None:
+            return pickle.loads(pickled)
+        generation = self._l1.generation
+        fetched = self._fetch([full_key])
+        if full_key not in fetched:
+            return default
+        value, pttl = fetched[full_key]
+        self._fill(full_key, value, pttl, generation)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        self._l2.set(key, value, timeout, version=version)
+        self._invalidate(full_key)
+        self._l1.set(full_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._l1_ttl(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        added = self._l2.add(key, value, timeout, version=version)
+        if added:
+            self._invalidate(full_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        deleted = self._l2.delete(key, version=version)
+        self._invalidate(full_key)
+        return deleted
+
+    def has_key(self, key, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        return self._l1.get(full_key) is not None or self._l2.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        full_key = self.make_and_validate_key(key, version=version)
+        value = self._l2.incr(key, delta, version=version)
+        self._invalidate(full_key)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self._l1.get(self.make_and_validate_key(key, version=version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(pickled)
+        if missing:
+            self._tier.ensure_listener()
+            generation = self._l1.generation
+            full_keys = {self.make_and_validate_key(key, version=version): key for key in missing}
+            for full_key, (value, pttl) in self._fetch(list(full_keys)).items():
+                self._fill(full_key, value, pttl, generation)
+                found[full_keys[full_key]] = value
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l2.set_many(data, timeout, version=version)
+        self._invalidate(*(self.make_and_validate_key(key, version=version) for key in data))
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._l2.delete_many(keys, version=version)
+        self._invalidate(*(self.make_and_validate_key(key, version=version) for key in keys))
+
+    def clear(self):
+        cleared = self._l2.clear()
+        self._invalidate(CLEAR_ALL)
+        return cleared
+
+    def close(self, **kwargs):
+        self._l2.close(**kwargs)
@@ -217,6 +217,8 @@ class AIChatConsumer(AsyncWebsocketConsumer):
             user_id = str(self.user.id)
             if user_id in self.chatbot_instances:
                 for session_id, chatbot in self.chatbot_instances[user_id].items():
+                    # PDFs shared with other sessions keep their cached artifacts
+                    chatbot.release_artifacts()
                     index_path = os.path.join(settings.BASE_DIR, f'FissIndex/faiss_index_{user_id}_{session_id}')
                     if os.path.exists(index_path):
                         shutil.rmtree(index_path)
@@ -487,7 +489,7 @@ class AIChatConsumer(AsyncWebsocketConsumer):
                             'content': {},
                             'file': {
                                 "path": image,
-                                "name": "AiChatBot.png",
+                                "name": f"AiChatBot{os.path.splitext(image)[1]}",
                                 "size": size,
                                 "type": "IMAGE",
                             }
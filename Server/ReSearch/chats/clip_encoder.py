@@ -0,0 +1,81 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+import open_clip
+import torch
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+CLIP_MODEL = "ViT-B-32"
+CLIP_PRETRAINED = "openai"
+# Images are preprocessed and encoded this many at a time
+IMAGE_BATCH_SIZE = 32
+
+class ClipEncoder:
+    """
+    CLIP model loaded once per process, for image and text embeddings.
+
+    Inputs are encoded in batches of ``batch_size`` under torch.inference_mode;
+    embeddings come back L2-normalized as float32 rows. Calls are serialized,
+    since concurrent forward passes on CPU only compete for the same cores.
+    """
+
+    def __init__(self, model_name: str = CLIP_MODEL, pretrained: str = CLIP_PRETRAINED,
+                 batch_size: int = IMAGE_BATCH_SIZE, num_threads: int = 0):
+        self.model_name = model_name
+        self.pretrained = pretrained
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            start = time.perf_counter()
+            if self.num_threads and self.device.type == "cpu":
+                # Process-wide: keeps CLIP from taking every core from the ASGI workers
+                torch.set_num_threads(self.num_threads)
+            model, _, self._preprocess = open_clip.create_model_and_transforms(
+                self.model_name, pretrained=self.pretrained
+            )
+            self._tokenizer = open_clip.get_tokenizer(self.model_name)
+            self._model = model.eval().to(self.device)
+            logger.info(f"Loaded CLIP {self.model_name} on {self.device} in {time.perf_counter() - start:.2f}s")
+        return self._model
+
+    def _encode(self, items: list, to_tensor, encode) -> np.ndarray:
+        chunks = []
+        with self._lock:
+            model = self._load()
+            with torch.inference_mode():
+                for start in range(0, len(items), self.batch_size):
+                    batch = to_tensor(items[start:start + self.batch_size]).to(self.device)
+                    features = encode(model, batch)
+                    features = features / features.norm(dim=-1, keepdim=True)
+                    chunks.append(features.float().cpu().numpy())
+        return np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+
+    def encode_image(self, images: List[Image.Image]) -> np.ndarray:
+        return self._encode(
+            images,
+            lambda batch: torch.stack([self._preprocess(image) for image in batch]),
+            lambda model, batch: model.encode_image(batch),
+        )
+
+    def encode_text(self, texts: List[str]) -> np.ndarray:
+        return self._encode(
+            texts,
+            lambda batch: self._tokenizer(batch),
+            lambda model, batch: model.encode_text(batch),
+        )
+
+@lru_cache(maxsize=None)
+def clip_encoder() -> ClipEncoder:
+    return ClipEncoder(num_threads=settings.CLIP_TORCH_THREADS)
@@ -31,6 +31,7 @@ from .serializers import (
 )
 from django.db import models
 from . import middleware
+from . import pdf_artifacts
 from . import pdfchatBot
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -370,7 +371,7 @@ class GroupChatConsumer(BaseChatConsumer):
                         lastMessage=response,
                         attachment= {
                                         "path": image,
-                                        "name": "AiChatBot.png",
+                                        "name": f"AiChatBot{os.path.splitext(image)[1]}",
                                         "size": Size,
                                         "type": "IMAGE",
                                 } if image and Size else None
@@ -756,6 +757,8 @@ class ChatManagementConsumer(AsyncWebsocketConsumer):
             index_path=os.path.join(settings.BASE_DIR, f'FissIndex/faiss_index_group_{group_id}_table')
             if os.path.exists(index_path):
                 shutil.rmtree(index_path)
+            # The group bot's owner key; artifacts other chats still use are kept
+            pdf_artifacts.artifact_cache().release_owner(f"faiss_index_group_{group_id}")
             
         except GroupChat.DoesNotExist:
             logger.error(f"Group not found for file deletion: {group_id}")
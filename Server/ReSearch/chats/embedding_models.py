@@ -0,0 +1,117 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Requests are split into batches of at most this many texts, so a short
+# question is never stuck behind a whole PDF's chunks
+MAX_BATCH_SIZE = 64
+# How long the worker waits for more requests to merge into a batch
+BATCH_WINDOW_SECONDS = 0.005
+
+_models: Dict[str, "SharedEmbeddings"] = {}
+_models_lock = threading.Lock()
+
+def get_embeddings(model_name: str = DEFAULT_MODEL) -> "SharedEmbeddings":
+    """The process-wide instance of an embedding model; weights load on first encode"""
+    with _models_lock:
+        if model_name not in _models:
+            _models[model_name] = SharedEmbeddings(model_name)
+        return _models[model_name]
+
+def _load_huggingface(model_name: str):
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+class SharedEmbeddings(Embeddings):
+    """
+    Embedding model shared by every chatbot session in the process.
+
+    Concurrent encode calls are queued and merged into micro-batches by a
+    single worker thread, which is the only thread that runs the model.
+    """
+
+    def __init__(self, model_name: str, load: Optional[Callable] = None,
+                 max_batch_size: int = MAX_BATCH_SIZE, batch_window: float = BATCH_WINDOW_SECONDS):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self._load = load or _load_huggingface
+        self._model = None
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        # A request that did not fit in the last batch; it starts the next one
+        self._pending: Optional[Tuple[List[str], Future]] = None
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = self._load(self.model_name)
+                    logger.info(f"Loaded embedding model {self.model_name} in {time.perf_counter() - start:.2f}s")
+                    self._worker = threading.Thread(
+                        target=self._run, name=f"embeddings-{self.model_name}", daemon=True
+                    )
+                    self._worker.start()
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Loaded here so a failed load raises in the caller, not the worker
+        self.model
+        futures = []
+        for start in range(0, len(texts), self.max_batch_size):
+            future = Future()
+            self._queue.put((list(texts[start:start + self.max_batch_size]), future))
+            futures.append(future)
+        return [vector for future in futures for vector in future.result()]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _next_batch(self) -> List[Tuple[List[str], Future]]:
+        request, self._pending = self._pending or self._queue.get(), None
+        batch = [request]
+        size = len(request[0])
+        deadline = time.monotonic() + self.batch_window
+        while size < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if size + len(request[0]) > self.max_batch_size:
+                self._pending = request
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = self._model.embed_documents(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(request_texts)])
+                offset += len(request_texts)
@@ -0,0 +1,54 @@
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+from typing import List, Optional
+
+from django.conf import settings
+
+# A figure index holds one fixed-width record per row of a PDF's image FAISS
+# index, so the figure for a search hit is one seek and one read away.
+FIGURE_RECORD_SIZE = 80
+
+class FigureStore:
+    """
+    PDF figures stored once each, as the bytes extracted from the PDF, under
+    ``<root>/<first two hex digits>/<sha256>.<ext>``. The same figure in many
+    papers or uploads shares one file.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, figure_id: str) -> str:
+        return os.path.join(self.root, figure_id[:2], figure_id)
+
+    def put(self, data: bytes, ext: str) -> str:
+        figure_id = f"{hashlib.sha256(data).hexdigest()}.{ext.lower()}"
+        path = self.path(figure_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".part", delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+        return figure_id
+
+def write_figure_index(path: str, figure_ids: List[str]):
+    with open(path, "wb") as f:
+        for figure_id in figure_ids:
+            record = figure_id.encode("ascii")
+            if len(record) > FIGURE_RECORD_SIZE:
+                raise ValueError(f"Figure id too long for the index: {figure_id}")
+            f.write(record.ljust(FIGURE_RECORD_SIZE))
+
+def read_figure_id(path: str, row: int) -> Optional[str]:
+    if row < 0:
+        return None
+    with open(path, "rb") as f:
+        f.seek(row * FIGURE_RECORD_SIZE)
+        record = f.read(FIGURE_RECORD_SIZE)
+    return record.decode("ascii").rstrip() or None
+
+@lru_cache(maxsize=None)
+def figure_store() -> FigureStore:
+    return FigureStore(settings.FIGURE_STORE_DIR)
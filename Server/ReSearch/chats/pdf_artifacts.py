@@ -0,0 +1,245 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Everything derived from one PDF lives under entries/<sha256>/; the sessions
+# and groups using it are marker files under refs/<sha256>/, kept apart so a
+# reference can be taken before the entry exists and survives its rebuild.
+ENTRIES_DIR = "entries"
+REFS_DIR = "refs"
+META_FILE = "meta.json"
+PAGES_FILE = "pages.json"
+CHUNKS_FILE = "chunks.json"
+TEXT_EMBEDDINGS_FILE = "text_embeddings.npy"
+TABLE_EMBEDDINGS_FILE = "table_embeddings.npy"
+LOCK_FILE = ".lock"
+IMAGE_INDEX_FILE = "image_embeddings.index"
+FIGURE_INDEX_FILE = "figures.idx"
+
+@dataclass
+class PDFArtifacts:
+    """Extracted pages, chunk embeddings and summary of one PDF"""
+    sha256: str
+    path: str
+    summary: str
+    pages: List[dict]
+    text_chunks: List[str]
+    text_embeddings: np.ndarray
+    table_rows: List[str] = field(default_factory=list)
+    table_embeddings: Optional[np.ndarray] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(page["text"] for page in self.pages)
+
+    @property
+    def image_index_path(self) -> str:
+        return os.path.join(self.path, IMAGE_INDEX_FILE)
+
+    @property
+    def figure_index_path(self) -> str:
+        return os.path.join(self.path, FIGURE_INDEX_FILE)
+
+    @property
+    def has_images(self) -> bool:
+        return os.path.exists(self.image_index_path)
+
+def owner_key(owner: str) -> str:
+    return re.sub(r"[^\w.-]", "_", owner)
+
+def directory_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+class ArtifactCache:
+    """
+    Content-addressed store of processed PDFs, keyed by SHA-256.
+
+    Entries are evicted least recently used first once the store grows past
+    ``max_bytes``, except those still referenced by a chat session or group.
+    References and eviction are serialized by an flock on ``<root>/.lock``,
+    since the sessions holding them live in several worker processes.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, ENTRIES_DIR), exist_ok=True)
+        os.makedirs(os.path.join(root, REFS_DIR), exist_ok=True)
+
+    def entry_path(self, sha256: str) -> str:
+        return os.path.join(self.root, ENTRIES_DIR, sha256)
+
+    def _refs_path(self, sha256: str) -> str:
+        return os.path.join(self.root, REFS_DIR, sha256)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock, open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, sha256: str) -> Optional[PDFArtifacts]:
+        path = self.entry_path(sha256)
+        meta_path = os.path.join(path, META_FILE)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(os.path.join(path, PAGES_FILE), encoding="utf-8") as f:
+                pages = json.load(f)
+            with open(os.path.join(path, CHUNKS_FILE), encoding="utf-8") as f:
+                chunks = json.load(f)
+            text_embeddings = np.load(os.path.join(path, TEXT_EMBEDDINGS_FILE))
+            table_embeddings = (
+                np.load(os.path.join(path, TABLE_EMBEDDINGS_FILE)) if chunks["table"] else None
+            )
+            # The meta file's mtime is the entry's last use, for LRU eviction
+            os.utime(meta_path)
+        except FileNotFoundError:
+            return None
+        return PDFArtifacts(
+            sha256=sha256,
+            path=path,
+            summary=meta["summary"],
+            pages=pages,
+            text_chunks=chunks["text"],
+            text_embeddings=text_embeddings,
+            table_rows=chunks["table"],
+            table_embeddings=table_embeddings,
+        )
+
+    @contextmanager
+    def build(self, sha256: str) -> Iterator[str]:
+        """
+        Scratch directory for a new entry, published atomically on success.
+
+        Write the image index and figure index into it, then call ``put``. If
+        another worker published the same PDF first, its entry is kept.
+        """
+        scratch = tempfile.mkdtemp(prefix=f".{sha256}.", dir=os.path.join(self.root, ENTRIES_DIR))
+        try:
+            yield scratch
+            try:
+                os.replace(scratch, self.entry_path(sha256))
+            except OSError:
+                logger.info(f"PDF artifacts for {sha256} were built concurrently, keeping the first")
+        finally:
+            if os.path.exists(scratch):
+                shutil.rmtree(scratch, ignore_errors=True)
+        self.evict()
+
+    def put(self, scratch: str, summary: str, pages: List[dict], text_chunks: List[str],
+            text_embeddings: np.ndarray, table_rows: List[str], table_embeddings: Optional[np.ndarray]):
+        with open(os.path.join(scratch, PAGES_FILE), "w", encoding="utf-8") as f:
+            json.dump(pages, f)
+        with open(os.path.join(scratch, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"text": text_chunks, "table": table_rows}, f)
+        np.save(os.path.join(scratch, TEXT_EMBEDDINGS_FILE), np.asarray(text_embeddings, dtype=np.float32))
+        if table_rows:
+            np.save(os.path.join(scratch, TABLE_EMBEDDINGS_FILE), np.asarray(table_embeddings, dtype=np.float32))
+        # Written last: an entry without meta.json is incomplete and never read
+        with open(os.path.join(scratch, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "page_count": len(pages), "created": time.time()}, f)
+
+    def acquire(self, sha256: str, owner: str) -> Optional[PDFArtifacts]:
+        """
+        Reference ``sha256`` for ``owner`` and return its entry, if built.
+
+        Held from before the lookup, so the entry cannot be evicted while it
+        is read or, on a miss, before the owner has built it.
+        """
+        with self._locked():
+            refs = self._refs_path(sha256)
+            os.makedirs(refs, exist_ok=True)
+            open(os.path.join(refs, owner_key(owner)), "a").close()
+            return self.get(sha256)
+
+    def _release(self, sha256: str, owner: str):
+        refs = self._refs_path(sha256)
+        try:
+            os.remove(os.path.join(refs, owner_key(owner)))
+            os.rmdir(refs)
+        except OSError:
+            # Not held, or other owners remain
+            pass
+
+    def release(self, sha256: str, owner: str):
+        with self._locked():
+            self._release(sha256, owner)
+
+    def release_owner(self, owner: str) -> int:
+        """Drop every reference held by ``owner``, e.g. a session on logout"""
+        released = 0
+        key = owner_key(owner)
+        with self._locked():
+            for sha256 in os.listdir(os.path.join(self.root, REFS_DIR)):
+                if os.path.exists(os.path.join(self._refs_path(sha256), key)):
+                    self._release(sha256, owner)
+                    released += 1
+        if released:
+            self.evict()
+        return released
+
+    def refcount(self, sha256: str) -> int:
+        try:
+            return len(os.listdir(self._refs_path(sha256)))
+        except FileNotFoundError:
+            return 0
+
+    def evict(self) -> List[str]:
+        """Remove unreferenced entries, oldest use first, until under ``max_bytes``"""
+        with self._locked():
+            entries_dir = os.path.join(self.root, ENTRIES_DIR)
+            entries: Dict[str, tuple] = {}
+            for sha256 in os.listdir(entries_dir):
+                if sha256.startswith("."):
+                    continue
+                path = os.path.join(entries_dir, sha256)
+                try:
+                    last_used = os.path.getmtime(os.path.join(path, META_FILE))
+                except OSError:
+                    last_used = 0
+                entries[sha256] = (last_used, directory_size(path))
+
+            total = sum(size for _, size in entries.values())
+            evicted = []
+            for sha256, (_, size) in sorted(entries.items(), key=lambda item: item[1][0]):
+                if total <= self.max_bytes:
+                    break
+                if self.refcount(sha256):
+                    continue
+                shutil.rmtree(self.entry_path(sha256), ignore_errors=True)
+                total -= size
+                evicted.append(sha256)
+            if evicted:
+                logger.info(f"Evicted {len(evicted)} PDF artifact entries, {total} bytes remain")
+            return evicted
+
+@lru_cache(maxsize=None)
+def artifact_cache() -> ArtifactCache:
+    return ArtifactCache(settings.PDF_ARTIFACT_DIR, settings.PDF_ARTIFACT_CACHE_MAX_BYTES)
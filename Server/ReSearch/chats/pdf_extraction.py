@@ -0,0 +1,220 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import fitz  # PyMuPDF
+import requests
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_TIMEOUT = 60
+# Below this many pages handing ranges to the workers costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 64
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+@dataclass
+class PageImage:
+    xref: int
+    ext: str
+    data: bytes
+
+    def to_pil(self) -> Image.Image:
+        return Image.open(io.BytesIO(self.data)).convert("RGB")
+
+@dataclass
+class PageContent:
+    number: int
+    text: str
+    tables: List[List[List[str]]] = field(default_factory=list)
+    images: List[PageImage] = field(default_factory=list)
+
+@dataclass
+class FetchedPDF:
+    path: str
+    sha256: str
+    # Downloaded by fetch_pdf, so ours to delete
+    downloaded: bool = False
+
+    def discard(self):
+        if self.downloaded:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+class StageTimer:
+    """Wall-clock seconds spent in each named stage of a pipeline"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.timings.items())
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def fetch_pdf(pdf_source: str, download_dir: str) -> FetchedPDF:
+    """
+    Local path or URL to a file on disk plus its SHA-256.
+
+    URLs are streamed into a file of their own in ``download_dir``, hashing as
+    the bytes arrive, so every later stage reads the same single download.
+    Call ``discard`` once done with it; the artifact cache keeps what is
+    extracted, not the PDF.
+    """
+    if not urlparse(pdf_source).scheme:
+        return FetchedPDF(path=pdf_source, sha256=file_sha256(pdf_source))
+
+    os.makedirs(download_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    temp_file = tempfile.NamedTemporaryFile(dir=download_dir, suffix=".pdf", delete=False)
+    try:
+        with temp_file, requests.get(pdf_source, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                temp_file.write(chunk)
+    except BaseException as e:
+        os.remove(temp_file.name)
+        if isinstance(e, requests.RequestException):
+            raise ValueError(f"Failed to download PDF from URL: {str(e)}")
+        raise
+    return FetchedPDF(path=temp_file.name, sha256=digest.hexdigest(), downloaded=True)
+
+def _page_tables(page) -> List[List[List[str]]]:
+    try:
+        found = page.find_tables()
+    except Exception as e:
+        logger.warning(f"Table detection failed on page {page.number}: {str(e)}")
+        return []
+    return [
+        [["" if cell is None else str(cell) for cell in row] for row in table.extract()]
+        for table in found.tables
+    ]
+
+def _page_images(document, page, seen_xrefs) -> List[PageImage]:
+    images = []
+    for img in page.get_images(full=True):
+        xref = img[0]
+        # Logos and other figures repeated on several pages are extracted once
+        if xref in seen_xrefs:
+            continue
+        seen_xrefs.add(xref)
+        try:
+            base_image = document.extract_image(xref)
+            images.append(PageImage(xref=xref, ext=base_image["ext"], data=base_image["image"]))
+        except Exception as e:
+            logger.warning(f"Failed to extract image {xref} on page {page.number}: {str(e)}")
+    return images
+
+def _extract_range(path: str, start: int, stop: int) -> List[PageContent]:
+    """Text, tables and images of pages ``start`` to ``stop - 1``, from one open document"""
+    pages = []
+    seen_xrefs = set()
+    with fitz.open(path) as document:
+        for number in range(start, stop):
+            page = document[number]
+            pages.append(PageContent(
+                number=number,
+                text=page.get_text(),
+                tables=_page_tables(page),
+                images=_page_images(document, page, seen_xrefs),
+            ))
+    return pages
+
+def page_count(path: str) -> int:
+    with fitz.open(path) as document:
+        return document.page_count
+
+def _worker_pool() -> ProcessPoolExecutor:
+    """Worker processes shared by every extraction; started once, since
+    spawning a pool per document cost more than the parallel pages saved"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the caller may be a threaded ASGI worker, where fork is unsafe
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+def _reset_after_fork():
+    # The parent's worker processes are not the child's to use
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def extract_pages(path: str, workers: Optional[int] = None) -> Iterator[PageContent]:
+    """
+    Yield every page's text, tables and images in page order.
+
+    Small documents are read in one pass over one open document. Large ones are
+    split into contiguous page ranges, each read by a process of the shared
+    worker pool that opens the file once (PyMuPDF documents cannot be shared
+    between threads).
+    """
+    try:
+        total = page_count(path)
+    except (fitz.FileDataError, RuntimeError) as e:
+        raise ValueError(f"Failed to read PDF: {str(e)}")
+
+    workers = MAX_WORKERS if workers is None else workers
+    if workers <= 1 or total < PARALLEL_PAGE_THRESHOLD:
+        yield from _extract_range(path, 0, total)
+        return
+
+    step = -(-total // workers)
+    ranges = [(start, min(start + step, total)) for start in range(0, total, step)]
+    pool = _worker_pool()
+    futures = [pool.submit(_extract_range, path, start, stop) for start, stop in ranges]
+    try:
+        seen_xrefs = set()
+        for future in futures:
+            try:
+                pages = future.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a new pool next time
+                _discard_pool()
+                raise ValueError(f"PDF extraction worker exited while reading {path}")
+            for page in pages:
+                # Workers deduplicate within their range only
+                page.images = [image for image in page.images if image.xref not in seen_xrefs]
+                seen_xrefs.update(image.xref for image in page.images)
+                yield page
+    finally:
+        for future in futures:
+            future.cancel()
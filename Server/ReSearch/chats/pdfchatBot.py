@@ -2,36 +2,36 @@ from datetime import datetime
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 from pathlib import Path
-import tempfile
 from urllib.parse import urlparse
-import requests
-import pdfplumber
-import PyPDF2
 from groq import Groq
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.docstore.document import Document
 import os
 import io
-import uuid
 
 
 import fitz  # PyMuPDF
-import open_clip
-import torch
-from torchvision import transforms
 from PIL import Image
 import numpy as np
 import faiss
 import base64
-import json
+import mimetypes
+import logging
 from django.conf import settings
 from dotenv import load_dotenv
 
+from .clip_encoder import ClipEncoder, clip_encoder
+from .embedding_models import get_embeddings
+from .figure_store import figure_store, read_figure_id, write_figure_index
+from .pdf_artifacts import FIGURE_INDEX_FILE, IMAGE_INDEX_FILE, PDFArtifacts, artifact_cache
+from .pdf_extraction import FetchedPDF, PageContent, PageImage, StageTimer, extract_pages, fetch_pdf
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
 
-unique_id = ""
+# Figures in these formats are stored and served as extracted from the PDF
+WEB_IMAGE_FORMATS = {"png", "jpeg", "jpg", "gif", "webp"}
 
 def create_FissIndex_directory():
         """Create upload directory if it doesn't exist"""
@@ -46,34 +46,53 @@ class ChatHistory:
     answer: str
 
 class PDFProcessor:
-    def __init__(self, pdf_source: str):
+    def __init__(self, pdf_source: str, timer: Optional[StageTimer] = None):
         """
         Initialize PDFProcessor with either a local path or URL to a PDF.
         
         Args:
             pdf_source: Local file path or HTTP URL to a PDF file
+            timer: Collects the time spent fetching and extracting
         """
         self.pdf_source = pdf_source
         self.is_url = bool(urlparse(pdf_source).scheme)
+        self.timer = timer or StageTimer()
+        self.pdf_path: Optional[str] = None
+        self.sha256: Optional[str] = None
+        self._fetched: Optional[FetchedPDF] = None
+        self._pages: Optional[List[PageContent]] = None
 
-    def _download_pdf(self) -> str:
+    def fetch(self) -> str:
         """
-        Download PDF from URL and save to temporary file.
-        
+        Download (URLs only) and hash the PDF without parsing it.
+
         Returns:
-            str: Path to temporary file
+            str: SHA-256 of the PDF's bytes
         """
-        try:
-            response = requests.get(self.pdf_source, stream=True)
-            response.raise_for_status()
-            
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-            temp_file.write(response.content)
-            temp_file.close()
-            
-            return temp_file.name
-        except requests.RequestException as e:
-            raise ValueError(f"Failed to download PDF from URL: {str(e)}")
+        if self.sha256 is None:
+            with self.timer.stage("fetch"):
+                self._fetched = fetch_pdf(self.pdf_source, os.path.join(create_FissIndex_directory(), "pdf_cache"))
+            self.pdf_path, self.sha256 = self._fetched.path, self._fetched.sha256
+        return self.sha256
+
+    def close(self):
+        """Delete the downloaded copy of a URL source; the parsed pages are kept."""
+        if self._fetched is not None:
+            self._fetched.discard()
+
+    def load(self) -> List[PageContent]:
+        """
+        Download (URLs only) and parse the PDF once; text, tables and images
+        are all read from the same pass over the pages.
+
+        Returns:
+            List[PageContent]: Per-page text, tables and images
+        """
+        if self._pages is None:
+            self.fetch()
+            with self.timer.stage("extract"):
+                self._pages = list(extract_pages(self.pdf_path))
+        return self._pages
 
     def extract_text(self) -> str:
         """
@@ -82,27 +101,7 @@ class PDFProcessor:
         Returns:
             str: Extracted text from PDF
         """
-        try:
-            if self.is_url:
-                temp_path = self._download_pdf()
-                pdf_path = temp_path
-            else:
-                pdf_path = self.pdf_source
-
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-
-            if self.is_url:
-                os.unlink(temp_path)
-
-            return text
-        except (PyPDF2.errors.PdfReadError, OSError) as e:
-            raise ValueError(f"Failed to read PDF: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Unexpected error processing PDF: {str(e)}")
+        return "".join(page.text for page in self.load())
 
     def extract_tables(self) -> List[List[List[str]]]:
         """
@@ -111,61 +110,23 @@ class PDFProcessor:
         Returns:
             List[List[List[str]]]: Extracted tables as nested lists.
         """
-        try:
-            if self.is_url:
-                temp_path = self._download_pdf()
-                pdf_path = temp_path
-            else:
-                pdf_path = self.pdf_source
-
-            tables = []
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    tables.extend(page.extract_tables())
-
-            if self.is_url:
-                os.unlink(temp_path)
-
-            return tables
-        except Exception as e:
-            raise ValueError(f"Error extracting tables: {str(e)}")
+        return [table for page in self.load() for table in page.tables]
     
-    def extract_images_from_pdf(self):
-        """Extract images from a PDF."""
-        
-        if self.is_url:
-            temp_path = self._download_pdf()
-            pdf_path = temp_path
-        else:
-            pdf_path = self.pdf_source
-
-        pdf_document = fitz.open(pdf_path)
+    def extract_images_from_pdf(self) -> List[Tuple[PageImage, Image.Image]]:
+        """Extract images from a PDF, as the stored bytes and the decoded image."""
         images = []
-        for page_num in range(len(pdf_document)):
-            page = pdf_document[page_num]
-            for img_index, img in enumerate(page.get_images(full=True)):
+        for page in self.load():
+            for image in page.images:
                 try:
-                    xref = img[0]
-                    base_image = pdf_document.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                    images.append(image)
+                    images.append((image, image.to_pil()))
                 except Exception as e:
-                    print(f"Failed to process image {img_index} on page {page_num}: {e}")
+                    logger.warning(f"Failed to process image {image.xref} on page {page.number}: {str(e)}", exc_info=True)
         return images
     
 
-    def generate_image_embeddings(self,images, model, transform):
-        """Generate embeddings for a list of images."""
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        embeddings = []
-        for img in images:
-            img_tensor = transform(img).unsqueeze(0).to(device)
-            with torch.no_grad():
-                embedding = model.encode_image(img_tensor)
-            embedding = embedding / embedding.norm(dim=-1, keepdim=True)  # Normalize
-            embeddings.append(embedding.cpu().numpy())
-        return np.vstack(embeddings)
+    def generate_image_embeddings(self, images, encoder: ClipEncoder):
+        """Generate normalized embeddings for a list of images, in batches."""
+        return encoder.encode_image(images)
     
     def save_embeddings_to_faiss(self,image_embeddings, faiss_index_path):
         """Append new embeddings to the Faiss index."""
@@ -177,26 +138,19 @@ class PDFProcessor:
         faiss_index.add(image_embeddings)
         faiss.write_index(faiss_index, faiss_index_path)
     
-    def save_image_mapping(self,image_embeddings, images, image_mapping_path):
-        """Append new image mappings to the JSON file."""
-        with open(image_mapping_path, "r") as f:
-            image_mapping = json.load(f)
-
-        start_index = len(image_mapping)
-        for idx, embedding in enumerate(image_embeddings):
-            # Convert image to base64
+    def save_figures(self, figures: List[Tuple[PageImage, Image.Image]], figure_index_path: str):
+        """Store each figure and index them by embedding row."""
+        store = figure_store()
+        figure_ids = []
+        for figure, image in figures:
+            if figure.ext.lower() in WEB_IMAGE_FORMATS:
+                figure_ids.append(store.put(figure.data, figure.ext))
+                continue
+            # JPEG 2000, JBIG2 and the like are converted once so browsers can show them
             buffered = io.BytesIO()
-            images[idx].save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            image_mapping[start_index + idx] = {
-                "base64": img_base64
-            }
-
-        with open(image_mapping_path, "w") as f:
-            json.dump(image_mapping, f)
-
-
-
+            image.save(buffered, format="PNG")
+            figure_ids.append(store.put(buffered.getvalue(), "png"))
+        write_figure_index(figure_index_path, figure_ids)
 
     def process_table(self, tables: List[List[List[str]]]) -> List[Document]:
         """
@@ -229,9 +183,8 @@ class PDFProcessor:
 class VectorStoreManager:
     def __init__(self, index_path: str):
         self.index_path = index_path
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        # Shared by every store in the process; loading the weights per session is slow and large
+        self.embeddings = get_embeddings()
         self.vector_store = self._load_index()
 
     def _load_index(self) -> Optional[FAISS]:
@@ -246,6 +199,19 @@ class VectorStoreManager:
             os.makedirs(self.index_path)
         self.vector_store.save_local(self.index_path)
 
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embed texts without indexing them, e.g. to store in the artifact cache."""
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def add_embeddings(self, texts: List[str], embeddings: np.ndarray):
+        """Add texts whose embeddings were computed earlier to the vector store."""
+        text_embeddings = list(zip(texts, embeddings.tolist()))
+        if self.vector_store is None:
+            self.vector_store = FAISS.from_embeddings(text_embeddings, self.embeddings)
+        else:
+            self.vector_store.add_embeddings(text_embeddings)
+        self.save_index()
+
     def add_documents(self, documents: List[Document]):
         """Add new documents to the vector store."""
         if self.vector_store is None:
@@ -264,7 +230,7 @@ class GroqClient:
     def __init__(self, api_key: str):
         self.client = Groq(api_key=api_key)
 
-    def explain_image(self,base64_image):
+    def explain_image(self,base64_image, mime_type="image/jpeg"):
      
        
         try:
@@ -277,7 +243,7 @@ class GroqClient:
                                 {
                                     "type": "image_url",
                                     "image_url": {
-                                        "url": f"data:image/jpeg;base64,{base64_image}",
+                                        "url": f"data:{mime_type};base64,{base64_image}",
                                     },
                                 },
                             ],
@@ -410,9 +376,16 @@ class PDFContent:
     summary: str
     file_name: str
     upload_time: str
+    artifact_path: Optional[str] = None
 
 class PDFChatbot:
-    def __init__(self, groq_api_key: str, index_path: str = 'faiss_index'):
+    def __init__(self, groq_api_key: str, index_path: str = 'faiss_index', owner: Optional[str] = None):
+        """
+        Args:
+            groq_api_key: Key for the Groq API
+            index_path: Name of this chatbot's text and table indices under FissIndex
+            owner: Holder of references to cached PDF artifacts; defaults to index_path
+        """
         TEXT_INDEX_PATH = os.path.join(create_FissIndex_directory(), index_path + "_text")
         TABLE_INDEX_PATH = os.path.join(create_FissIndex_directory(),index_path + "_table")
         self.text_vector_store = VectorStoreManager(TEXT_INDEX_PATH)
@@ -421,70 +394,93 @@ class PDFChatbot:
         self.chat_history: List[ChatHistory] = []
         self.pdf_documents: Dict[str, PDFContent] = {}
         self.current_pdf_id: Optional[str] = None
+        self.owner = owner or index_path
+        self.artifact_cache = artifact_cache()
 
     def process_pdf(self, pdf_source: str) -> str:
         try:
-            global unique_id
-            unique_id = str(uuid.uuid4()) 
-            print(os.getenv('GROQ_API_KEY'))
-            
-
-            INDEX_PATH  = os.path.join(create_FissIndex_directory(), f"persistent_data+{unique_id}/faiss_index")
-            IMAGE_MAPPING_PATH = os.path.join(create_FissIndex_directory(),f"persistent_data+{unique_id}/image_mapping.json")
-          
-            # Ensure the persistent storage directories exist
-            os.makedirs(INDEX_PATH, exist_ok=True)
-            if not os.path.exists(IMAGE_MAPPING_PATH):
-                with open(IMAGE_MAPPING_PATH, "w") as f:
-                    json.dump({}, f)
-            processor = PDFProcessor(pdf_source)
-            text = processor.extract_text()
-            tables = processor.extract_tables()
-            table_documents = processor.process_table(tables)
-            extracted_images = processor.extract_images_from_pdf()
-            if(extracted_images):
-                device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-                model, _, transform = open_clip.create_model_and_transforms('ViT-B-32', pretrained='openai')
-                model.eval()
-                model.to(device)
-                INDEX_PATH = f"FissIndex/persistent_data+{unique_id}/faiss_index"
-                IMAGE_MAPPING_PATH = f"FissIndex/persistent_data+{unique_id}/image_mapping.json"
-
-          
-
-
-        
-                image_embeddings = processor.generate_image_embeddings(extracted_images, model, transform)
-
-                processor.save_embeddings_to_faiss(image_embeddings, os.path.join(INDEX_PATH, "image_embeddings.index"))
-                processor.save_image_mapping(image_embeddings, extracted_images, IMAGE_MAPPING_PATH)
-
-
-            text_chunks = processor.create_chunks(text)
-            text_documents = [Document(page_content=chunk) for chunk in text_chunks]
-
-            # Index text documents
-            self.text_vector_store.add_documents(text_documents)
-
-            # Only index tables if there are valid table documents
-            if table_documents:
-                self.table_vector_store.add_documents(table_documents)
-
-            # Generate summary using Groq
-            summary = self.groq_client.summarize_text(text)
+            timer = StageTimer()
+            processor = PDFProcessor(pdf_source, timer)
+            sha256 = processor.fetch()
+            try:
+                artifacts = self.artifact_cache.acquire(sha256, self.owner)
+                cached = artifacts is not None
+                if not cached:
+                    try:
+                        artifacts = self._build_artifacts(processor)
+                    except Exception:
+                        # Nothing was cached for this reference to keep alive
+                        self.artifact_cache.release(sha256, self.owner)
+                        raise
+            finally:
+                # Everything needed later is in the artifact cache
+                processor.close()
+
+            with timer.stage("text_index"):
+                if artifacts.text_chunks:
+                    self.text_vector_store.add_embeddings(artifacts.text_chunks, artifacts.text_embeddings)
+                # Only index tables if there are valid table rows
+                if artifacts.table_rows:
+                    self.table_vector_store.add_embeddings(artifacts.table_rows, artifacts.table_embeddings)
+            logger.info(
+                f"Processed {pdf_source} ({len(artifacts.pages)} pages, "
+                f"{'cached' if cached else 'new'} {sha256[:12]}): {timer.summary()}"
+            )
             pdf_id = str(len(self.pdf_documents) + 1)
 
             self.pdf_documents[pdf_id] = PDFContent(
-                text=text,
-                summary=summary,
+                text=artifacts.text,
+                summary=artifacts.summary,
                 file_name=os.path.basename(pdf_source),
-                upload_time=datetime.now().isoformat()
+                upload_time=datetime.now().isoformat(),
+                artifact_path=artifacts.path
             )
             self.current_pdf_id = pdf_id  # Set current PDF ID
-            return summary
+            return artifacts.summary
         except Exception as e:
             raise ValueError(f"Error processing PDF: {str(e)}")
 
+    def _build_artifacts(self, processor: PDFProcessor) -> PDFArtifacts:
+        """Extract, embed and summarize a PDF not yet in the artifact cache."""
+        timer = processor.timer
+        # One download and one parse; the extract_* calls below reuse it
+        pages = processor.load()
+        text = processor.extract_text()
+        table_rows = [doc.page_content for doc in processor.process_table(processor.extract_tables())]
+        text_chunks = processor.create_chunks(text)
+        extracted_images = processor.extract_images_from_pdf()
+
+        with self.artifact_cache.build(processor.sha256) as scratch:
+            if extracted_images:
+                with timer.stage("image_embeddings"):
+                    images = [image for _, image in extracted_images]
+                    image_embeddings = processor.generate_image_embeddings(images, clip_encoder())
+
+                    processor.save_embeddings_to_faiss(image_embeddings, os.path.join(scratch, IMAGE_INDEX_FILE))
+                    processor.save_figures(extracted_images, os.path.join(scratch, FIGURE_INDEX_FILE))
+
+            with timer.stage("text_embeddings"):
+                text_embeddings = self.text_vector_store.embed_texts(text_chunks)
+                table_embeddings = self.table_vector_store.embed_texts(table_rows) if table_rows else None
+
+            # Generate summary using Groq
+            with timer.stage("summary"):
+                summary = self.groq_client.summarize_text(text)
+
+            self.artifact_cache.put(
+                scratch,
+                summary=summary,
+                pages=[{"number": page.number, "text": page.text, "tables": page.tables} for page in pages],
+                text_chunks=text_chunks,
+                text_embeddings=text_embeddings,
+                table_rows=table_rows,
+                table_embeddings=table_embeddings,
+            )
+        return self.artifact_cache.get(processor.sha256)
+
+    def release_artifacts(self):
+        """Drop this chatbot's references to cached PDFs so they can be evicted."""
+        self.artifact_cache.release_owner(self.owner)
 
     def ask_question(self, question: str,group :bool=False, k: int = 5) -> str:
         """
@@ -503,31 +499,28 @@ class PDFChatbot:
 
         print(flag)
 
-        if(flag):
-            device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-            model, _, transform = open_clip.create_model_and_transforms('ViT-B-32', pretrained='openai')
-            model.eval()
-            model.to(device) 
-
-
-            text_embedding = self.generate_text_embedding(question, model, open_clip.tokenize)
-            INDEX_PATH = f"FissIndex/persistent_data+{unique_id}/faiss_index"
-            faiss_index = self.load_embeddings_from_faiss(os.path.join(INDEX_PATH, "image_embeddings.index"))
+        content = self.get_pdf_content()
+        image_index_path = os.path.join(content.artifact_path, IMAGE_INDEX_FILE) if content and content.artifact_path else None
+        # Questions about a PDF without figures are answered from its text
+        if flag and image_index_path and os.path.exists(image_index_path):
+            text_embedding = self.generate_text_embedding(question, clip_encoder())
+            faiss_index = self.load_embeddings_from_faiss(image_index_path)
             D, I = faiss_index.search(np.array([text_embedding]), k=1)
             best_match_index = I[0][0]
             similarity = D[0][0]
             print("Smilarity score",similarity)
-            IMAGE_MAPPING_PATH = f"FissIndex/persistent_data+{unique_id}/image_mapping.json"
-            image_mapping = self.load_image_mapping(IMAGE_MAPPING_PATH)
-            best_match_base64 = image_mapping[str(best_match_index)]["base64"]
-            img_data = base64.b64decode(best_match_base64)
-            img_explanation = self.groq_client.explain_image(best_match_base64)
-            print("img explanaation",img_explanation)
-            image = Image.open(io.BytesIO(img_data))
-            imagePath=os.path.join(settings.BASE_DIR, 'uploads',f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_AiChatBot.PNG")
-            image.save(imagePath)
-            image_size_kb = os.path.getsize(imagePath) / 1024
-            return img_explanation,imagePath,image_size_kb
+            # FAISS returns row -1 when it has no match
+            figure_id = read_figure_id(os.path.join(content.artifact_path, FIGURE_INDEX_FILE), int(best_match_index))
+            imagePath = figure_store().path(figure_id) if figure_id else None
+            if imagePath and os.path.exists(imagePath):
+                # Served as stored through get_file; only the Groq request needs base64
+                with open(imagePath, "rb") as f:
+                    best_match_base64 = base64.b64encode(f.read()).decode("utf-8")
+                mime_type, _ = mimetypes.guess_type(imagePath)
+                img_explanation = self.groq_client.explain_image(best_match_base64, mime_type or "image/jpeg")
+                image_size_kb = os.path.getsize(imagePath) / 1024
+                return img_explanation,imagePath,image_size_kb
+            logger.warning(f"No stored figure for image row {best_match_index} of {content.artifact_path}; answering from text")
 
 
         text_docs = []
@@ -560,23 +553,10 @@ class PDFChatbot:
             return faiss.read_index(faiss_index_path)
         return None
     
-    def load_image_mapping(self,image_mapping_path):
-        """Load image mapping from JSON."""
-        with open(image_mapping_path, "r") as f:
-            return json.load(f)
-        
 
-    def generate_text_embedding(self,query, model, tokenizer):
-        """Generate an embedding for a text query."""
-        tokens = tokenizer([query])  # Tokenize text as a batch
-        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        tokens = tokens.to(device)
-        model = model.to(device)
-
-        with torch.no_grad():
-            embedding = model.encode_text(tokens)
-        embedding = embedding / embedding.norm(dim=-1, keepdim=True)  # Normalize
-        return embedding.squeeze(0).cpu().numpy()
+    def generate_text_embedding(self, query, encoder: ClipEncoder):
+        """Generate a normalized embedding for a text query."""
+        return encoder.encode_text([query])[0]
 
     def get_pdf_content(self, pdf_id: Optional[str] = None) -> Optional[PDFContent]:
         """Get content of a specific PDF or the current PDF."""
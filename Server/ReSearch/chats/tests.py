@@ -1,3 +1,235 @@
-from django.test import TestCase
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import fitz
+import numpy as np
+import requests
+from django.test import SimpleTestCase
+from PIL import Image
+
+from . import pdf_extraction
+from .figure_store import FigureStore, read_figure_id, write_figure_index
+from .pdf_artifacts import ArtifactCache
+from .pdf_extraction import extract_pages, fetch_pdf
+
+try:
+    from .embedding_models import SharedEmbeddings
+except ImportError:
+    SharedEmbeddings = None
+
+
+def hold_and_release(root, owner, rounds):
+    cache = ArtifactCache(root, max_bytes=10 ** 9)
+    for _ in range(rounds):
+        cache.acquire("a", owner)
+        cache.release("a", owner)
+
+
+class ArtifactCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache = ArtifactCache(self.root, max_bytes=10 ** 9)
+
+    def store(self, sha256, text="x" * 1000):
+        with self.cache.build(sha256) as scratch:
+            self.cache.put(
+                scratch,
+                summary=f"summary of {sha256}",
+                pages=[{"number": 0, "text": text, "tables": []}],
+                text_chunks=[text],
+                text_embeddings=np.ones((1, 4)),
+                table_rows=[],
+                table_embeddings=None,
+            )
+
+    def test_round_trip(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.store("a", text="hello")
+        artifacts = self.cache.get("a")
+        self.assertEqual(artifacts.summary, "summary of a")
+        self.assertEqual(artifacts.text, "hello")
+        self.assertEqual(artifacts.text_embeddings.shape, (1, 4))
+        self.assertFalse(artifacts.has_images)
+
+    def test_acquire_returns_entry_once_built(self):
+        self.assertIsNone(self.cache.acquire("a", "faiss_index_1_session"))
+        self.store("a")
+        self.assertEqual(self.cache.acquire("a", "faiss_index_1_session").summary, "summary of a")
+        self.assertEqual(self.cache.refcount("a"), 1)
+
+    def test_references_are_consistent_across_processes(self):
+        # Without the lock a release's rmdir races the other process's acquire
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=hold_and_release, args=(self.root, f"owner_{i}", 1000))
+            for i in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual([worker.exitcode for worker in workers], [0, 0])
+        self.assertEqual(self.cache.refcount("a"), 0)
+
+    def test_concurrent_build_keeps_first_entry(self):
+        self.store("a", text="first")
+        self.store("a", text="second")
+        self.assertEqual(self.cache.get("a").text, "first")
+        self.assertEqual(os.listdir(os.path.join(self.root, "entries")), ["a"])
+
+    def test_eviction_is_lru_and_skips_referenced_entries(self):
+        for sha256 in ("a", "b", "c"):
+            self.store(sha256)
+        for age, sha256 in enumerate(("c", "a", "b")):
+            os.utime(os.path.join(self.cache.entry_path(sha256), "meta.json"), (age, age))
+        self.cache.acquire("c", "faiss_index_group_1")
+        self.cache.max_bytes = 1
+
+        # c is the oldest but still referenced by a group
+        self.assertEqual(self.cache.evict(), ["a", "b"])
+        self.assertIsNotNone(self.cache.get("c"))
+
+        self.cache.acquire("c", "faiss_index_1_session")
+        self.cache.release_owner("faiss_index_group_1")
+        self.assertEqual(self.cache.refcount("c"), 1)
+        self.assertIsNotNone(self.cache.get("c"))
+        self.cache.release_owner("faiss_index_1_session")
+        self.assertIsNone(self.cache.get("c"))
+
+
+class FigureStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = FigureStore(os.path.join(self.root, "figures"))
+
+    def test_figures_are_stored_once_and_found_by_row(self):
+        logo = self.store.put(b"logo bytes", "PNG")
+        chart = self.store.put(b"chart bytes", "jpeg")
+        self.assertEqual(self.store.put(b"logo bytes", "png"), logo)
+        with open(self.store.path(chart), "rb") as f:
+            self.assertEqual(f.read(), b"chart bytes")
+
+        index_path = os.path.join(self.root, "figures.idx")
+        write_figure_index(index_path, [logo, chart, logo])
+        self.assertEqual(read_figure_id(index_path, 1), chart)
+        self.assertEqual(read_figure_id(index_path, 2), logo)
+        self.assertIsNone(read_figure_id(index_path, 3))
+        self.assertIsNone(read_figure_id(index_path, -1))
+
+
+def png(color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class PDFExtractionTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def test_parallel_extraction_matches_serial(self):
+        path = os.path.join(self.root, "paper.pdf")
+        logo, chart = png("red"), png("blue")
+        with fitz.open() as document:
+            for number in range(9):
+                page = document.new_page()
+                page.insert_text((72, 72), f"Page {number} of the paper")
+                # The logo repeats across the workers' page ranges
+                if number % 4 == 0:
+                    page.insert_image(fitz.Rect(72, 100, 144, 172), stream=logo)
+                if number == 6:
+                    page.insert_image(fitz.Rect(72, 200, 144, 272), stream=chart)
+            document.save(path)
+
+        serial = list(extract_pages(path, workers=1))
+        with mock.patch.object(pdf_extraction, "PARALLEL_PAGE_THRESHOLD", 2):
+            parallel = list(extract_pages(path, workers=3))
+        self.assertEqual(parallel, serial)
+        self.assertEqual([page.number for page in serial], list(range(9)))
+        self.assertEqual(len([image for page in serial for image in page.images]), 2)
+
+    def test_failed_download_leaves_no_file(self):
+        response = mock.MagicMock()
+        response.__enter__.return_value = response
+        response.iter_content.side_effect = requests.ConnectionError("reset by peer")
+        with mock.patch.object(pdf_extraction.requests, "get", return_value=response):
+            with self.assertRaises(ValueError):
+                fetch_pdf("https://example.com/paper.pdf", self.root)
+        self.assertEqual(os.listdir(self.root), [])
+
+
+class StubEmbeddingModel:
+    """Embeds "n" as [n]; each call waits for ``release`` and is recorded"""
+
+    def __init__(self):
+        self.batches = []
+        self.called = threading.Event()
+        self.release = threading.Event()
+
+    def embed_documents(self, texts):
+        self.called.set()
+        self.release.wait(5)
+        if "fail" in texts:
+            raise RuntimeError("model failed")
+        self.batches.append(list(texts))
+        return [[float(text)] for text in texts]
+
+
+@skipUnless(SharedEmbeddings, "needs langchain_core")
+class SharedEmbeddingsTests(SimpleTestCase):
+    def setUp(self):
+        self.model = StubEmbeddingModel()
+        self.embeddings = SharedEmbeddings(
+            "stub", load=lambda name: self.model, max_batch_size=4, batch_window=0.05
+        )
+
+    def embed_in_thread(self, texts, results):
+        thread = threading.Thread(
+            target=lambda: results.__setitem__(tuple(texts), self.embeddings.embed_documents(texts))
+        )
+        thread.start()
+        return thread
+
+    def wait_for_queue(self, size):
+        deadline = time.monotonic() + 5
+        while self.embeddings._queue.qsize() != size and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_queued_requests_merge_in_order_within_the_batch_size(self):
+        results = {}
+        # Occupies the worker while the others queue up behind it
+        threads = [self.embed_in_thread(["0"], results)]
+        self.assertTrue(self.model.called.wait(5))
+        requests = [["1", "2", "3"], ["4", "5"], ["6"]]
+        for queued, texts in enumerate(requests, start=1):
+            threads.append(self.embed_in_thread(texts, results))
+            self.wait_for_queue(queued)
+        self.model.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        # ["4", "5"] would overflow ["1", "2", "3"], so it starts the next batch
+        self.assertEqual(self.model.batches, [["0"], ["1", "2", "3"], ["4", "5", "6"]])
+        for texts in [["0"]] + requests:
+            self.assertEqual(results[tuple(texts)], [[float(text)] for text in texts])
+
+    def test_long_inputs_are_split_and_reassembled(self):
+        self.model.release.set()
+        texts = [str(i) for i in range(10)]
+        self.assertEqual(self.embeddings.embed_documents(texts), [[float(text)] for text in texts])
+        self.assertTrue(all(len(batch) <= 4 for batch in self.model.batches))
+
+    def test_model_errors_reach_the_caller(self):
+        self.model.release.set()
+        with self.assertRaisesMessage(RuntimeError, "model failed"):
+            self.embeddings.embed_documents(["1", "fail"])
+        self.assertEqual(self.embeddings.embed_query("2"), [2.0])
@@ -7,6 +7,7 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from ReSearch.pagination import KeysetPagination
 from .models import Chat, GroupChat, Message, MessageReceipt, GroupMembership, UserChatNote
 from .serializers import (
     ChatSerializer, 
@@ -204,15 +205,18 @@ def remove_group_member(request, group_id):
     return Response({'status': 'member removed'})
 
 # Message views
+class MessageCursorPagination(KeysetPagination):
+    ordering = ('-created_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def message_list(request):
     """Get messages for a chat or group chat"""
     chat_id = request.query_params.get('chat_id')
     group_id = request.query_params.get('group_id')
-    page = int(request.query_params.get('page', 1))
-    page_size = int(request.query_params.get('page_size', 50))
-    
+
     if not (chat_id or group_id):
         return Response(
             {'error': 'chat_id or group_id is required'},
@@ -234,13 +238,21 @@ def message_list(request):
         )
         messages = messages.filter(group_chat=group)
         
-    # Paginate messages
-    start = (page - 1) * page_size
-    end = start + page_size
-    messages = messages.order_by('-created_at')[start:end]
-    
-    serializer = MessageSerializer(messages, many=True, context={'request': request})
-    return Response(serializer.data)
+    # Legacy page numbers, kept for existing clients
+    if 'page' in request.query_params:
+        page = int(request.query_params.get('page', 1))
+        page_size = int(request.query_params.get('page_size', 50))
+        start = (page - 1) * page_size
+        end = start + page_size
+        messages = messages.order_by('-created_at')[start:end]
+        serializer = MessageSerializer(messages, many=True, context={'request': request})
+        return Response(serializer.data)
+
+    # Newest first, resumed from the cursor of the previous page
+    paginator = MessageCursorPagination()
+    page = paginator.paginate_queryset(messages, request)
+    serializer = MessageSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.db.models import Count, Q
 from django import forms
-from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper
+from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper, paper_dedup_key
 import json
 
 class ResearchPaperForm(forms.ModelForm):
@@ -19,6 +19,7 @@ class ResearchPaperForm(forms.ModelForm):
             'source',
             'url',
             'pdf_url',
+            'doi',
             'categories_text',
             'publication_date',
         ]
@@ -48,6 +49,14 @@ class ResearchPaperForm(forms.ModelForm):
         except json.JSONDecodeError:
             raise forms.ValidationError("Please enter valid JSON")
 
+    def clean(self):
+        cleaned_data = super().clean()
+        if not self.instance.pk and cleaned_data.get('url'):
+            dedup_key = paper_dedup_key(cleaned_data['url'], cleaned_data.get('doi'))
+            if ResearchPaper.objects.filter(dedup_key=dedup_key).exists():
+                raise forms.ValidationError("This paper already exists")
+        return cleaned_data
+
     def save(self, commit=True):
         instance = super().save(commit=False)
         instance.authors = self.cleaned_data['authors_text']
@@ -69,7 +78,7 @@ class ResearchPaperAdmin(admin.ModelAdmin):
             'fields': ('title', 'abstract', 'authors_text', 'source')
         }),
         ('URLs', {
-            'fields': ('url', 'pdf_url')
+            'fields': ('url', 'pdf_url', 'doi')
         }),
         ('Dates', {
             'fields': ('publication_date', 'created_at')
@@ -85,15 +94,6 @@ class ResearchPaperAdmin(admin.ModelAdmin):
         })
     )
     
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request)
-        return queryset.annotate(
-            active_bookmarks_count=Count(
-                'paper_bookmarks',
-                filter=Q(paper_bookmarks__is_active=True)
-            )
-        )
-
     def formatted_authors(self, obj):
         if isinstance(obj.authors, str):
             try:
@@ -111,9 +111,9 @@ class ResearchPaperAdmin(admin.ModelAdmin):
     def active_bookmarks_count(self, obj):
         url = reverse('admin:scraping_bookmarkedpaper_changelist')
         return format_html('<a href="{}?paper__id={}&is_active=1">{}</a>', 
-                         url, obj.id, obj.active_bookmarks_count)
+                         url, obj.id, obj.bookmark_count)
     active_bookmarks_count.short_description = 'Active Bookmarks'
-    active_bookmarks_count.admin_order_field = 'active_bookmarks_count'
+    active_bookmarks_count.admin_order_field = 'bookmark_count'
 
     def bookmarks_preview(self, obj):
         if not obj.pk:  # If this is a new object
@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+from typing import List
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import CATEGORIES, bump_namespace
+from .models import adjust_counter, ResearchPaper, BookmarkedPaper, ReadPaper, ReadingRollup, ResearchPaperCategory, CategoryLike
+from .reading_stats import invalidate_reading_stats
+from .tasks import schedule_recommendation_refresh
+
+TOGGLE = 'toggle'
+ADD = 'add'
+REMOVE = 'remove'
+ACTIONS = (TOGGLE, ADD, REMOVE)
+MAX_BULK_IDS = 1000
+
+@dataclass
+class BulkResult:
+    added: List = field(default_factory=list)
+    removed: List = field(default_factory=list)
+    missing: List = field(default_factory=list)
+
+    def as_dict(self, target_field):
+        target = f'{target_field}_id'
+        return {
+            'added': [str(getattr(row, target)) for row in self.added],
+            'removed': [str(getattr(row, target)) for row in self.removed],
+            'missing': self.missing,
+        }
+
+def unique_ids(ids) -> list:
+    return list(dict.fromkeys(str(i) for i in ids))
+
+def bulk_missing_ids(target_model, ids) -> list:
+    ids = unique_ids(ids)
+    targets = existing_targets(target_model, ids)
+    return [i for i in ids if i not in targets]
+
+def existing_targets(target_model, ids):
+    """Map of ``str(pk)`` to pk for the ``ids`` that exist; raises ValidationError for malformed ids"""
+    pks = target_model.objects.filter(pk__in=ids).values_list('pk', flat=True)
+    return {str(pk): pk for pk in pks}
+
+def bulk_toggle(model, user, target_model, target_field, ids, action=TOGGLE, timestamp_field=None,
+                soft_delete=False) -> BulkResult:
+    """Add or remove ``user``'s rows for many targets in one transaction.
+
+    Removals match the model's single toggle: one DELETE, or with
+    ``soft_delete`` one UPDATE of ``is_active``. Adds reactivate an existing
+    inactive row, so the (user, target) unique constraints hold. Counters and
+    rollups are left to the caller, which applies them once per batch.
+    """
+    ids = unique_ids(ids)
+    targets = existing_targets(target_model, ids)
+    result = BulkResult(missing=[i for i in ids if i not in targets])
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = {
+            str(getattr(row, f'{target_field}_id')): row
+            for row in model.objects.select_for_update().filter(
+                user=user, **{f'{target_field}_id__in': list(targets.values())}
+            )
+        }
+        to_create, to_activate = [], []
+        for key, pk in targets.items():
+            row = rows.get(key)
+            active = row is not None and row.is_active
+            wanted = (not active) if action == TOGGLE else (action == ADD)
+            if wanted and not active:
+                if row is None:
+                    to_create.append(model(user=user, is_active=True, **{f'{target_field}_id': pk}))
+                else:
+                    row.is_active = True
+                    if timestamp_field:
+                        setattr(row, timestamp_field, now)
+                    to_activate.append(row)
+            elif active and not wanted:
+                row.is_active = False
+                result.removed.append(row)
+
+        model.objects.bulk_create(to_create)
+        fields = ['is_active'] + ([timestamp_field] if timestamp_field else [])
+        model.objects.bulk_update(to_activate, fields)
+        if result.removed:
+            removed = model.objects.filter(pk__in=[row.pk for row in result.removed])
+            if soft_delete:
+                removed.update(is_active=False)
+            else:
+                removed.delete()
+        result.added = to_create + to_activate
+    return result
+
+def adjust_counters(result, target_model, target_field, counter_field):
+    """Apply a bulk toggle to the targets' denormalized counters, one grouped
+    UPDATE per direction instead of one per row"""
+    adjust_counter(target_model, [getattr(row, f'{target_field}_id') for row in result.added], counter_field, 1)
+    adjust_counter(target_model, [getattr(row, f'{target_field}_id') for row in result.removed], counter_field, -1)
+
+def bulk_bookmarks(user, paper_ids, action=TOGGLE) -> BulkResult:
+    with transaction.atomic():
+        result = bulk_toggle(BookmarkedPaper, user, ResearchPaper, 'paper', paper_ids, action, 'bookmarked_at')
+        adjust_counters(result, ResearchPaper, 'paper', 'bookmark_count')
+    if result.added or result.removed:
+        schedule_recommendation_refresh(user.id)
+    return result
+
+def bulk_reads(user, paper_ids, action=TOGGLE) -> BulkResult:
+    with transaction.atomic():
+        result = bulk_toggle(ReadPaper, user, ResearchPaper, 'paper', paper_ids, action, 'read_at')
+        changed = result.added + result.removed
+        papers = ResearchPaper.objects.in_bulk([row.paper_id for row in changed])
+        for row in changed:
+            row.paper = papers[row.paper_id]
+        ReadingRollup.record_many(result.removed, -1)
+        ReadingRollup.record_many(result.added, 1)
+    if changed:
+        schedule_recommendation_refresh(user.id)
+        invalidate_reading_stats(user.id)
+    return result
+
+def bulk_category_likes(user, category_ids, action=TOGGLE) -> BulkResult:
+    with transaction.atomic():
+        result = bulk_toggle(CategoryLike, user, ResearchPaperCategory, 'category', category_ids, action,
+                             soft_delete=True)
+        adjust_counters(result, ResearchPaperCategory, 'category', 'like_count')
+    if result.added or result.removed:
+        schedule_recommendation_refresh(user.id)
+        bump_namespace(CATEGORIES)
+    return result
+
+def parse_bulk_request(data, ids_key):
+    """``(ids, action)`` from a request body, or raise ValidationError"""
+    ids = data.get(ids_key)
+    action = data.get('action', TOGGLE)
+    if not ids or not isinstance(ids, list):
+        raise ValidationError(f"{ids_key} must be a non-empty list.")
+    if len(ids) > MAX_BULK_IDS:
+        raise ValidationError(f"{ids_key} is limited to {MAX_BULK_IDS} ids.")
+    if action not in ACTIONS:
+        raise ValidationError(f"action must be one of {', '.join(ACTIONS)}.")
+    return ids, action
@@ -0,0 +1,51 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+
+# Namespaces whose entries are invalidated together by bumping a generation counter
+PAPERS = 'papers'
+CATEGORIES = 'categories'
+
+def user_namespace(user_id) -> str:
+    return f'user:{user_id}'
+
+def _version_key(namespace: str) -> str:
+    return f'ns:{namespace}:version'
+
+def namespace_version(namespace: str) -> int:
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so entries written under an evicted counter are never reused
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+def bump_namespace(namespace: str):
+    """Invalidate every key of ``namespace`` in O(1) by moving to a new generation"""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+
+def canonical_params(params) -> str:
+    """Order-independent digest of query parameters (a QueryDict or a plain dict)"""
+    if hasattr(params, 'lists'):
+        items = params.lists()
+    else:
+        items = ((key, value if isinstance(value, (list, tuple)) else [value]) for key, value in params.items())
+    canonical = '&'.join(
+        f'{key}={value}'
+        for key, values in sorted(items)
+        for value in sorted(str(v) for v in values)
+    )
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+def versioned_key(namespace: str, *parts, params=None) -> str:
+    """Cache key embedding the current generation of ``namespace``"""
+    segments = [namespace, f'v{namespace_version(namespace)}', *(str(part) for part in parts)]
+    if params is not None:
+        segments.append(canonical_params(params))
+    return ':'.join(segments)
@@ -0,0 +1,42 @@
+from typing import Iterable
+
+from django.db.models import Count
+
+from .models import CategoryStat, PaperCategory, normalize_category
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+
+def requested_categories(values: Iterable[str]) -> list:
+    """Normalized category names from query values, accepting repeated and comma-separated params"""
+    names = []
+    for value in values:
+        for name in str(value).split(','):
+            name = normalize_category(name)
+            if name and name not in names:
+                names.append(name)
+    return names
+
+def paper_ids_with_categories(categories: Iterable[str], match: str = MATCH_ANY):
+    """Subquery of paper ids tagged with any (or all) of ``categories``"""
+    names = [normalize_category(name) for name in categories]
+    links = PaperCategory.objects.filter(name__in=names)
+    if match == MATCH_ALL and len(set(names)) > 1:
+        return (
+            links.values('paper_id')
+            .annotate(matched=Count('name'))
+            .filter(matched=len(set(names)))
+            .values('paper_id')
+        )
+    return links.values('paper_id')
+
+def filter_by_categories(queryset, categories: Iterable[str], match: str = MATCH_ANY, field: str = 'id'):
+    """Exact, index-backed category filter for ResearchPaper (or related) querysets"""
+    names = [name for name in categories if name]
+    if not names:
+        return queryset
+    return queryset.filter(**{f'{field}__in': paper_ids_with_categories(names, match)})
+
+def category_counts():
+    """``(category, paper count)`` pairs, most common first, from the materialized CategoryStat table"""
+    return CategoryStat.objects.filter(paper_count__gt=0).values_list('name', 'paper_count')
@@ -0,0 +1,62 @@
+import logging
+from dataclasses import dataclass
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ResearchPaper, ResearchPaperCategory, BookmarkedPaper, CategoryLike
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class DenormalizedCounter:
+    """``model.field`` caches the number of active ``source`` rows pointing at it through ``fk_name``"""
+    model: type
+    field: str
+    source: type
+    fk_name: str
+
+    @property
+    def name(self) -> str:
+        return f'{self.model.__name__}.{self.field}'
+
+    def actual_count(self):
+        return Coalesce(Subquery(
+            self.source.objects.filter(**{self.fk_name: OuterRef('pk'), 'is_active': True})
+            .order_by().values(self.fk_name).annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    def drift(self):
+        """``(pk, stored, actual)`` for every row whose counter disagrees with its source rows"""
+        return list(
+            self.model.objects.annotate(actual=self.actual_count())
+            .filter(~Q(**{self.field: F('actual')}))
+            .values_list('pk', self.field, 'actual')
+        )
+
+    def repair(self, pks):
+        # Recounted inside the UPDATE itself, so toggles committed after drift()
+        # ran are not overwritten with a stale value
+        return self.model.objects.filter(pk__in=pks).update(**{self.field: self.actual_count()})
+
+COUNTERS = (
+    DenormalizedCounter(ResearchPaper, 'bookmark_count', BookmarkedPaper, 'paper'),
+    DenormalizedCounter(ResearchPaperCategory, 'like_count', CategoryLike, 'category'),
+)
+
+def reconcile_counters(repair=True) -> dict:
+    """Detect (and by default repair) drift in every denormalized counter.
+
+    Returns the number of drifted rows per counter.
+    """
+    report = {}
+    for counter in COUNTERS:
+        drifted = counter.drift()
+        report[counter.name] = len(drifted)
+        if not drifted:
+            continue
+        sample = ', '.join(f'{pk}: {stored} != {actual}' for pk, stored, actual in drifted[:5])
+        logger.warning(f"{counter.name} drifted on {len(drifted)} rows ({sample})")
+        if repair:
+            counter.repair([pk for pk, _, _ in drifted])
+    return report
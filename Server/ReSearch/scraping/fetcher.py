@@ -0,0 +1,393 @@
+"""
+The one paper fetcher, used by the server's source adapters (scraping.sources)
+and by the scripts in "AI models and codes/", which load this file directly;
+it must not import Django.
+"""
+import asyncio
+import datetime
+import logging
+import random
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import quote
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+###############################################################################
+# Configuration
+###############################################################################
+
+ARXIV_URL = "http://export.arxiv.org/api/query"
+IEEE_API_URL = "https://ieeexploreapi.ieee.org/api/v1/search/articles"
+IEEE_SEARCH_URL = "https://ieeexplore.ieee.org/search/searchresult.jsp"
+SCIDIR_API_URL = "https://api.elsevier.com/content/search/scidir"
+
+# Minimum seconds between two requests to the same source.
+# arXiv asks API clients for one request every three seconds.
+RATE_LIMITS = {"arxiv": 3.0, "ieee": 1.0, "sciencedirect": 1.0}
+
+ARXIV_PAGE_SIZE = 1000
+MAX_CONNECTIONS = 20
+MAX_ATTEMPTS = 4
+BACKOFF_SECONDS = 1.0
+REQUEST_TIMEOUT = 60
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+
+###############################################################################
+# Rate limiting & retries
+###############################################################################
+
+class RateLimiter:
+    """Spaces requests to one source at least `interval` seconds apart"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_at = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval
+
+
+class RetryableError(Exception):
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+###############################################################################
+# Fetcher
+###############################################################################
+
+class MultiSourceFetcher:
+    """
+    Async fetcher for arXiv, IEEE Xplore and ScienceDirect.
+
+    All sources share one aiohttp connection pool; each source has its own
+    rate limiter, and failed requests are retried with exponential backoff.
+    IEEE pages without an API key are rendered in one headless browser context
+    that is reused by every query of the fetcher.
+
+    Use as `async with MultiSourceFetcher() as fetcher: ...`.
+    """
+
+    def __init__(self, ieee_api_key=None, scidir_api_key=None, rate_limits=None,
+                 urls=None, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF_SECONDS):
+        self.ieee_api_key = ieee_api_key
+        self.scidir_api_key = scidir_api_key
+        self.urls = {
+            "arxiv": ARXIV_URL,
+            "ieee_api": IEEE_API_URL,
+            "ieee_search": IEEE_SEARCH_URL,
+            "sciencedirect": SCIDIR_API_URL,
+            **(urls or {}),
+        }
+        limits = {**RATE_LIMITS, **(rate_limits or {})}
+        self.limiters = {source: RateLimiter(interval) for source, interval in limits.items()}
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.session = None
+        self._playwright = None
+        self._browser = None
+        self._browser_context = None
+        self._browser_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=MAX_CONNECTIONS // 2)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        if self._browser is not None:
+            await self._browser_context.close()
+            await self._browser.close()
+            await self._playwright.stop()
+
+    async def _request(self, source, url, params, parse, headers=None):
+        """GET `url` with the source's rate limit, retrying transient failures"""
+        for attempt in range(1, self.max_attempts + 1):
+            await self.limiters[source].wait()
+            try:
+                async with self.session.get(url, params=params, headers=headers) as response:
+                    if response.status in RETRY_STATUSES:
+                        raise RetryableError(response.status, _retry_after(response))
+                    response.raise_for_status()
+                    return await parse(response)
+            except (RetryableError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.max_attempts:
+                    raise
+                delay = getattr(e, "retry_after", None) or self.backoff * 2 ** (attempt - 1)
+                delay += random.uniform(0, self.backoff / 2)
+                logger.warning(f"{source} request failed ({e!r}); retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def fetch_text(self, source, url, params=None, headers=None):
+        """Body of any page, under `source`'s rate limit and retries"""
+        return await self._request(source, url, params, _read_text, headers)
+
+    # arXiv -------------------------------------------------------------------
+
+    async def iter_arxiv_pages(self, query, max_results=10, start_date=None, end_date=None,
+                               page_size=ARXIV_PAGE_SIZE):
+        """Page through arXiv's `start` offset until `max_results` papers are fetched"""
+        search_query = arxiv_search_query(query, start_date, end_date)
+        fetched = 0
+        while fetched < max_results:
+            params = {
+                "search_query": search_query,
+                "start": fetched,
+                "max_results": min(page_size, max_results - fetched),
+            }
+            page = await self._request("arxiv", self.urls["arxiv"], params, _read_bytes)
+            entries = ET.fromstring(page).findall(f"{ATOM}entry")
+            if not entries:
+                return
+            yield [parse_arxiv_entry(entry) for entry in entries]
+            fetched += len(entries)
+
+    async def fetch_arxiv(self, query, max_results=10, start_date=None, end_date=None, page_size=ARXIV_PAGE_SIZE):
+        papers = []
+        async for page in self.iter_arxiv_pages(query, max_results, start_date, end_date, page_size):
+            papers.extend(page)
+        return papers
+
+    # ScienceDirect -----------------------------------------------------------
+
+    async def fetch_sciencedirect(self, query, max_results=10):
+        if not self.scidir_api_key:
+            raise ValueError("ScienceDirect needs an Elsevier API key")
+        params = {"query": query, "count": max_results, "apiKey": self.scidir_api_key}
+        data = await self._request("sciencedirect", self.urls["sciencedirect"], params, _read_json)
+        return [
+            {
+                "title": entry.get("dc:title"),
+                "abstract": entry.get("dc:description") or "",
+                "authors": [author.get("$") for author in (entry.get("authors") or {}).get("author", [])],
+                "source": "ScienceDirect",
+                "url": _scidir_link(entry),
+                "pdf_url": None,
+                "categories": [],
+                "publication_date": entry.get("prism:coverDate"),
+            }
+            for entry in data.get("search-results", {}).get("entry", [])
+            if entry.get("dc:title")
+        ]
+
+    # IEEE --------------------------------------------------------------------
+
+    async def fetch_ieee(self, query, max_results=10):
+        if self.ieee_api_key:
+            return await self._fetch_ieee_api(query, max_results)
+        return await self._fetch_ieee_browser(query, max_results)
+
+    async def _fetch_ieee_api(self, query, max_results):
+        params = {"querytext": query, "max_records": max_results, "apikey": self.ieee_api_key}
+        data = await self._request("ieee", self.urls["ieee_api"], params, _read_json)
+        return [
+            {
+                "title": article.get("title"),
+                "abstract": article.get("abstract") or "",
+                "authors": [
+                    author.get("full_name")
+                    for author in (article.get("authors") or {}).get("authors", [])
+                ],
+                "source": "IEEE",
+                "url": article.get("html_url"),
+                "pdf_url": article.get("pdf_url"),
+                "categories": (article.get("index_terms") or {}).get("author_terms", {}).get("terms", []),
+                "publication_date": article.get("publication_date"),
+            }
+            for article in data.get("articles", [])
+        ]
+
+    async def _browser_page(self):
+        async with self._browser_lock:
+            if self._browser_context is None:
+                from playwright.async_api import async_playwright
+
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                self._browser_context = await self._browser.new_context()
+        return await self._browser_context.new_page()
+
+    async def _fetch_ieee_browser(self, query, max_results):
+        from bs4 import BeautifulSoup
+
+        await self.limiters["ieee"].wait()
+        page = await self._browser_page()
+        try:
+            await page.goto(f"{self.urls['ieee_search']}?newsearch=true&queryText={quote(query)}", timeout=60000)
+            # Wait for the results instead of sleeping a fixed time
+            await page.wait_for_selector("div.List-results-items", timeout=30000)
+            html_content = await page.content()
+        finally:
+            await page.close()
+
+        base_url = self.urls["ieee_search"].split("/search/")[0]
+        soup = BeautifulSoup(html_content, "html.parser")
+        papers = []
+        for item in soup.select("div.List-results-items > div.List-results-item")[:max_results]:
+            title_tag = item.select_one("h2.result-item-title > a")
+            if not title_tag:
+                continue
+            authors_block = item.select_one("p.author")
+            abstract_block = item.select_one("div.description")
+            papers.append({
+                "title": title_tag.get_text(strip=True),
+                "abstract": abstract_block.get_text(strip=True) if abstract_block else "",
+                "authors": [a.strip() for a in authors_block.get_text(strip=True).split(";")] if authors_block else [],
+                "source": "IEEE",
+                "url": base_url + title_tag.get("href", ""),
+                "pdf_url": None,
+                "categories": [],
+                "publication_date": None,
+            })
+        return papers
+
+    # All sources -------------------------------------------------------------
+
+    async def query_sources(self, query, max_results=10, sources=("ieee", "sciencedirect", "arxiv")):
+        """Query the sources concurrently; a failing source is logged and skipped"""
+        fetchers = {
+            "arxiv": self.fetch_arxiv,
+            "ieee": self.fetch_ieee,
+            "sciencedirect": self.fetch_sciencedirect,
+        }
+        results = await asyncio.gather(
+            *(fetchers[source](query, max_results=max_results) for source in sources),
+            return_exceptions=True,
+        )
+        all_results = []
+        for source, result in zip(sources, results):
+            if isinstance(result, Exception):
+                logger.error(f"Could not fetch from {source}: {result!r}")
+                continue
+            all_results.extend(result)
+        return all_results
+
+###############################################################################
+# Parsing helpers
+###############################################################################
+
+async def _read_bytes(response):
+    return await response.read()
+
+
+async def _read_text(response):
+    return await response.text()
+
+
+async def _read_json(response):
+    return await response.json(content_type=None)
+
+
+def _scidir_link(entry):
+    links = entry.get("link") or []
+    if isinstance(links, dict):
+        links = [links]
+    for link in links:
+        if link.get("@ref") == "scidir":
+            return link.get("@href")
+    return links[0].get("@href") if links else None
+
+
+def as_date(value):
+    # Dates arrive as ISO strings when the fetch runs in a Celery task
+    return datetime.date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def arxiv_search_query(query, start_date=None, end_date=None):
+    """`all:{query}`, with a submittedDate range when either date is given"""
+    search_query = f"all:{query}"
+    start_date, end_date = as_date(start_date), as_date(end_date)
+    if start_date or end_date:
+        start_str = start_date.strftime("%Y%m%d0000") if start_date else "000001010000"
+        end_str = end_date.strftime("%Y%m%d2359") if end_date else "999912312359"
+        search_query += f" AND submittedDate:[{start_str} TO {end_str}]"
+    return search_query
+
+
+def parse_arxiv_entry(entry):
+    def text(tag):
+        return (entry.findtext(tag) or "").strip()
+
+    pdf_link = None
+    for link in entry.findall(f"{ATOM}link"):
+        if link.get("type") == "application/pdf":
+            pdf_link = link.get("href")
+
+    # Missing fields stay empty, so ingestion skips or defaults them itself
+    return {
+        "title": " ".join(text(f"{ATOM}title").split()),
+        "abstract": text(f"{ATOM}summary"),
+        "authors": [
+            (author.findtext(f"{ATOM}name") or "Unknown").strip()
+            for author in entry.findall(f"{ATOM}author")
+        ],
+        "source": "arXiv",
+        "url": text(f"{ATOM}id"),
+        "pdf_url": pdf_link,
+        "categories": [cat.get("term") for cat in entry.findall(f"{ATOM}category") if cat.get("term")],
+        "publication_date": text(f"{ATOM}published")[:10] or None,
+        "doi": text(f"{ARXIV}doi") or None,
+    }
+
+###############################################################################
+# Blocking wrappers for the scripts
+###############################################################################
+
+def fetch_arxiv_papers(query, start_date=None, end_date=None, max_results=5):
+    async def run():
+        async with MultiSourceFetcher() as fetcher:
+            return await fetcher.fetch_arxiv(query, max_results, start_date, end_date)
+    return asyncio.run(run())
+
+
+def query_sources(query, max_results=10, ieee_api_key=None, scidir_api_key=None):
+    async def run():
+        async with MultiSourceFetcher(ieee_api_key, scidir_api_key) as fetcher:
+            return await fetcher.query_sources(query, max_results)
+    return asyncio.run(run())
+
+
+def scrape_ieee(queries, max_results=5):
+    """IEEE results for one query, or a list of result lists sharing one browser"""
+    single = isinstance(queries, str)
+    if single:
+        queries = [queries]
+
+    async def run():
+        async with MultiSourceFetcher() as fetcher:
+            return await asyncio.gather(*(fetcher.fetch_ieee(q, max_results) for q in queries))
+
+    results = asyncio.run(run())
+    return results[0] if single else results
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    papers = query_sources(" ".join(sys.argv[1:]) or "cardiology", max_results=5)
+    print(json.dumps(papers, indent=2))
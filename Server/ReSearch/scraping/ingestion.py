@@ -0,0 +1,137 @@
+import logging
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterable, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import search
+from .caching import PAPERS, bump_namespace
+from .models import ResearchPaper, PaperCategory, paper_dedup_key
+from .tasks import index_batch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 2000
+# Columns an ingested record may overwrite; counters and citation data are kept
+UPSERT_FIELDS = (
+    'title', 'abstract', 'authors', 'source', 'url', 'pdf_url', 'doi',
+    'categories', 'publication_date', 'updated_at',
+)
+DATE_FORMATS = ('%Y-%m-%d', '%d %B %Y', '%B %Y', '%b %Y', '%Y')
+
+@dataclass
+class IngestResult:
+    created: int = 0
+    updated: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+
+    def add(self, other: 'IngestResult'):
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self):
+        return asdict(self)
+
+def parse_publication_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value[:10] if fmt == '%Y-%m-%d' else value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def as_list(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(',') if part.strip()]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+def normalize_paper(raw: dict, source: str = '') -> Optional[dict]:
+    """Map a source record onto ResearchPaper fields, or None when it has no title or URL"""
+    title = ' '.join(str(raw.get('title') or '').split())
+    url = str(raw.get('url') or '').strip()
+    if not title or not url:
+        return None
+    doi = str(raw.get('doi') or '').strip() or None
+    return {
+        'title': title[:500],
+        'abstract': str(raw.get('abstract') or raw.get('summary') or raw.get('abstract_snippet') or '').strip(),
+        'authors': as_list(raw.get('authors')),
+        'source': str(raw.get('source') or source)[:50],
+        'url': url,
+        'pdf_url': raw.get('pdf_url') or None,
+        'doi': doi[:255] if doi else None,
+        'categories': as_list(raw.get('categories')),
+        'publication_date': parse_publication_date(raw.get('publication_date')) or timezone.localdate(),
+        'dedup_key': paper_dedup_key(url, doi),
+    }
+
+def batched(iterable: Iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def upsert_batch(records: List[dict]) -> IngestResult:
+    """Insert or update one batch of normalized records keyed on ``dedup_key``.
+
+    bulk_create skips model signals, so this does their work once per batch:
+    category rows and counts, the FTS table, the vector index and the list caches.
+    """
+    result = IngestResult()
+    unique = {}
+    for record in records:
+        if record['dedup_key'] in unique:
+            result.duplicates += 1
+        unique[record['dedup_key']] = record
+    if not unique:
+        return result
+
+    with transaction.atomic():
+        existing = set(
+            ResearchPaper.objects.filter(dedup_key__in=unique).values_list('dedup_key', flat=True)
+        )
+        papers = [ResearchPaper(**record) for record in unique.values()]
+        ResearchPaper.objects.bulk_create(
+            papers,
+            batch_size=DEFAULT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['dedup_key'],
+            update_fields=UPSERT_FIELDS,
+        )
+        # Updated rows keep their stored id, whatever was generated for the instance
+        stored = dict(
+            ResearchPaper.objects.filter(dedup_key__in=unique).values_list('dedup_key', 'id')
+        )
+        for paper in papers:
+            paper.id = stored[paper.dedup_key]
+
+        PaperCategory.sync(papers)
+        search.index_papers(papers)
+        index_batch.add(*(str(paper.id) for paper in papers))
+
+    result.updated = len(existing)
+    result.created = len(papers) - len(existing)
+    return result
+
+def ingest(records: Iterable[dict], source: str = '', batch_size: int = DEFAULT_BATCH_SIZE) -> IngestResult:
+    """Normalize, deduplicate and upsert raw paper records in batches"""
+    total = IngestResult()
+    for batch in batched(records, batch_size):
+        normalized = [normalize_paper(raw, source) for raw in batch]
+        result = upsert_batch([record for record in normalized if record])
+        result.skipped = normalized.count(None)
+        total.add(result)
+        logger.info(f"Ingested batch from {source or 'records'}: {result.as_dict()}")
+    if total.created or total.updated:
+        bump_namespace(PAPERS)
+    return total
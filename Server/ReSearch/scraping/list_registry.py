@@ -0,0 +1,185 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from django.db.models import Prefetch
+
+from .categories import MATCH_ANY, filter_by_categories, requested_categories
+from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike, ReadPaper
+from .search import search_papers, search_related
+from .serializers import (
+    ResearchPaperSerializer,
+    BookmarkedPaperSerializer,
+    CategorySerializer,
+    CategoryLikeSerializer,
+    ReadPaperSerializer
+)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 5000
+
+def annotate_paper_list(queryset, request, include_user_state=True):
+    """Attach everything ResearchPaperSerializer reads per row, so a page costs a fixed number of queries"""
+    if include_user_state and request.user.is_authenticated:
+        queryset = queryset.prefetch_related(
+            Prefetch(
+                'paper_bookmarks',
+                queryset=BookmarkedPaper.objects.filter(user=request.user, is_active=True),
+                to_attr='user_bookmarks'
+            ),
+            Prefetch(
+                'paper_readers',
+                queryset=ReadPaper.objects.filter(user=request.user, is_active=True),
+                to_attr='user_reads'
+            )
+        )
+    return queryset
+
+# Filter builders: each returns ``apply(queryset, value, params)``
+
+def lookup(orm_lookup: str, cast: Callable = str):
+    return lambda queryset, value, params: queryset.filter(**{orm_lookup: cast(value)})
+
+def as_bool(value: str) -> bool:
+    return value == 'True'
+
+def paper_search(queryset, value, params):
+    return search_papers(queryset, value)
+
+def related_search(queryset, value, params):
+    return search_related(queryset, value)
+
+def paper_categories(queryset, value, params):
+    categories = requested_categories(params.getlist('category'))
+    return filter_by_categories(queryset, categories, params.get('category_match', MATCH_ANY))
+
+@dataclass(frozen=True)
+class TableSpec:
+    """How one table is listed: what it serializes with, how it is loaded and
+    which filters and sorts clients may use"""
+    model: type
+    serializer: type
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple = ()
+    # Extra per-request query plan, e.g. annotations that depend on the user
+    plan: Optional[Callable] = None
+    filters: Dict[str, Callable] = field(default_factory=dict)
+    sorts: Tuple[str, ...] = ()
+    # Index field lists (from the model's Meta) that the filters and sorts rely on
+    indexes: Tuple[Tuple[str, ...], ...] = ()
+
+    def queryset(self, request):
+        queryset = self.model.objects.all()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if self.plan:
+            queryset = self.plan(queryset, request)
+        return queryset
+
+    def filter(self, queryset, params):
+        for name, apply in self.filters.items():
+            if value := params.get(name):
+                queryset = apply(queryset, value, params)
+        if sort := params.get('sort'):
+            if sort.lstrip('-') in self.sorts:
+                queryset = queryset.order_by(sort)
+        return queryset
+
+    def serialize(self, rows, request):
+        return self.serializer(rows, many=True, context={'request': request}).data
+
+    def missing_indexes(self):
+        declared = {tuple(index.fields) for index in self.model._meta.indexes}
+        return [fields for fields in self.indexes if tuple(fields) not in declared]
+
+TABLES: Dict[str, TableSpec] = {}
+
+def register(name: str, spec: TableSpec):
+    TABLES[name] = spec
+    return spec
+
+def interaction_filters(date_field: str, search: Callable = related_search) -> Dict[str, Callable]:
+    return {
+        'search': search,
+        'user': lookup('user_id'),
+        'is_active': lookup('is_active', as_bool),
+        'date_from': lookup(f'{date_field}__gte'),
+        'date_to': lookup(f'{date_field}__lte'),
+    }
+
+register('ResearchPaper', TableSpec(
+    model=ResearchPaper,
+    serializer=ResearchPaperSerializer,
+    plan=annotate_paper_list,
+    filters={
+        'search': paper_search,
+        'title': lookup('title__icontains'),
+        'source': lookup('source'),
+        'category': paper_categories,
+        'date_from': lookup('publication_date__gte'),
+        'date_to': lookup('publication_date__lte'),
+    },
+    sorts=('publication_date', 'created_at', 'citation_count', 'title'),
+    indexes=(('-publication_date',), ('-publication_date', '-created_at', 'id'), ('source',)),
+))
+
+register('BookmarkedPaper', TableSpec(
+    model=BookmarkedPaper,
+    serializer=BookmarkedPaperSerializer,
+    select_related=('paper', 'user'),
+    filters=interaction_filters('bookmarked_at'),
+    sorts=('bookmarked_at',),
+    indexes=(('user', 'is_active'), ('paper', 'is_active')),
+))
+
+register('ReadPaper', TableSpec(
+    model=ReadPaper,
+    serializer=ReadPaperSerializer,
+    select_related=('paper', 'user'),
+    filters=interaction_filters('read_at'),
+    sorts=('read_at',),
+    indexes=(('user', 'is_active'), ('paper', 'is_active')),
+))
+
+register('CategoryLike', TableSpec(
+    model=CategoryLike,
+    serializer=CategoryLikeSerializer,
+    select_related=('user',),
+    # Likes point at a category, not a paper, so search matches its name
+    filters=interaction_filters('created_at', search=lookup('category__name__icontains')),
+    sorts=('created_at',),
+    indexes=(('user', 'is_active'), ('category', 'is_active')),
+))
+
+register('ResearchPaperCategory', TableSpec(
+    model=ResearchPaperCategory,
+    serializer=CategorySerializer,
+    select_related=('created_by',),
+    prefetch_related=(Prefetch('category_likes', queryset=CategoryLike.objects.select_related('user')),),
+    filters={'title': lookup('name__icontains')},
+    sorts=('name', 'like_count', 'created_at'),
+    indexes=(('name',), ('created_by',), ('-like_count',)),
+))
+
+def page_bounds(params):
+    """``(offset, limit)`` from ``offset``/``limit`` params, clamped like ResearchPaperPagination"""
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        offset = max(int(params.get('offset', 0)), 0)
+    except ValueError:
+        limit, offset = DEFAULT_LIMIT, 0
+    return offset, limit
+
+def list_table(name: str, params, request):
+    """Serialized rows of one registered table; paginated as ``{count, results}``
+    when ``pagginated=True``"""
+    spec = TABLES[name]
+    queryset = spec.filter(spec.queryset(request), params)
+    if params.get('pagginated') != 'True':
+        return spec.serialize(queryset, request)
+    offset, limit = page_bounds(params)
+    return {
+        'count': queryset.count(),
+        'results': spec.serialize(queryset[offset:offset + limit], request),
+    }
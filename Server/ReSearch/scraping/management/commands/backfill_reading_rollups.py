@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from scraping.models import ReadingRollup
+from scraping.reading_stats import reconcile_reading_rollups
+
+class Command(BaseCommand):
+    help = "Recompute the per-user monthly reading rollups from the active ReadPaper rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', help="Only rebuild this user id (repeatable)")
+        parser.add_argument('--check', action='store_true', help="Only report users whose rollups drifted")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = reconcile_reading_rollups(repair=False)
+            self.stdout.write(f"Found {len(drifted)} users with drifted rollups")
+            return
+        count = ReadingRollup.rebuild(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {count} monthly rollups"))
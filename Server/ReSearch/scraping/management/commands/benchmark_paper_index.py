@@ -0,0 +1,82 @@
+import time
+
+import faiss
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from scraping.paper_index import INDEX_DIMENSIONS, INDEX_TYPES, build_faiss_index
+
+def synthetic_corpus(size: int, rng: np.random.Generator, topics: int = 256) -> np.ndarray:
+    """Non-negative, L2-normalized topic mixtures that cluster like TF-IDF paper vectors"""
+    centers = rng.random((topics, INDEX_DIMENSIONS), dtype=np.float32) ** 4
+    vectors = np.empty((size, INDEX_DIMENSIONS), dtype=np.float32)
+    for start in range(0, size, 100000):
+        stop = min(start + 100000, size)
+        labels = rng.integers(0, topics, stop - start)
+        noise = rng.random((stop - start, INDEX_DIMENSIONS), dtype=np.float32) * 0.3
+        vectors[start:stop] = centers[labels] + noise
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def user_profiles(corpus: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Query vectors shaped like recommendation profiles: the mean of a few papers"""
+    picks = rng.integers(0, len(corpus), (count, 5))
+    profiles = corpus[picks].mean(axis=1).astype(np.float32)
+    faiss.normalize_L2(profiles)
+    return profiles
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the paper index types (build time, memory, p50/p99 query latency "
+        "and recall@K against the exact flat index) on synthetic corpora."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10000, 100000, 1000000])
+        parser.add_argument('--types', nargs='+', choices=INDEX_TYPES, default=list(INDEX_TYPES))
+        parser.add_argument('--k', type=int, default=10)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--nprobe', type=int)
+        parser.add_argument('--ef-search', type=int)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        k = options['k']
+        overrides = {}
+        if options['nprobe']:
+            overrides['nprobe'] = options['nprobe']
+        if options['ef_search']:
+            overrides['ef_search'] = options['ef_search']
+
+        header = f"{'size':>9} {'type':<9} {'build s':>9} {'memory MB':>10} {'p50 ms':>8} {'p99 ms':>8} {'recall@' + str(k):>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for size in options['sizes']:
+            corpus = synthetic_corpus(size, rng)
+            queries = user_profiles(corpus, options['queries'], rng)
+            exact = faiss.IndexFlatIP(INDEX_DIMENSIONS)
+            exact.add(corpus)
+            _, truth = exact.search(queries, k)
+
+            for index_type in options['types']:
+                started = time.perf_counter()
+                index = build_faiss_index(corpus, index_type, **overrides)
+                build_seconds = time.perf_counter() - started
+                memory_mb = len(faiss.serialize_index(index)) / 2 ** 20
+
+                latencies = []
+                hits = 0
+                for query, expected in zip(queries, truth):
+                    started = time.perf_counter()
+                    _, found = index.search(query[None, :], k)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    hits += len(set(found[0].tolist()) & set(expected.tolist()))
+
+                self.stdout.write(
+                    f"{size:>9} {index_type:<9} {build_seconds:>9.2f} {memory_mb:>10.1f} "
+                    f"{np.percentile(latencies, 50):>8.3f} {np.percentile(latencies, 99):>8.3f} "
+                    f"{hits / (k * len(queries)):>10.3f}"
+                )
+            del corpus, exact
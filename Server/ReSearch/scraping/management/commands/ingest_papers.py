@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scraping.ingestion import DEFAULT_BATCH_SIZE, ingest
+from scraping.sources import SOURCES, get_source
+from scraping.tasks import enqueue, ingest_papers
+
+class Command(BaseCommand):
+    help = "Fetch papers from a source adapter and bulk upsert them, deduplicated by DOI, arXiv id or URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=sorted(SOURCES))
+        parser.add_argument('--query', help="Search query for arxiv, sciencedirect and ieee")
+        parser.add_argument('--path', help="JSON or NDJSON file for the file source")
+        parser.add_argument('--max-results', type=int, default=100)
+        parser.add_argument('--start-date', type=date.fromisoformat, help="YYYY-MM-DD (arxiv)")
+        parser.add_argument('--end-date', type=date.fromisoformat, help="YYYY-MM-DD (arxiv)")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--async', action='store_true', dest='run_async', help="Queue a Celery task instead")
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if source == 'file':
+            if not options['path']:
+                raise CommandError("--path is required for the file source")
+            fetch_options = {'path': options['path']}
+        else:
+            if not options['query']:
+                raise CommandError(f"--query is required for the {source} source")
+            fetch_options = {'query': options['query'], 'max_results': options['max_results']}
+            if source == 'arxiv':
+                fetch_options.update(start_date=options['start_date'], end_date=options['end_date'])
+
+        if options['run_async']:
+            # Dates travel as ISO strings through the broker
+            fetch_options = {key: str(value) if isinstance(value, date) else value for key, value in fetch_options.items()}
+            enqueue(ingest_papers, source, options['batch_size'], **fetch_options)
+            self.stdout.write(self.style.SUCCESS(f"Queued ingestion from {source}"))
+            return
+
+        try:
+            result = ingest(get_source(source)(**fetch_options), source, options['batch_size'])
+        except Exception as e:
+            raise CommandError(f"Ingestion from {source} failed: {str(e)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.created}, updated {result.updated}, "
+            f"skipped {result.skipped} invalid and {result.duplicates} duplicate records"
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from scraping.models import CategoryStat
+
+class Command(BaseCommand):
+    help = "Recompute the materialized per-category paper counts used by research_focus"
+
+    def handle(self, *args, **options):
+        CategoryStat.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt counts for {CategoryStat.objects.count()} categories"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from scraping.search import rebuild_search_index
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 paper search table from the research papers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Paper search index rebuilt"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from scraping.counters import reconcile_counters
+
+class Command(BaseCommand):
+    help = "Compare denormalized like and bookmark counters with their source rows and repair drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report drifted rows")
+
+    def handle(self, *args, **options):
+        report = reconcile_counters(repair=not options['dry_run'])
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        for name, drifted in report.items():
+            self.stdout.write(f"{verb} {drifted} drifted rows in {name}")
+        self.stdout.write(self.style.SUCCESS("Counters reconciled"))
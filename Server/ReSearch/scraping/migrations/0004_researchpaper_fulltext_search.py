@@ -0,0 +1,56 @@
+from django.db import migrations
+
+from scraping.search import FTS_TABLE, PAPER_TABLE, fts_rowid
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "paper_id UNINDEXED, title, abstract, authors, tokenize='porter unicode61')"
+        )
+        ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+        rows = [
+            (
+                fts_rowid(paper.id), paper.id.hex, paper.title or '', paper.abstract or '',
+                ' '.join(str(author) for author in (paper.authors or []))
+            )
+            for paper in ResearchPaper.objects.only('id', 'title', 'abstract', 'authors').iterator()
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, paper_id, title, abstract, authors) VALUES (%s, %s, %s, %s, %s)',
+                rows
+            )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"ALTER TABLE {PAPER_TABLE} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(abstract, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(authors::text, '')), 'C')"
+            ") STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX scraping_researchpaper_search_gin ON {PAPER_TABLE} USING GIN (search_vector)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS scraping_researchpaper_search_gin')
+        schema_editor.execute(f'ALTER TABLE {PAPER_TABLE} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0003_rename_averagereadingtime_researchpaper_average_reading_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_paper_categories(apps, schema_editor):
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    PaperCategory = apps.get_model('scraping', 'PaperCategory')
+    links = []
+    for paper_id, categories in ResearchPaper.objects.values_list('id', 'categories').iterator(chunk_size=2000):
+        names = {' '.join(str(name).lower().split())[:100] for name in (categories or [])} - {''}
+        links.extend(PaperCategory(paper_id=paper_id, name=name) for name in names)
+        if len(links) >= 5000:
+            PaperCategory.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    PaperCategory.objects.bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0004_researchpaper_fulltext_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaperCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('paper', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_links', to='scraping.researchpaper')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'paper'], name='scraping_pa_name_98ca68_idx')],
+                'unique_together': {('paper', 'name')},
+            },
+        ),
+        migrations.RunPython(populate_paper_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:18
+
+from django.db import migrations, models
+
+
+def populate_category_stats(apps, schema_editor):
+    PaperCategory = apps.get_model('scraping', 'PaperCategory')
+    CategoryStat = apps.get_model('scraping', 'CategoryStat')
+    counts = PaperCategory.objects.values('name').annotate(count=models.Count('paper_id'))
+    CategoryStat.objects.bulk_create(
+        [CategoryStat(name=row['name'], paper_count=row['count']) for row in counts],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0005_papercategory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('paper_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-paper_count', 'name'],
+            },
+        ),
+        migrations.RunPython(populate_category_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_reading_rollups(apps, schema_editor):
+    from django.utils import timezone
+
+    ReadPaper = apps.get_model('scraping', 'ReadPaper')
+    ReadingRollup = apps.get_model('scraping', 'ReadingRollup')
+    totals = {}
+    reads = ReadPaper.objects.filter(is_active=True, user__isnull=False).select_related('paper')
+    for read in reads.order_by().iterator(chunk_size=2000):
+        key = (read.user_id, timezone.localdate(read.read_at).replace(day=1))
+        rollup = totals.setdefault(key, ReadingRollup(user_id=key[0], month=key[1], categories={}))
+        paper = read.paper
+        rollup.papers += 1
+        rollup.citations += paper.citation_count or 0
+        if paper.average_reading_time is not None:
+            rollup.reading_time += paper.average_reading_time
+            rollup.timed_papers += 1
+        for name in {' '.join(str(name).lower().split())[:100] for name in (paper.categories or [])} - {''}:
+            rollup.categories[name] = rollup.categories.get(name, 0) + 1
+    ReadingRollup.objects.bulk_create(totals.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0006_categorystat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('papers', models.PositiveIntegerField(default=0)),
+                ('citations', models.PositiveBigIntegerField(default=0)),
+                ('reading_time', models.PositiveBigIntegerField(default=0)),
+                ('timed_papers', models.PositiveIntegerField(default=0)),
+                ('categories', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reading_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['month'],
+                'unique_together': {('user', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_reading_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0007_readingrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='researchpaper',
+            index=models.Index(fields=['-publication_date', '-created_at', 'id'], name='scraping_re_publica_f7ebd5_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def active_count(model, fk_name):
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk_name: OuterRef('pk'), 'is_active': True})
+        .order_by().values(fk_name).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def populate_counters(apps, schema_editor):
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    ResearchPaperCategory = apps.get_model('scraping', 'ResearchPaperCategory')
+    BookmarkedPaper = apps.get_model('scraping', 'BookmarkedPaper')
+    CategoryLike = apps.get_model('scraping', 'CategoryLike')
+    ResearchPaper.objects.update(bookmark_count=active_count(BookmarkedPaper, 'paper'))
+    # like_count also counted inactive likes in places; recount it from scratch
+    ResearchPaperCategory.objects.update(like_count=active_count(CategoryLike, 'category'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0008_researchpaper_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='researchpaper',
+            name='bookmark_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
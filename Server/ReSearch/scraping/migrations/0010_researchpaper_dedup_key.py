@@ -0,0 +1,60 @@
+# Generated by Django 5.1.4 on 2026-10-17 12:33
+
+import re
+from hashlib import sha1
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+
+# Frozen copy of scraping.models.paper_dedup_key for papers without a DOI,
+# so later changes to the model cannot alter what this migration writes
+ARXIV_ID_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$', re.IGNORECASE)
+
+
+def paper_dedup_key(url):
+    url = (url or '').strip()
+    if match := ARXIV_ID_RE.search(url):
+        return f'arxiv:{match.group(1).lower()}'[:255]
+    parts = urlsplit(url)
+    normalized = f'{parts.netloc.lower()}{parts.path.rstrip("/")}' + (f'?{parts.query}' if parts.query else '')
+    return f'url:{sha1(normalized.encode()).hexdigest()}'
+
+
+def populate_dedup_keys(apps, schema_editor):
+    ResearchPaper = apps.get_model('scraping', 'ResearchPaper')
+    seen = set()
+    batch = []
+    # Oldest paper wins; later duplicates get a key of their own that
+    # ingestion never produces, so saving them cannot collide
+    for paper in ResearchPaper.objects.only('id', 'url').order_by('created_at').iterator(chunk_size=2000):
+        key = paper_dedup_key(paper.url)
+        if key in seen:
+            key = f'dup:{paper.pk}'
+        seen.add(key)
+        paper.dedup_key = key
+        batch.append(paper)
+        if len(batch) >= 2000:
+            ResearchPaper.objects.bulk_update(batch, ['dedup_key'])
+            batch = []
+    ResearchPaper.objects.bulk_update(batch, ['dedup_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scraping', '0009_researchpaper_bookmark_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='researchpaper',
+            name='dedup_key',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='researchpaper',
+            name='doi',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.RunPython(populate_dedup_keys, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,62 @@
-from django.db import models
+from collections import defaultdict
+from hashlib import sha1
+from urllib.parse import urlsplit
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
+import re
 import uuid
 
+def adjust_counter(model, pks, field, delta):
+    """Add ``delta`` to ``field`` on the rows in ``pks`` with a single UPDATE,
+    never taking a counter below zero"""
+    pks = list(pks)
+    if not pks or not delta:
+        return
+    queryset = model.objects.filter(pk__in=pks)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: models.F(field) + delta})
+
+class ActiveCounterMixin:
+    """Keeps a denormalized count of active rows on a related object.
+
+    Subclasses set ``counter = (fk_name, counter_field)``. Every save or delete
+    that flips the row's ``is_active`` state adjusts the counter in the same
+    transaction, relative to the state the row was loaded with.
+    """
+    counter = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_active = instance.__dict__.get('is_active', False)
+        return instance
+
+    def _adjust_counter(self, delta):
+        fk_name, field = self.counter
+        target = self._meta.get_field(fk_name).related_model
+        adjust_counter(target, [getattr(self, f'{fk_name}_id')], field, delta)
+
+    def save(self, *args, **kwargs):
+        was_active = getattr(self, '_stored_active', False)
+        update_fields = kwargs.get('update_fields')
+        tracked = update_fields is None or 'is_active' in update_fields
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if tracked:
+                self._adjust_counter(int(self.is_active) - int(was_active))
+        if tracked:
+            self._stored_active = self.is_active
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            if getattr(self, '_stored_active', False):
+                self._adjust_counter(-1)
+            result = super().delete(*args, **kwargs)
+        self._stored_active = False
+        return result
+
 class ResearchPaper(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=500)
@@ -10,10 +65,15 @@ class ResearchPaper(models.Model):
     source = models.CharField(max_length=50)
     url = models.URLField()
     pdf_url = models.URLField(null=True, blank=True)
+    doi = models.CharField(max_length=255, null=True, blank=True)
+    # DOI, arXiv id or URL hash; the conflict target of the ingestion upsert
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True, editable=False)
     categories = models.JSONField(default=list)
     publication_date = models.DateField()
     citation_count = models.PositiveIntegerField(default=0)
     average_reading_time = models.PositiveIntegerField(null=True, blank=True,default=0)
+    # Active BookmarkedPaper rows; maintained by BookmarkedPaper, repaired by reconcile_counters
+    bookmark_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -26,13 +86,148 @@ class ResearchPaper(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'url', 'doi'} & set(update_fields):
+            # Follows url/doi edits, unless another paper already has the new key
+            key = paper_dedup_key(self.url, self.doi)
+            if key != self.dedup_key:
+                if not ResearchPaper.objects.filter(dedup_key=key).exclude(pk=self.pk).exists():
+                    self.dedup_key = key
+                elif not self.dedup_key:
+                    self.dedup_key = duplicate_dedup_key(self.pk)
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'dedup_key'}
+        super().save(*args, **kwargs)
+
+    def sync_categories(self):
+        """Mirror the ``categories`` JSON list into the indexed PaperCategory rows"""
+        PaperCategory.sync([self])
+
     class Meta:
         ordering = ['-publication_date']
         indexes = [
             models.Index(fields=['-publication_date']),
+            models.Index(fields=['-publication_date', '-created_at', 'id']),
             models.Index(fields=['source']),
         ]
 
+def normalize_category(name) -> str:
+    """Case- and whitespace-insensitive form used for exact category matching"""
+    return ' '.join(str(name).lower().split())[:100]
+
+def category_names(categories) -> set:
+    return {normalize_category(name) for name in (categories or [])} - {''}
+
+ARXIV_ID_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?/?$', re.IGNORECASE)
+DOI_PREFIX_RE = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:)', re.IGNORECASE)
+
+def paper_dedup_key(url, doi=None) -> str:
+    """Identity of a paper across sources: its DOI, else its arXiv id, else a
+    hash of its URL ignoring the scheme, host case and any trailing slash"""
+    if doi and (doi := DOI_PREFIX_RE.sub('', doi.strip())):
+        return f'doi:{doi.lower()}'[:255]
+    url = (url or '').strip()
+    if match := ARXIV_ID_RE.search(url):
+        return f'arxiv:{match.group(1).lower()}'[:255]
+    parts = urlsplit(url)
+    normalized = f'{parts.netloc.lower()}{parts.path.rstrip("/")}' + (f'?{parts.query}' if parts.query else '')
+    return f'url:{sha1(normalized.encode()).hexdigest()}'
+
+def duplicate_dedup_key(pk) -> str:
+    """Key of a paper whose identity is already taken by another row; ingestion
+    never produces it, so upserts keep landing on the original"""
+    return f'dup:{pk}'
+
+class PaperCategory(models.Model):
+    """One row per (paper, category) pair, normalized from ``ResearchPaper.categories``"""
+    paper = models.ForeignKey(
+        ResearchPaper,
+        on_delete=models.CASCADE,
+        related_name='category_links'
+    )
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ('paper', 'name')
+        indexes = [
+            models.Index(fields=['name', 'paper']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} - {self.paper_id}"
+
+    @classmethod
+    def sync(cls, papers):
+        """Mirror the ``categories`` of many papers into PaperCategory rows and
+        CategoryStat counts with a bounded number of queries"""
+        papers = list(papers)
+        if not papers:
+            return
+        wanted = {(paper.id, name) for paper in papers for name in category_names(paper.categories)}
+        existing = set(
+            cls.objects.filter(paper_id__in=[paper.id for paper in papers]).values_list('paper_id', 'name')
+        )
+        stale, missing = existing - wanted, wanted - existing
+        deltas = defaultdict(int)
+        with transaction.atomic():
+            stale_by_name = defaultdict(list)
+            for paper_id, name in stale:
+                stale_by_name[name].append(paper_id)
+                deltas[name] -= 1
+            for name, paper_ids in stale_by_name.items():
+                cls.objects.filter(name=name, paper_id__in=paper_ids).delete()
+            cls.objects.bulk_create(
+                [cls(paper_id=paper_id, name=name) for paper_id, name in missing],
+                ignore_conflicts=True, batch_size=1000
+            )
+            for paper_id, name in missing:
+                deltas[name] += 1
+            by_delta = defaultdict(list)
+            for name, delta in deltas.items():
+                if delta:
+                    by_delta[delta].append(name)
+            for delta, names in by_delta.items():
+                CategoryStat.adjust(names, delta)
+
+class CategoryStat(models.Model):
+    """Materialized number of papers per normalized category"""
+    name = models.CharField(max_length=100, unique=True)
+    paper_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-paper_count', 'name']
+
+    def __str__(self):
+        return f"{self.name} ({self.paper_count})"
+
+    @classmethod
+    def adjust(cls, names, delta):
+        """Add ``delta`` to the count of every category in ``names``"""
+        names = list(names)
+        if not names:
+            return
+        if delta > 0:
+            cls.objects.bulk_create([cls(name=name) for name in names], ignore_conflicts=True)
+        cls.objects.filter(name__in=names).update(paper_count=models.F('paper_count') + delta)
+        if delta < 0:
+            cls.objects.filter(name__in=names, paper_count__lte=0).delete()
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every count from the PaperCategory rows"""
+        counts = (
+            PaperCategory.objects.values('name')
+            .annotate(count=models.Count('paper_id'))
+            .values_list('name', 'count')
+        )
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [cls(name=name, paper_count=count) for name, count in counts.iterator()],
+                batch_size=1000
+            )
+
 class ReadPaper(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
@@ -63,12 +258,127 @@ class ReadPaper(models.Model):
         return f"{user_email} - {self.paper.title}"
 
     def soft_delete(self):
-        self.is_active = False
-        self.save()
+        with transaction.atomic():
+            if self.is_active:
+                ReadingRollup.record(self, -1)
+            self.is_active = False
+            self.save()
     def hard_delete(self):
         super().delete()
 
-class BookmarkedPaper(models.Model):
+def month_start(moment):
+    day = timezone.localdate(moment)
+    return day.replace(day=1)
+
+class ReadingRollup(models.Model):
+    """Per-user monthly totals of active reads, kept current as reads are toggled"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='reading_rollups'
+    )
+    month = models.DateField()
+    papers = models.PositiveIntegerField(default=0)
+    citations = models.PositiveBigIntegerField(default=0)
+    reading_time = models.PositiveBigIntegerField(default=0)
+    timed_papers = models.PositiveIntegerField(default=0)
+    categories = models.JSONField(default=dict)
+
+    class Meta:
+        unique_together = ('user', 'month')
+        ordering = ['month']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.month:%Y-%m}"
+
+    def apply(self, paper, delta):
+        self.papers = max(self.papers + delta, 0)
+        self.citations = max(self.citations + delta * (paper.citation_count or 0), 0)
+        if paper.average_reading_time is not None:
+            self.reading_time = max(self.reading_time + delta * paper.average_reading_time, 0)
+            self.timed_papers = max(self.timed_papers + delta, 0)
+        for name in category_names(paper.categories):
+            count = self.categories.get(name, 0) + delta
+            if count > 0:
+                self.categories[name] = count
+            else:
+                self.categories.pop(name, None)
+
+    @classmethod
+    def record(cls, read, delta):
+        """Add (``delta=1``) or remove (``delta=-1``) an active read from its month"""
+        cls.record_many([read], delta)
+
+    @classmethod
+    def record_many(cls, reads, delta):
+        """``record`` for many reads, locking each affected (user, month) row once"""
+        by_month = {}
+        for read in reads:
+            if read.user_id is not None:
+                by_month.setdefault((read.user_id, month_start(read.read_at)), []).append(read)
+        with transaction.atomic():
+            for (user_id, month), month_reads in by_month.items():
+                cls.objects.get_or_create(user_id=user_id, month=month)
+                rollup = cls.objects.select_for_update().get(user_id=user_id, month=month)
+                for read in month_reads:
+                    rollup.apply(read.paper, delta)
+                if rollup.papers:
+                    rollup.save()
+                else:
+                    rollup.delete()
+
+    def totals(self):
+        return (self.papers, self.citations, self.reading_time, self.timed_papers, self.categories)
+
+    @classmethod
+    def compute(cls, user_ids=None):
+        """Unsaved rollups of ``user_ids`` (or everyone) recomputed from the active reads"""
+        reads = ReadPaper.objects.filter(is_active=True, user__isnull=False).select_related('paper')
+        if user_ids is not None:
+            reads = reads.filter(user_id__in=user_ids)
+
+        totals = {}
+        for read in reads.order_by().iterator(chunk_size=2000):
+            key = (read.user_id, month_start(read.read_at))
+            if key not in totals:
+                totals[key] = cls(user_id=key[0], month=key[1], categories={})
+            totals[key].apply(read.paper, 1)
+        return totals
+
+    @classmethod
+    def rebuild(cls, user_ids=None):
+        """Recompute the rollups of ``user_ids`` (or everyone) from the active reads"""
+        rollups = cls.objects.all()
+        if user_ids is not None:
+            rollups = rollups.filter(user_id__in=user_ids)
+        totals = cls.compute(user_ids)
+
+        with transaction.atomic():
+            rollups.delete()
+            cls.objects.bulk_create(totals.values(), batch_size=1000)
+        return len(totals)
+
+    @classmethod
+    def drifted_users(cls):
+        """Ids of users whose stored rollups differ from a recount of their reads.
+
+        Removing a read subtracts the paper's current citations and categories,
+        which drift once the paper changes after it was read; ReadPaper writes
+        that bypass ``record`` (admin edits, queryset updates) are missed entirely.
+        """
+        expected = {key: rollup.totals() for key, rollup in cls.compute().items()}
+        stored = {
+            (rollup.user_id, rollup.month): rollup.totals()
+            for rollup in cls.objects.order_by().iterator(chunk_size=2000)
+        }
+        return sorted({
+            user_id for user_id, month in expected.keys() | stored.keys()
+            if expected.get((user_id, month)) != stored.get((user_id, month))
+        }, key=str)
+
+class BookmarkedPaper(ActiveCounterMixin, models.Model):
+    counter = ('paper', 'bookmark_count')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -137,7 +447,7 @@ class ResearchPaperCategory(models.Model):
         return self.name
 
     def update_like_count(self):
-        self.like_count = self.likes.count()
+        self.like_count = self.category_likes.filter(is_active=True).count()
         self.save(update_fields=['like_count'])
 
     def toggle_like(self, user):
@@ -152,7 +462,9 @@ class ResearchPaperCategory(models.Model):
     def is_liked_by(self, user):
         return self.likes.filter(id=user.id).exists()
 
-class CategoryLike(models.Model):
+class CategoryLike(ActiveCounterMixin, models.Model):
+    counter = ('category', 'like_count')
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -179,19 +491,11 @@ class CategoryLike(models.Model):
         user_email = self.user.email if self.user else 'Deleted User'
         return f"{user_email} - {self.category.name}"
 
-    def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        if is_new and self.is_active:
-            self.category.like_count = models.F('like_count') + 1
-            self.category.save(update_fields=['like_count'])
-
     def delete(self, *args, **kwargs):
+        """Soft delete; the like_count decrement happens in save()"""
         if self.is_active:
             self.is_active = False
             self.save(update_fields=['is_active'])
-            self.category.like_count = models.F('like_count') - 1
-            self.category.save(update_fields=['like_count'])
 
     def hard_delete(self, *args, **kwargs):
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        return super().delete(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,408 @@
+import fcntl
+import json
+import logging
+import os
+import pickle
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+import faiss
+import numpy as np
+from django.conf import settings
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+INDEX_DIMENSIONS = 200
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+DEFAULT_INDEX_OPTIONS = {
+    'nlist': 1024,          # IVF: number of centroids (capped at rows / 39)
+    'nprobe': 16,           # IVF: centroids visited per query
+    'pq_m': 20,             # IVF-PQ: sub-quantizers, must divide INDEX_DIMENSIONS
+    'pq_bits': 8,           # IVF-PQ: bits per sub-quantizer code
+    'hnsw_m': 32,           # HNSW: graph degree
+    'ef_construction': 200,
+    'ef_search': 128,
+}
+# Approximate indexes need training data and only pay off on larger corpora
+ANN_MIN_ROWS = 10000
+# Fold the delta and tombstones into a new base once they reach this share of it
+COMPACT_RATIO = 0.2
+COMPACT_MIN_ROWS = 1000
+
+# ResearchPaper fields the index vectors are built from
+INDEXED_FIELDS = ('id', 'title', 'abstract', 'categories', 'authors')
+
+MANIFEST_FILE = 'manifest.json'
+BASE_INDEX_FILE = 'base.index'
+BASE_IDS_FILE = 'base_ids.npy'
+BASE_VECTORS_FILE = 'base_vectors.npy'
+DELTA_VECTORS_FILE = 'delta_vectors.npy'
+DELTA_IDS_FILE = 'delta_ids.npy'
+TOMBSTONES_FILE = 'tombstones.npy'
+VECTORIZER_FILE = 'vectorizer.pkl'
+
+def process_categories(categories):
+    if not categories:
+        return ''
+    try:
+        return ','.join(str(cat).strip().lower() for cat in categories)
+    except:
+        return ''
+
+def paper_text(paper: Dict) -> str:
+    return (
+        f"{str(paper.get('title', '')).lower()} {str(paper.get('abstract', '')).lower()} "
+        f"{process_categories(paper.get('categories', []))} "
+        f"{' '.join(str(author).lower() for author in paper.get('authors', []))}"
+    )
+
+def index_options(**overrides) -> Dict:
+    options = dict(DEFAULT_INDEX_OPTIONS)
+    options.update(getattr(settings, 'PAPER_INDEX_OPTIONS', {}))
+    options.update(overrides)
+    return options
+
+def build_faiss_index(vectors: np.ndarray, index_type: Optional[str] = None, **overrides):
+    """Create, train and fill an inner-product index of the configured type.
+
+    Falls back to an exact flat index when there are too few vectors to train
+    an approximate one.
+    """
+    index_type = index_type or getattr(settings, 'PAPER_INDEX_TYPE', 'flat')
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown paper index type '{index_type}', expected one of {INDEX_TYPES}")
+    options = index_options(**overrides)
+    dimensions = vectors.shape[1] if vectors.ndim == 2 else INDEX_DIMENSIONS
+    if index_type != 'flat' and len(vectors) < ANN_MIN_ROWS:
+        index_type = 'flat'
+
+    if index_type == 'flat':
+        index = faiss.IndexFlatIP(dimensions)
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimensions, options['hnsw_m'], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = options['ef_construction']
+    else:
+        nlist = max(1, min(options['nlist'], len(vectors) // 39))
+        quantizer = faiss.IndexFlatIP(dimensions)
+        if index_type == 'ivf_flat':
+            index = faiss.IndexIVFFlat(quantizer, dimensions, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer, dimensions, nlist, options['pq_m'], options['pq_bits'],
+                faiss.METRIC_INNER_PRODUCT
+            )
+        index.train(vectors)
+
+    for i in range(0, len(vectors), CHUNK_SIZE):
+        index.add(vectors[i:i + CHUNK_SIZE])
+    configure_search(index, **overrides)
+    return index
+
+def configure_search(index, **overrides):
+    """Apply the query-time knobs (nprobe / efSearch) of approximate indexes"""
+    options = index_options(**overrides)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = options['ef_search']
+        return
+    try:
+        faiss.extract_index_ivf(index).nprobe = options['nprobe']
+    except RuntimeError:
+        pass  # not an IVF index
+
+def _atomic_save(path: str, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+class PaperIndexManager:
+    """On-disk paper vector index shared by every request of a process.
+
+    The store is a read-only, memory-mapped ``base`` FAISS index (flat, IVF or
+    HNSW, see ``settings.PAPER_INDEX_TYPE``) with its exact vectors kept in a
+    memory-mapped side array, plus a small
+    in-memory ``delta`` of papers appended since the last compaction.
+    Deleted or re-indexed papers are tombstoned by row and skipped at search
+    time until the next compaction rewrites the base without them. Rows are
+    numbered across both parts: ``[0, base.ntotal)`` then the delta.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None):
+        self.store_dir = store_dir or settings.PAPER_INDEX_DIR
+        self.index = None
+        self.base_vectors = None
+        self.delta = None
+        self.paper_ids: List[str] = []
+        self.id_to_row: Dict[str, int] = {}
+        self.tombstones = set()
+        self.vectorizer = None
+        self.version = None
+        self.load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    @contextmanager
+    def _lock(self, operation):
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(self._path('.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers across processes, working on the latest on-disk state"""
+        with self._lock(fcntl.LOCK_EX):
+            if self.is_stale():
+                self._load()
+            yield
+
+    def _manifest_version(self):
+        try:
+            return os.stat(self._path(MANIFEST_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def is_stale(self) -> bool:
+        return self._manifest_version() != self.version
+
+    def load(self):
+        """Read the store under a shared lock, so every file comes from the same write"""
+        with self._lock(fcntl.LOCK_SH):
+            self._load()
+
+    def _load(self):
+        self.version = self._manifest_version()
+        self.index = None
+        self.base_vectors = None
+        self.delta = faiss.IndexFlatIP(INDEX_DIMENSIONS)
+        self.paper_ids = []
+        self.tombstones = set()
+        self.vectorizer = None
+        if self.version is None:
+            self.id_to_row = {}
+            return
+        try:
+            self.index = faiss.read_index(
+                self._path(BASE_INDEX_FILE), getattr(faiss, 'IO_FLAG_MMAP_IFC', 0)
+            )
+            configure_search(self.index)
+            self.base_vectors = np.load(self._path(BASE_VECTORS_FILE), mmap_mode='r')
+            self.paper_ids = np.load(self._path(BASE_IDS_FILE)).tolist()
+            if os.path.exists(self._path(DELTA_IDS_FILE)):
+                self.delta.add(np.load(self._path(DELTA_VECTORS_FILE)))
+                self.paper_ids.extend(np.load(self._path(DELTA_IDS_FILE)).tolist())
+            if os.path.exists(self._path(TOMBSTONES_FILE)):
+                self.tombstones = set(np.load(self._path(TOMBSTONES_FILE)).tolist())
+            with open(self._path(VECTORIZER_FILE), 'rb') as f:
+                self.vectorizer = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Paper index loading error: {str(e)}", exc_info=True)
+            self.index = None
+            self.base_vectors = None
+            self.paper_ids = []
+            self.tombstones = set()
+        self.id_to_row = {
+            pid: row for row, pid in enumerate(self.paper_ids) if row not in self.tombstones
+        }
+
+    @property
+    def base_size(self) -> int:
+        return self.index.ntotal if self.index else 0
+
+    @property
+    def size(self) -> int:
+        """Number of live (non-tombstoned) papers"""
+        return len(self.id_to_row)
+
+    def _save_delta(self):
+        delta_vectors = (
+            self.delta.reconstruct_n(0, self.delta.ntotal) if self.delta.ntotal
+            else np.zeros((0, INDEX_DIMENSIONS), dtype='float32')
+        )
+        _atomic_save(self._path(DELTA_VECTORS_FILE), lambda f: np.save(f, delta_vectors))
+        _atomic_save(
+            self._path(DELTA_IDS_FILE),
+            lambda f: np.save(f, np.array(self.paper_ids[self.base_size:], dtype=str))
+        )
+        _atomic_save(
+            self._path(TOMBSTONES_FILE),
+            lambda f: np.save(f, np.array(sorted(self.tombstones), dtype=np.int64))
+        )
+
+    def _write_manifest(self):
+        manifest = {
+            'base_size': self.base_size,
+            'delta_size': self.delta.ntotal,
+            'tombstones': len(self.tombstones),
+            'dimensions': INDEX_DIMENSIONS,
+            'index_type': type(self.index).__name__ if self.index else None,
+        }
+        _atomic_save(self._path(MANIFEST_FILE), lambda f: f.write(json.dumps(manifest).encode()))
+        self.version = self._manifest_version()
+
+    def _write_base(self, index, vectors: np.ndarray, paper_ids: List[str]):
+        faiss.write_index(index, self._path(f"{BASE_INDEX_FILE}.tmp"))
+        os.replace(self._path(f"{BASE_INDEX_FILE}.tmp"), self._path(BASE_INDEX_FILE))
+        _atomic_save(self._path(BASE_VECTORS_FILE), lambda f: np.save(f, vectors))
+        _atomic_save(self._path(BASE_IDS_FILE), lambda f: np.save(f, np.array(paper_ids, dtype=str)))
+        _atomic_save(self._path(VECTORIZER_FILE), lambda f: pickle.dump(self.vectorizer, f))
+
+    def build_vectors(self, papers: List[Dict]) -> np.ndarray:
+        texts = [paper_text(p) for p in papers]
+
+        try:
+            if not self.vectorizer:
+                self.vectorizer = TfidfVectorizer(
+                    max_features=INDEX_DIMENSIONS,
+                    stop_words='english',
+                    ngram_range=(1, 3),
+                    lowercase=True
+                )
+                vectors = self.vectorizer.fit_transform(texts).toarray()
+            else:
+                vectors = self.vectorizer.transform(texts).toarray()
+
+            vectors = np.ascontiguousarray(vectors, dtype='float32')
+            faiss.normalize_L2(vectors)
+            return vectors
+        except Exception as e:
+            logger.error(f"Vector building error: {str(e)}")
+            raise
+
+    def build_index(self, papers: List[Dict]):
+        """Full rebuild: refit the vectorizer and replace the base, delta and tombstones"""
+        with self._write_lock():
+            self.vectorizer = None
+            vectors = self.build_vectors(papers) if papers else np.zeros((0, INDEX_DIMENSIONS), dtype='float32')
+            index = build_faiss_index(vectors)
+            paper_ids = [str(p.get('id')) for p in papers]
+
+            self._write_base(index, vectors, paper_ids)
+            self.index = index
+            self.delta = faiss.IndexFlatIP(INDEX_DIMENSIONS)
+            self.tombstones = set()
+            self.paper_ids = paper_ids
+            self._save_delta()
+            self._write_manifest()
+            self._load()
+
+    def add_papers(self, papers: List[Dict]):
+        """Append new or changed papers without refitting; older rows of the same ids are tombstoned"""
+        if not papers:
+            return
+        if self.index is None:
+            raise ValueError("Paper index has not been built yet.")
+        with self._write_lock():
+            vectors = self.build_vectors(papers)
+            for paper in papers:
+                row = self.id_to_row.get(str(paper.get('id')))
+                if row is not None:
+                    self.tombstones.add(row)
+            self.delta.add(vectors)
+            for paper in papers:
+                self.id_to_row[str(paper.get('id'))] = len(self.paper_ids)
+                self.paper_ids.append(str(paper.get('id')))
+            self._persist_changes()
+
+    def remove_papers(self, paper_ids: Iterable):
+        """Tombstone papers so they are no longer returned by searches"""
+        with self._write_lock():
+            removed = False
+            for paper_id in paper_ids:
+                row = self.id_to_row.pop(str(paper_id), None)
+                if row is not None:
+                    self.tombstones.add(row)
+                    removed = True
+            if removed:
+                self._persist_changes()
+
+    def _persist_changes(self):
+        pending = self.delta.ntotal + len(self.tombstones)
+        if pending >= max(COMPACT_MIN_ROWS, self.base_size * COMPACT_RATIO):
+            self.compact()
+        else:
+            self._save_delta()
+            self._write_manifest()
+
+    def compact(self):
+        """Rewrite the base with the delta folded in and tombstoned rows dropped"""
+        live_rows = np.array(sorted(self.id_to_row.values()), dtype=np.int64)
+        vectors = self.reconstruct_many(live_rows)
+        paper_ids = [self.paper_ids[row] for row in live_rows]
+        index = build_faiss_index(vectors)
+
+        self._write_base(index, vectors, paper_ids)
+        self.index = index
+        self.base_vectors = vectors
+        self.delta = faiss.IndexFlatIP(INDEX_DIMENSIONS)
+        self.tombstones = set()
+        self.paper_ids = paper_ids
+        self.id_to_row = {pid: row for row, pid in enumerate(paper_ids)}
+        self._save_delta()
+        self._write_manifest()
+
+    def reconstruct(self, row: int) -> np.ndarray:
+        if row < self.base_size:
+            return np.array(self.base_vectors[row])
+        return self.delta.reconstruct(row - self.base_size)
+
+    def reconstruct_many(self, rows: np.ndarray) -> np.ndarray:
+        """Exact vectors for ``rows`` (approximate indexes cannot reconstruct them)"""
+        vectors = np.zeros((len(rows), INDEX_DIMENSIONS), dtype='float32')
+        in_base = rows < self.base_size
+        if in_base.any():
+            vectors[in_base] = self.base_vectors[rows[in_base]]
+        for i in np.flatnonzero(~in_base):
+            vectors[i] = self.delta.reconstruct(int(rows[i]) - self.base_size)
+        return vectors
+
+    def profile_vector(self, paper_ids) -> Optional[np.ndarray]:
+        """Normalized mean of the indexed vectors of ``paper_ids``, or None if none are indexed"""
+        rows = [self.id_to_row[pid] for pid in paper_ids if pid in self.id_to_row]
+        if not self.index or not rows:
+            return None
+        profile = self.reconstruct_many(np.array(rows, dtype=np.int64)).mean(axis=0, keepdims=True)
+        faiss.normalize_L2(profile)
+        return profile
+
+    def search_similar(self, profile: np.ndarray, k: int) -> Dict[str, float]:
+        """Cosine similarity of the ``k`` papers closest to ``profile``, keyed by paper id"""
+        if not self.index or profile is None:
+            return {}
+        hits = []
+        # Over-fetch by the tombstone count so dead rows cannot crowd out live ones
+        for index, offset in ((self.index, 0), (self.delta, self.base_size)):
+            fetch = min(k + len(self.tombstones), index.ntotal)
+            if not fetch:
+                continue
+            scores, rows = index.search(profile, fetch)
+            hits.extend(
+                int(row) + offset
+                for row in rows[0]
+                if row >= 0 and int(row) + offset not in self.tombstones
+            )
+        # Re-score candidates exactly; IVF-PQ distances are only approximations
+        rows = np.array(hits, dtype=np.int64)
+        scores = self.reconstruct_many(rows) @ profile[0] if len(rows) else []
+        hits = sorted(zip(map(float, scores), rows.tolist()), reverse=True)
+        return {self.paper_ids[row]: score for score, row in hits[:k]}
+
+_paper_index = None
+_paper_index_lock = threading.Lock()
+
+def get_paper_index() -> PaperIndexManager:
+    """Process-wide PaperIndexManager, reloaded only when another process rewrote the store"""
+    global _paper_index
+    with _paper_index_lock:
+        if _paper_index is None:
+            _paper_index = PaperIndexManager()
+        elif _paper_index.is_stale():
+            _paper_index.load()
+        return _paper_index
@@ -0,0 +1,108 @@
+import logging
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .caching import user_namespace, versioned_key
+from .models import ReadingRollup
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = 86400  # 24 hours
+MAX_MONTHS = 1200
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+Month = Tuple[int, int]
+
+def reading_stats_cache_key(user_id) -> str:
+    return versioned_key(user_namespace(user_id), 'reading_rollups')
+
+def compute_monthly_buckets(user_id) -> Dict[Month, dict]:
+    """Every month of a user's reading history, read from the ReadingRollup table.
+
+    Buckets keep sums rather than averages so any range of months can be merged.
+    """
+    return {
+        (rollup.month.year, rollup.month.month): {
+            'papers': rollup.papers,
+            'citations': rollup.citations,
+            'reading_time': rollup.reading_time,
+            'timed_papers': rollup.timed_papers,
+            'categories': rollup.categories,
+        }
+        for rollup in ReadingRollup.objects.filter(user_id=user_id)
+    }
+
+def monthly_buckets(user_id) -> Dict[Month, dict]:
+    """Cached per user; the ReadPaper signals drop the entry on every change"""
+    cache_key = reading_stats_cache_key(user_id)
+    buckets = cache.get(cache_key)
+    if buckets is None:
+        buckets = compute_monthly_buckets(user_id)
+        cache.set(cache_key, buckets, CACHE_TIMEOUT)
+    return buckets
+
+def invalidate_reading_stats(user_id):
+    cache.delete(reading_stats_cache_key(user_id))
+
+def reconcile_reading_rollups(repair=True) -> list:
+    """Detect (and by default rebuild) users whose monthly rollups drifted from their reads"""
+    drifted = ReadingRollup.drifted_users()
+    if drifted:
+        sample = ', '.join(str(user_id) for user_id in drifted[:5])
+        logger.warning(f"Reading rollups drifted for {len(drifted)} users ({sample})")
+        if repair:
+            ReadingRollup.rebuild(drifted)
+            for user_id in drifted:
+                invalidate_reading_stats(user_id)
+    return drifted
+
+def parse_month(value: str) -> Month:
+    """``'YYYY-MM'`` to ``(year, month)``; raises ValueError when malformed"""
+    year, month = (int(part) for part in value.split('-'))
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month: {value}")
+    return year, month
+
+def month_range(start: Month, end: Month) -> List[Month]:
+    """Months from ``start`` to ``end``, both inclusive"""
+    if (end[0] - start[0]) * 12 + end[1] - start[1] >= MAX_MONTHS:
+        raise ValueError(f"Month ranges are limited to {MAX_MONTHS} months")
+    months = []
+    year, month = start
+    while (year, month) <= end:
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+def shift_month(month: Month, delta: int) -> Month:
+    index = month[0] * 12 + month[1] - 1 + delta
+    return index // 12, index % 12 + 1
+
+def summarize(buckets: Dict[Month, dict], months: List[Month]) -> dict:
+    """Papers read, citation sum, average reading time, impact score and
+    category distribution over ``months``"""
+    papers = citations = reading_time = timed_papers = 0
+    categories = Counter()
+    for month in months:
+        if bucket := buckets.get(month):
+            papers += bucket['papers']
+            citations += bucket['citations']
+            reading_time += bucket['reading_time']
+            timed_papers += bucket['timed_papers']
+            categories.update(bucket['categories'])
+    avg_time = reading_time / timed_papers if timed_papers else 0
+    return {
+        'papers': papers,
+        'citations': citations,
+        'avg_time': avg_time,
+        'impact': citations * 0.5 + avg_time * 0.3 + papers * 0.2,
+        'categories': dict(categories.most_common()),
+    }
+
+def current_month() -> Month:
+    today = timezone.localdate()
+    return today.year, today.month
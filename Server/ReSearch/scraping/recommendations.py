@@ -0,0 +1,247 @@
+import logging
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+import scipy.sparse as sp
+from django.db.models import Count, Max, Q
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from .caching import user_namespace, versioned_key
+from .models import ResearchPaper, CategoryLike
+from .paper_index import get_paper_index
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+CACHE_TIMEOUT = 86400  # 24 hours
+# Only the best this many papers are kept. The old scorer returned every
+# paper with a positive score, but the list is cached per user and paginated,
+# and nobody pages past the first thousand.
+RECOMMENDATION_TOP_K = 1000
+KEYWORD_HASH_FEATURES = 2 ** 18
+
+def recommendations_cache_key(user_id) -> str:
+    return versioned_key(user_namespace(user_id), 'recommendations')
+
+def keyword_tokens(text):
+    """Distinct lower-cased words longer than three characters"""
+    return {word for word in text.lower().split() if len(word) > 3}
+
+@dataclass
+class PaperFeatures:
+    """Column-oriented snapshot of the paper corpus used for scoring.
+
+    Row ``i`` of every matrix/array describes ``paper_ids[i]``.
+    """
+    paper_ids: np.ndarray
+    row_of: Dict[str, int]
+    category_vocab: Dict[str, int]
+    category_matrix: sp.csr_matrix     # papers x categories, multi-hot
+    keyword_matrix: sp.csr_matrix      # papers x hashed words, rows sum to 1
+    author_vocab: Dict[str, int]
+    author_matrix: sp.csr_matrix       # papers x authors, multi-hot
+    citation_score: np.ndarray         # min(log(citations + 1) / 10, 1)
+    has_citations: np.ndarray
+    publication_ordinal: np.ndarray
+    fingerprint: tuple
+
+    @property
+    def category_sizes(self) -> np.ndarray:
+        return np.asarray(self.category_matrix.sum(axis=1)).ravel()
+
+    def rows_for(self, paper_ids) -> np.ndarray:
+        rows = [self.row_of[pid] for pid in paper_ids if pid in self.row_of]
+        return np.asarray(rows, dtype=np.int64)
+
+def _multi_hot(rows_of_values: List[List[str]], vocab: Dict[str, int]) -> sp.csr_matrix:
+    indptr = [0]
+    indices = []
+    for values in rows_of_values:
+        cols = {vocab.setdefault(value, len(vocab)) for value in values}
+        indices.extend(sorted(cols))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.float32)
+    return sp.csr_matrix(
+        (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(rows_of_values), max(len(vocab), 1))
+    )
+
+def corpus_fingerprint() -> tuple:
+    stats = ResearchPaper.objects.aggregate(total=Count('id'), last_update=Max('updated_at'))
+    return stats['total'], stats['last_update']
+
+def build_paper_features(fingerprint: tuple) -> PaperFeatures:
+    rows = list(ResearchPaper.objects.order_by().values_list(
+        'id', 'title', 'abstract', 'categories', 'authors',
+        'citation_count', 'publication_date'
+    ).iterator(chunk_size=CHUNK_SIZE))
+
+    paper_ids = np.array([str(r[0]) for r in rows], dtype=object)
+    category_vocab: Dict[str, int] = {}
+    author_vocab: Dict[str, int] = {}
+    category_matrix = _multi_hot(
+        [[str(cat).lower() for cat in (r[3] or [])] for r in rows], category_vocab
+    )
+    author_matrix = _multi_hot(
+        [[str(author) for author in (r[4] or [])] for r in rows], author_vocab
+    )
+
+    hasher = HashingVectorizer(
+        analyzer=keyword_tokens,
+        n_features=KEYWORD_HASH_FEATURES,
+        alternate_sign=False,
+        binary=True,
+        norm='l1',
+        dtype=np.float32
+    )
+    keyword_matrix = hasher.transform(f"{r[1]} {r[2]}" for r in rows).tocsr()
+
+    citations = np.array([r[5] or 0 for r in rows], dtype=np.float32)
+    publication_ordinal = np.array([r[6].toordinal() for r in rows], dtype=np.int64)
+
+    return PaperFeatures(
+        paper_ids=paper_ids,
+        row_of={pid: i for i, pid in enumerate(paper_ids)},
+        category_vocab=category_vocab,
+        category_matrix=category_matrix,
+        keyword_matrix=keyword_matrix,
+        author_vocab=author_vocab,
+        author_matrix=author_matrix,
+        citation_score=np.minimum(np.log1p(citations) / 10, 1).astype(np.float32),
+        has_citations=citations > 0,
+        publication_ordinal=publication_ordinal,
+        fingerprint=fingerprint,
+    )
+
+_features = None
+_features_lock = threading.Lock()
+
+def get_paper_features() -> PaperFeatures:
+    """Return the process-wide feature snapshot, rebuilding it when papers change"""
+    global _features
+    fingerprint = corpus_fingerprint()
+    features = _features
+    if features is not None and features.fingerprint == fingerprint:
+        return features
+    with _features_lock:
+        if _features is None or _features.fingerprint != fingerprint:
+            _features = build_paper_features(fingerprint)
+        return _features
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest positive scores, best first"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        part = np.argpartition(-scores[candidates], k - 1)[:k]
+        candidates = candidates[part]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+def score_papers(features: PaperFeatures, user_rows: np.ndarray,
+                 user_interests: Dict[str, float], user_authors: set,
+                 similar_papers: Dict[str, float]) -> np.ndarray:
+    """Final 70% interest / 30% diversity score for every paper in ``features``"""
+    n_categories = features.category_matrix.shape[1]
+
+    interest_weights = np.zeros(n_categories, dtype=np.float32)
+    unexplored = np.ones(n_categories, dtype=np.float32)
+    for category, col in features.category_vocab.items():
+        if category in user_interests:
+            interest_weights[col] = user_interests[category]
+            unexplored[col] = 0
+
+    # Category match (30%)
+    category_score = features.category_matrix @ interest_weights
+
+    # Keyword similarity (25%): mean user frequency of each paper's words
+    if len(user_rows):
+        user_keywords = np.asarray(
+            features.keyword_matrix[user_rows].astype(bool).sum(axis=0), dtype=np.float32
+        ).ravel()
+        keyword_score = features.keyword_matrix @ user_keywords
+    else:
+        keyword_score = np.zeros(len(features.paper_ids), dtype=np.float32)
+
+    # Content similarity (25%): cosine similarity to the user profile for the nearest papers
+    content_score = np.zeros(len(features.paper_ids), dtype=np.float32)
+    similar_rows = features.rows_for(similar_papers)
+    if len(similar_rows):
+        content_score[similar_rows] = [similar_papers[pid] for pid in features.paper_ids[similar_rows]]
+
+    # Recency (10%)
+    days_old = datetime.now().date().toordinal() - features.publication_ordinal
+    recency_score = np.where(days_old >= 0, np.exp(-np.maximum(days_old, 0) / 365), 0)
+
+    interest_score = (
+        category_score * 0.3
+        + keyword_score * 0.25
+        + content_score * 0.25
+        + features.citation_score * 0.1
+        + recency_score * 0.1
+    )
+
+    # Author overlap bonus
+    author_cols = [features.author_vocab[a] for a in user_authors if a in features.author_vocab]
+    if author_cols:
+        overlap = np.asarray(features.author_matrix[:, author_cols].sum(axis=1)).ravel() > 0
+        interest_score = np.where(overlap, interest_score * 1.2, interest_score)
+
+    # Diversity: share of unexplored categories weighted by citation impact
+    category_sizes = features.category_sizes
+    unexplored_matches = features.category_matrix @ unexplored
+    citation_weight = np.where(features.has_citations, features.citation_score, 0.1)
+    diversity_score = np.divide(
+        unexplored_matches, category_sizes,
+        out=np.zeros_like(unexplored_matches), where=category_sizes > 0
+    ) * citation_weight
+
+    return interest_score * 0.7 + diversity_score * 0.3
+
+def get_enhanced_content_recommendations(user_id: str, k: int = RECOMMENDATION_TOP_K) -> List[str]:
+    """Ids of the ``k`` best papers for the user, best first"""
+    try:
+        index_manager = get_paper_index()
+
+        # Get user interactions
+        user_papers = list(ResearchPaper.objects.filter(
+            Q(paper_bookmarks__user_id=user_id, paper_bookmarks__is_active=True) |
+            Q(paper_readers__user_id=user_id, paper_readers__is_active=True)
+        ).distinct().values_list('id', 'categories', 'authors'))
+
+        liked_categories = list(CategoryLike.objects.filter(
+            user_id=user_id,
+            is_active=True
+        ).values_list('category__name', flat=True))
+
+        # Build user profile
+        user_interests = defaultdict(float)
+        user_authors = set()
+
+        for _, categories, authors in user_papers:
+            for category in categories or []:
+                user_interests[category.lower()] += 0.4
+            user_authors.update(authors or [])
+
+        for category in liked_categories:
+            user_interests[category.lower()] += 0.6
+
+        features = get_paper_features()
+        if not len(features.paper_ids):
+            return []
+
+        seen_ids = [str(pid) for pid, _, _ in user_papers]
+        profile = index_manager.profile_vector(seen_ids)
+        similar_papers = index_manager.search_similar(profile, k + len(seen_ids))
+
+        user_rows = features.rows_for(seen_ids)
+        scores = score_papers(features, user_rows, user_interests, user_authors, similar_papers)
+        scores[user_rows] = 0  # never recommend papers the user has already seen
+
+        return features.paper_ids[top_k(scores, k)].tolist()
+
+    except Exception as e:
+        logger.error(f"Recommendation error: {str(e)}", exc_info=True)
+        return []
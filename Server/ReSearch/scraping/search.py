@@ -0,0 +1,165 @@
+import re
+import uuid
+from typing import Iterable, List, Tuple
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'scraping_researchpaper_fts'
+PAPER_TABLE = 'scraping_researchpaper'
+# bm25() column weights: paper_id (unindexed), title, abstract, authors
+BM25_WEIGHTS = '0.0, 10.0, 4.0, 2.0'
+# ts_rank_cd() weights for the D, C, B, A labels of the PostgreSQL search vector
+TS_RANK_WEIGHTS = '{0.1, 0.4, 0.6, 1.0}'
+
+_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+def parse_search(text: str) -> List[Tuple[str, List[str]]]:
+    """Split a search string into ``('phrase', words)`` for quoted text and
+    ``('word' | 'prefix', [word])`` for bare words; ``word*`` is a prefix match."""
+    terms = []
+    for phrase, bare in _TERM_RE.findall(text or ''):
+        if phrase:
+            words = _WORD_RE.findall(phrase.lower())
+            if words:
+                terms.append(('phrase' if len(words) > 1 else 'word', words))
+            continue
+        words = _WORD_RE.findall(bare.lower())
+        if not words:
+            continue
+        if bare.endswith('*'):
+            terms.extend(('word', [w]) for w in words[:-1])
+            terms.append(('prefix', [words[-1]]))
+        elif len(words) > 1:
+            # "state-of-the-art" and the like behave like a phrase
+            terms.append(('phrase', words))
+        else:
+            terms.append(('word', words))
+    return terms
+
+def fts5_query(terms) -> str:
+    parts = []
+    for kind, words in terms:
+        quoted = '"' + ' '.join(words) + '"'
+        parts.append(f'{quoted}*' if kind == 'prefix' else quoted)
+    return ' AND '.join(parts)
+
+def pg_tsquery(terms) -> str:
+    parts = []
+    for kind, words in terms:
+        if kind == 'phrase':
+            parts.append('(' + ' <-> '.join(words) + ')')
+        elif kind == 'prefix':
+            parts.append(f'{words[0]}:*')
+        else:
+            parts.append(words[0])
+    return ' & '.join(parts)
+
+def fts_rowid(paper_id) -> int:
+    """Stable positive 63-bit FTS rowid for a paper UUID"""
+    return uuid.UUID(str(paper_id)).int & (2 ** 63 - 1)
+
+def _uses_fts5() -> bool:
+    return connection.vendor == 'sqlite'
+
+def matching_ids(text: str):
+    """Subquery of the ids of papers matching ``text``, usable as ``id__in=``"""
+    terms = parse_search(text)
+    if connection.vendor == 'sqlite':
+        return RawSQL(f'SELECT paper_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (fts5_query(terms),))
+    return RawSQL(
+        f"SELECT id FROM {PAPER_TABLE} WHERE search_vector @@ to_tsquery('english', %s)",
+        (pg_tsquery(terms),)
+    )
+
+def search_papers(queryset, text: str):
+    """Filter a ResearchPaper queryset to ``text`` and annotate ``search_rank``
+    (higher is better): BM25 on SQLite FTS5, ts_rank_cd on PostgreSQL."""
+    terms = parse_search(text)
+    if not terms:
+        return queryset
+    if connection.vendor == 'sqlite':
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.paper_id = {PAPER_TABLE}.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[fts5_query(terms)],
+            select={'search_rank': f'-bm25({FTS_TABLE}, {BM25_WEIGHTS})'},
+        )
+    if connection.vendor == 'postgresql':
+        query = pg_tsquery(terms)
+        return queryset.extra(
+            where=[f"{PAPER_TABLE}.search_vector @@ to_tsquery('english', %s)"],
+            params=[query],
+            select={
+                'search_rank': f"ts_rank_cd('{TS_RANK_WEIGHTS}', {PAPER_TABLE}.search_vector, to_tsquery('english', %s))"
+            },
+            select_params=[query],
+        )
+    return queryset.filter(
+        Q(title__icontains=text) | Q(abstract__icontains=text) | Q(authors__icontains=text)
+    )
+
+def search_related(queryset, text: str, field: str = 'paper'):
+    """Filter rows of a model with a ForeignKey to ResearchPaper by paper text"""
+    if not parse_search(text):
+        return queryset
+    if connection.vendor in ('sqlite', 'postgresql'):
+        return queryset.filter(**{f'{field}_id__in': matching_ids(text)})
+    return queryset.filter(
+        Q(**{f'{field}__title__icontains': text}) |
+        Q(**{f'{field}__abstract__icontains': text}) |
+        Q(**{f'{field}__authors__icontains': text})
+    )
+
+def _fts_row(paper):
+    authors = paper.authors if isinstance(paper.authors, list) else [paper.authors]
+    return (
+        fts_rowid(paper.id),
+        uuid.UUID(str(paper.id)).hex,
+        paper.title or '',
+        paper.abstract or '',
+        ' '.join(str(author) for author in authors if author),
+    )
+
+def index_papers(papers: Iterable):
+    """Insert or refresh the FTS rows of ``papers`` (PostgreSQL maintains its own column)"""
+    if not _uses_fts5():
+        return
+    rows = [_fts_row(paper) for paper in papers]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, paper_id, title, abstract, authors) VALUES (%s, %s, %s, %s, %s)',
+            rows
+        )
+
+def unindex_papers(paper_ids: Iterable):
+    if not _uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(fts_rowid(paper_id),) for paper_id in paper_ids]
+        )
+
+def rebuild_search_index(batch_size: int = 2000):
+    from .models import ResearchPaper
+
+    if not _uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    batch = []
+    for paper in ResearchPaper.objects.only('id', 'title', 'abstract', 'authors').iterator(chunk_size=batch_size):
+        batch.append(paper)
+        if len(batch) >= batch_size:
+            index_papers(batch)
+            batch = []
+    index_papers(batch)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper
+from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper, paper_dedup_key
 
 class CategoryBriefSerializer(serializers.ModelSerializer):
     """Simplified version of Category serializer"""
@@ -57,17 +57,28 @@ class CategorySerializer(serializers.ModelSerializer):
     def get_created_by_email(self, obj):
         return obj.created_by.email if obj.created_by else 'Deleted User'
 
+    def _prefetched_likes(self, obj):
+        return getattr(obj, '_prefetched_objects_cache', {}).get('category_likes')
+
+    def _liked_category_ids(self, user):
+        # One query per serializer, shared by every row of a many=True list
+        if getattr(self, '_liked_ids', None) is None:
+            self._liked_ids = set(
+                CategoryLike.objects.filter(user=user, is_active=True).values_list('category_id', flat=True)
+            )
+        return self._liked_ids
+
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.category_likes.filter(
-                user=request.user,
-                is_active=True
-            ).exists()
+            likes = self._prefetched_likes(obj)
+            if likes is not None:
+                return any(like.user_id == request.user.id and like.is_active for like in likes)
+            return obj.id in self._liked_category_ids(request.user)
         return False
 
     def get_active_likes_count(self, obj):
-        return obj.category_likes.filter(is_active=True).count()
+        return obj.like_count
 
 # Your existing serializers with minor updates
 class ResearchPaperBriefSerializer(serializers.ModelSerializer):
@@ -141,6 +152,7 @@ class ResearchPaperSerializer(serializers.ModelSerializer):
             'source',
             'url',
             'pdf_url',
+            'doi',
             'categories',
             'publication_date',
             'created_at',
@@ -175,7 +187,7 @@ class ResearchPaperSerializer(serializers.ModelSerializer):
         return None
 
     def get_active_bookmarks_count(self, obj):
-        return BookmarkedPaper.objects.filter(paper=obj, is_active=True).count()
+        return obj.bookmark_count
         
     def get_is_paper_read(self, obj):
         request = self.context.get('request')
@@ -192,6 +204,11 @@ class ResearchPaperSerializer(serializers.ModelSerializer):
             
         if data.get('average_reading_time') is not None and data['average_reading_time'] < 0:
             raise serializers.ValidationError({"average_reading_time": "Average reading time cannot be negative"})
+
+        if self.instance is None:
+            dedup_key = paper_dedup_key(data.get('url'), data.get('doi'))
+            if ResearchPaper.objects.filter(dedup_key=dedup_key).exists():
+                raise serializers.ValidationError({"url": "This paper already exists"})
             
         return data
 
@@ -1,42 +1,61 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
-from .models import ResearchPaper, BookmarkedPaper, ReadPaper, CategoryLike
+from django.db import transaction
+from .models import (
+    ResearchPaper, BookmarkedPaper, ReadPaper, ResearchPaperCategory, CategoryLike, CategoryStat,
+    category_names
+)
+from .reading_stats import invalidate_reading_stats
+from .caching import CATEGORIES, PAPERS, bump_namespace, user_namespace
+from . import search
+from .tasks import index_batch, schedule_recommendation_refresh, unindex_batch
 
 @receiver([post_save, post_delete], sender=ResearchPaper)
 def clear_research_paper_cache(sender, instance, **kwargs):
-    related_keys = cache.get("research_paper_cache_keys", set())
-    for key in related_keys:
-        cache.delete(key)
+    bump_namespace(PAPERS)
+
+@receiver([post_save, post_delete], sender=ResearchPaperCategory)
+@receiver([post_save, post_delete], sender=CategoryLike)
+def clear_category_cache(sender, instance, **kwargs):
+    bump_namespace(CATEGORIES)
+
+@receiver(post_save, sender=ResearchPaper)
+def sync_research_paper_categories(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'categories' in update_fields:
+        instance.sync_categories()
+
+@receiver(post_delete, sender=ResearchPaper)
+def discount_research_paper_categories(sender, instance, **kwargs):
+    # The PaperCategory rows are already cascaded away; the JSON list is still on the instance
+    CategoryStat.adjust(category_names(instance.categories), -1)
+
+@receiver(post_save, sender=ResearchPaper)
+def index_research_paper(sender, instance, **kwargs):
+    search.index_papers([instance])
+    index_batch.add(str(instance.id))
+
+@receiver(post_delete, sender=ResearchPaper)
+def unindex_research_paper(sender, instance, **kwargs):
+    search.unindex_papers([instance.id])
+    unindex_batch.add(str(instance.id))
 
 @receiver([post_save, post_delete], sender=BookmarkedPaper)
 def clear_user_bookmark_cache(sender, instance, **kwargs):
     if instance.user:
-        cache.delete(f'recommendations_{instance.user.id}')
-        cache.delete(f'user_bookmarks_{instance.user.id}')
+        schedule_recommendation_refresh(instance.user.id)
 
 @receiver([post_save, post_delete], sender=ReadPaper)
 def clear_user_read_cache(sender, instance, **kwargs):
     if instance.user:
-        cache.delete(f'recommendations_{instance.user.id}')
-        cache.delete(f'user_read_papers_{instance.user.id}')
+        schedule_recommendation_refresh(instance.user.id)
+        user_id = instance.user.id
+        transaction.on_commit(lambda: invalidate_reading_stats(user_id))
 
 @receiver([post_save, post_delete], sender=CategoryLike)
 def clear_user_interests_cache(sender, instance, **kwargs):
     if instance.user:
-        cache.delete(f'recommendations_{instance.user.id}')
-        cache.delete(f'user_interests_{instance.user.id}')
-        
-def get_user_cache_keys(user_id):
-    """Helper function to get all cache keys for a user"""
-    return [
-        f'recommendations_{user_id}',
-        f'user_bookmarks_{user_id}',
-        f'user_read_papers_{user_id}',
-        f'user_interests_{user_id}'
-    ]
+        schedule_recommendation_refresh(instance.user.id)
 
 def clear_all_user_cache(user_id):
     """Clear all cache entries for a user"""
-    for key in get_user_cache_keys(user_id):
-        cache.delete(key)
\ No newline at end of file
+    bump_namespace(user_namespace(user_id))
\ No newline at end of file
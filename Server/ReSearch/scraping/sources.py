@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterator
+
+from .fetcher import MultiSourceFetcher
+
+logger = logging.getLogger(__name__)
+
+# Source adapters: each yields raw paper dicts (title, abstract, authors, url,
+# pdf_url, categories, publication_date, doi, source) for the ingestion pipeline.
+# The requests themselves are made by scraping.fetcher, which the scripts in
+# "AI models and codes/" share.
+
+SOURCES: Dict[str, Callable[..., Iterator[dict]]] = {}
+
+ARXIV_PAGE_SIZE = 1000
+SCIENCEDIRECT_URL = "https://www.sciencedirect.com"
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36"
+)
+
+_runner = None
+_runner_lock = threading.Lock()
+
+class FetcherRunner:
+    """
+    One MultiSourceFetcher per process, on an event loop in a daemon thread.
+
+    Every fetch shares its connection pool, per-source rate limits and IEEE
+    browser, instead of starting them over (and launching Chromium) per call.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.fetcher = MultiSourceFetcher()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='paper-fetcher', daemon=True)
+        self._thread.start()
+        self.run(self.fetcher.__aenter__())
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+def fetcher_runner() -> FetcherRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = FetcherRunner()
+        return _runner
+
+def _reset_after_fork():
+    # The loop thread does not survive a fork (e.g. Celery's prefork pool)
+    global _runner, _runner_lock
+    _runner = None
+    _runner_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def register(name: str):
+    def decorator(fetch):
+        SOURCES[name] = fetch
+        return fetch
+    return decorator
+
+def get_source(name: str):
+    try:
+        return SOURCES[name]
+    except KeyError:
+        raise ValueError(f"Unknown source '{name}'; expected one of {', '.join(sorted(SOURCES))}")
+
+@register('arxiv')
+def fetch_arxiv(query, max_results=100, start_date=None, end_date=None, page_size=ARXIV_PAGE_SIZE, **options):
+    """Page through the arXiv API, ``page_size`` entries per request"""
+    runner = fetcher_runner()
+    pages = runner.fetcher.iter_arxiv_pages(query, max_results, start_date, end_date, page_size)
+    try:
+        while True:
+            try:
+                yield from runner.run(pages.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        runner.run(pages.aclose())
+
+@register('sciencedirect')
+def fetch_science_direct(query, max_results=25, **options):
+    """Scrape one ScienceDirect results page; needs beautifulsoup4"""
+    from bs4 import BeautifulSoup
+
+    runner = fetcher_runner()
+    html = runner.run(runner.fetcher.fetch_text(
+        'sciencedirect',
+        f"{SCIENCEDIRECT_URL}/search",
+        params={'qs': query, 'show': max_results},
+        headers={"User-Agent": USER_AGENT},
+    ))
+    soup = BeautifulSoup(html, "html.parser")
+
+    for div in soup.find_all("div", {"class": "result-item-content"})[:max_results]:
+        title_link = div.find("a", {"class": "result-list-title-link"})
+        if not title_link:
+            continue
+        date_span = div.select_one("div.SubType span.srctitle-date-fields")
+        authors_list = div.find("ol", {"class": "Authors"})
+        pdf_link = div.find("a", {"class": "download-link"})
+        yield {
+            'title': title_link.get_text(strip=True),
+            'url': SCIENCEDIRECT_URL + title_link.get("href", ""),
+            'pdf_url': SCIENCEDIRECT_URL + pdf_link.get("href", "") if pdf_link else None,
+            'authors': [
+                name.get_text(strip=True)
+                for name in (authors_list.find_all("span", {"class": "author"}) if authors_list else [])
+            ],
+            'publication_date': date_span.contents[-1].strip() if date_span and date_span.contents else None,
+            'source': 'ScienceDirect',
+        }
+
+@register('ieee')
+def fetch_ieee(query, max_results=25, **options):
+    """Scrape the rendered IEEE Xplore results page; needs playwright and beautifulsoup4"""
+    runner = fetcher_runner()
+    for paper in runner.run(runner.fetcher.fetch_ieee(query, max_results)):
+        yield {**paper, 'source': 'IEEE Xplore'}
+
+@register('file')
+def read_paper_file(path, **options):
+    """Papers from a JSON array or NDJSON file, e.g. the output of papers/export/"""
+    with open(path, encoding='utf-8') as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping line {line_number} of {path}: {str(e)}")
@@ -0,0 +1,159 @@
+import logging
+import threading
+from datetime import timedelta
+
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import reconcile_counters
+from .models import ResearchPaper
+from .paper_index import INDEXED_FIELDS, get_paper_index
+from .reading_stats import reconcile_reading_rollups as reconcile_rollups
+from .recommendations import (
+    CACHE_TIMEOUT,
+    get_enhanced_content_recommendations,
+    recommendations_cache_key,
+)
+
+logger = logging.getLogger(__name__)
+
+# Interaction bursts within this window trigger a single recomputation
+RECOMMENDATION_DEBOUNCE_SECONDS = 30
+ACTIVE_USER_DAYS = 30
+
+def enqueue(task, *args, **kwargs):
+    """Queue a task without letting a broker outage break the caller"""
+    kwargs.setdefault('retry', False)
+    try:
+        task.apply_async(args=args, **kwargs)
+    except Exception as e:
+        logger.error(f"Could not queue {task.name}: {str(e)}")
+
+class CommitBatch:
+    """Items collected during a transaction and handed to ``send`` once, on commit.
+
+    A bulk save queues one task for all its rows instead of one per row, and
+    nothing is queued for a rolled-back transaction. Outside a transaction
+    ``send`` runs immediately.
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self._local = threading.local()
+
+    def add(self, *items):
+        connection = transaction.get_connection()
+        # The outermost atomic block stands for the transaction; items left
+        # from another one were rolled back with it
+        owner = connection.atomic_blocks[0] if connection.in_atomic_block else None
+        state = self._local.__dict__
+        if state.get('owner') is not owner or 'pending' not in state:
+            state['owner'], state['pending'] = owner, {}
+        state['pending'].update(dict.fromkeys(items))
+        # Registered per add, since rolling back a savepoint discards the
+        # callbacks registered inside it; the first to run sends everything
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        state = self._local.__dict__
+        state.pop('owner', None)
+        pending = state.pop('pending', None)
+        if pending:
+            self.send(list(pending))
+
+@shared_task(ignore_result=True)
+def rebuild_paper_index():
+    papers = list(ResearchPaper.objects.values(*INDEXED_FIELDS))
+    get_paper_index().build_index(papers)
+    return len(papers)
+
+def ensure_paper_index():
+    index_manager = get_paper_index()
+    if index_manager.index is None or index_manager.vectorizer is None:
+        rebuild_paper_index()
+    return index_manager
+
+@shared_task(ignore_result=True)
+def index_papers(paper_ids):
+    """Append newly ingested or updated papers to the on-disk index"""
+    index_manager = get_paper_index()
+    if index_manager.index is None:
+        return rebuild_paper_index()
+    papers = list(ResearchPaper.objects.filter(id__in=paper_ids).values(*INDEXED_FIELDS))
+    index_manager.add_papers(papers)
+    return len(papers)
+
+@shared_task(ignore_result=True)
+def unindex_papers(paper_ids):
+    get_paper_index().remove_papers(paper_ids)
+
+index_batch = CommitBatch(lambda paper_ids: enqueue(index_papers, paper_ids))
+unindex_batch = CommitBatch(lambda paper_ids: enqueue(unindex_papers, paper_ids))
+
+def refresh_pending_key(user_id) -> str:
+    return f'recommendations_refresh_pending_{user_id}'
+
+def schedule_recommendation_refresh(user_id, countdown=RECOMMENDATION_DEBOUNCE_SECONDS):
+    """Debounced refresh: only the first change in a window queues a task, which
+    runs after the window closes and so sees every change made during it.
+    Scheduled when the current transaction commits."""
+    refresh_batch.add((str(user_id), countdown))
+
+def _schedule_refreshes(requests):
+    for user_id, countdown in requests:
+        if cache.add(refresh_pending_key(user_id), True, RECOMMENDATION_DEBOUNCE_SECONDS * 2):
+            enqueue(refresh_user_recommendations, user_id, countdown=countdown)
+
+refresh_batch = CommitBatch(_schedule_refreshes)
+
+@shared_task(ignore_result=True)
+def refresh_user_recommendations(user_id):
+    cache.delete(refresh_pending_key(user_id))
+    ensure_paper_index()
+    recommended_ids = get_enhanced_content_recommendations(str(user_id))
+    cache.set(recommendations_cache_key(user_id), recommended_ids, CACHE_TIMEOUT)
+    return len(recommended_ids)
+
+@shared_task(ignore_result=True)
+def refresh_active_user_recommendations():
+    """Recompute recommendations for every person who logged in recently"""
+    since = timezone.now() - timedelta(days=ACTIVE_USER_DAYS)
+    user_ids = get_user_model().objects.filter(
+        is_active=True,
+        account_type='PERSON',
+        last_login_at__gte=since
+    ).values_list('id', flat=True)
+    for user_id in user_ids.iterator():
+        enqueue(refresh_user_recommendations, str(user_id))
+
+@shared_task(ignore_result=True)
+def nightly_recommendation_refresh():
+    """Refit the index vocabulary on the whole corpus, then recompute active users"""
+    rebuild_paper_index()
+    refresh_active_user_recommendations()
+
+@shared_task(ignore_result=True)
+def reconcile_denormalized_counters():
+    """Periodic safety net for counters changed outside the model methods,
+    e.g. queryset deletes or raw SQL"""
+    return reconcile_counters()
+
+@shared_task(ignore_result=True)
+def reconcile_reading_rollups():
+    """Nightly safety net for reading rollups, which drift when a paper's
+    citations or categories change between a read and its removal"""
+    return len(reconcile_rollups())
+
+@shared_task(ignore_result=True)
+def ingest_papers(source, batch_size=None, **options):
+    """Fetch from one of scraping.sources and upsert the results"""
+    from .ingestion import DEFAULT_BATCH_SIZE, ingest
+    from .sources import get_source
+
+    records = get_source(source)(**options)
+    result = ingest(records, source, batch_size or DEFAULT_BATCH_SIZE)
+    logger.info(f"Ingestion from {source} finished: {result.as_dict()}")
+    return result.as_dict()
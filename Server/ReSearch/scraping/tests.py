@@ -1,3 +1,569 @@
-from django.test import TestCase
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
+from datetime import date, timedelta
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ReSearch.tiered_cache import TieredCache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+from .counters import reconcile_counters
+from .ingestion import ingest
+from .list_registry import TABLES
+from .models import (
+    ResearchPaper, BookmarkedPaper, ReadPaper, ReadingRollup, CategoryStat, CategoryLike, ResearchPaperCategory,
+    paper_dedup_key
+)
+from .paper_index import PaperIndexManager
+from .reading_stats import reconcile_reading_rollups
+from .recommendations import build_paper_features, corpus_fingerprint, score_papers, top_k
+from .tasks import index_batch, index_papers, refresh_batch, refresh_pending_key, refresh_user_recommendations
+
+
+class PaperTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='reader@example.com', username='reader', password='secret'
+        )
+        self.other = get_user_model().objects.create_user(
+            email='other@example.com', username='other', password='secret'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_papers(self, count):
+        start = ResearchPaper.objects.count()
+        for i in range(start, start + count):
+            paper = ResearchPaper.objects.create(
+                title=f'Paper {i}',
+                abstract='Abstract',
+                authors=['Author'],
+                source='arxiv',
+                url=f'https://example.com/paper/{i}',
+                categories=['ai'],
+                publication_date=date(2024, 1, 1),
+            )
+            BookmarkedPaper.objects.create(user=self.other, paper=paper)
+            if i % 2:
+                BookmarkedPaper.objects.create(user=self.user, paper=paper)
+                ReadPaper.objects.create(user=self.user, paper=paper)
+
+
+class PaperListQueryCountTests(PaperTestCase):
+    def test_paper_list_query_count_is_constant(self):
+        self.create_papers(3)
+        # Page, user's bookmarks, user's reads; keyset pages run no COUNT
+        with self.assertNumQueries(3):
+            response = self.client.get('/scraping/papers/', {'limit': 50})
+        self.assertEqual(response.status_code, 200)
+
+        self.create_papers(20)
+        with self.assertNumQueries(3):
+            response = self.client.get('/scraping/papers/', {'limit': 50})
+
+        results = response.json()['results']
+        self.assertEqual(len(results), 23)
+        for paper in results:
+            bookmarked = int(paper['title'].split()[1]) % 2 == 1
+            self.assertEqual(paper['is_bookmarked'], bookmarked)
+            self.assertEqual(paper['is_paper_read'], bookmarked)
+            self.assertEqual(paper['active_bookmarks_count'], 2 if bookmarked else 1)
+
+    def test_paper_list_cursor_walks_every_paper_once(self):
+        # Every paper shares a publication date, so the cursor must break ties
+        self.create_papers(7)
+        seen = []
+        params = {'limit': 3}
+        while True:
+            response = self.client.get('/scraping/papers/', params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertNotIn('count', body)
+            seen.extend(paper['id'] for paper in body['results'])
+            if not body['next_cursor']:
+                break
+            params = {'limit': 3, 'cursor': body['next_cursor']}
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_paper_list_cursor_keeps_sub_millisecond_ties(self):
+        # Bulk ingestion creates rows microseconds apart
+        self.create_papers(6)
+        base = timezone.now().replace(microsecond=500000)
+        for i, paper in enumerate(ResearchPaper.objects.order_by('title')):
+            ResearchPaper.objects.filter(pk=paper.pk).update(created_at=base + timedelta(microseconds=i * 10))
+        seen = []
+        params = {'limit': 1}
+        while True:
+            body = self.client.get('/scraping/papers/', params).json()
+            seen.extend(paper['id'] for paper in body['results'])
+            if not body['next_cursor']:
+                break
+            params = {'limit': 1, 'cursor': body['next_cursor']}
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_paper_list_offset_keeps_count(self):
+        self.create_papers(4)
+        response = self.client.get('/scraping/papers/', {'limit': 2, 'offset': 2})
+        self.assertEqual(response.json()['count'], 4)
+        self.assertEqual(len(response.json()['results']), 2)
+
+    def test_dynamic_paper_list_query_count_is_constant(self):
+        self.create_papers(5)
+        with self.assertNumQueries(3):
+            response = self.client.get('/scraping/papers/dynamic/', {'Table': 'ResearchPaper'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+
+class TableRegistryTests(PaperTestCase):
+    def test_declared_indexes_exist(self):
+        for name, spec in TABLES.items():
+            self.assertEqual(spec.missing_indexes(), [], name)
+
+    def test_every_declared_filter_runs(self):
+        self.create_papers(2)
+        category = ResearchPaperCategory.objects.create(name='AI', description='', created_by=self.user)
+        CategoryLike.objects.create(user=self.user, category=category)
+        values = {
+            'user': str(self.user.id),
+            'is_active': 'True',
+            'date_from': '2024-01-01',
+            'date_to': '2100-01-01',
+            'category': 'ai',
+        }
+        for name, spec in TABLES.items():
+            for filter_name in spec.filters:
+                with self.subTest(table=name, filter=filter_name):
+                    response = self.client.get('/scraping/papers/dynamic/', {
+                        'Table': name, filter_name: values.get(filter_name, 'paper'),
+                    })
+                    self.assertEqual(response.status_code, 200)
+        response = self.client.get('/scraping/papers/dynamic/', {'Table': 'CategoryLike', 'search': 'ai'})
+        self.assertEqual(len(response.json()), 1)
+
+    def test_batch_query_count_is_bounded(self):
+        self.create_papers(6)
+        # Papers: page + bookmarks + reads; bookmarks and reads: one joined query each
+        with self.assertNumQueries(5):
+            response = self.client.get('/scraping/papers/dynamic/batch/', {
+                'tables': 'ResearchPaper,BookmarkedPaper,ReadPaper',
+                'BookmarkedPaper.user': str(self.user.id),
+            })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body['ResearchPaper']), 6)
+        self.assertEqual(len(body['BookmarkedPaper']), 3)
+        self.assertEqual(len(body['ReadPaper']), 3)
+
+
+class TaskQueueingTests(PaperTestCase):
+    def setUp(self):
+        super().setUp()
+        for user in (self.user, self.other):
+            cache.delete(refresh_pending_key(user.id))
+
+    def test_a_transaction_queues_one_index_task(self):
+        with mock.patch('scraping.tasks.enqueue') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.create_papers(3)
+        queued = [call.args for call in enqueue.call_args_list]
+        index_calls = [args for args in queued if args[0] is index_papers]
+        self.assertEqual(len(index_calls), 1)
+        self.assertEqual(len(index_calls[0][1]), 3)
+        refreshed = sorted(args[1] for args in queued if args[0] is refresh_user_recommendations)
+        self.assertEqual(refreshed, sorted([str(self.user.id), str(self.other.id)]))
+
+    def test_rolled_back_saves_queue_nothing(self):
+        for batch in (index_batch, refresh_batch):
+            self.addCleanup(batch._local.__dict__.clear)
+        with mock.patch('scraping.tasks.enqueue') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    self.create_papers(1)
+                    raise RuntimeError
+        enqueue.assert_not_called()
+
+
+class BulkToggleTests(PaperTestCase):
+    def test_bulk_bookmarks_toggle_and_reactivate(self):
+        self.create_papers(4)
+        ids = [str(pk) for pk in ResearchPaper.objects.values_list('id', flat=True)]
+        active = set(
+            str(pk) for pk in BookmarkedPaper.objects.filter(user=self.user, is_active=True)
+            .values_list('paper_id', flat=True)
+        )
+
+        response = self.client.post('/scraping/papers/bookmarks/bulk/', {'paper_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['removed']), active)
+        self.assertEqual(set(response.json()['added']), set(ids) - active)
+
+        # Deactivated rows are reactivated rather than violating (user, paper) uniqueness
+        response = self.client.post(
+            '/scraping/papers/bookmarks/bulk/', {'paper_ids': ids, 'action': 'add'}, format='json'
+        )
+        self.assertEqual(set(response.json()['added']), active)
+        self.assertEqual(
+            BookmarkedPaper.objects.filter(user=self.user, is_active=True).count(), len(ids)
+        )
+
+    def test_bulk_removed_paper_can_be_deleted(self):
+        self.create_papers(2)
+        paper = ResearchPaper.objects.get(title='Paper 1')
+        ids = {'paper_ids': [str(paper.id)]}
+        self.client.post('/scraping/papers/readpaper/bulk/', ids, format='json')
+        self.client.post('/scraping/papers/bookmarks/bulk/', ids, format='json')
+        BookmarkedPaper.objects.filter(user=self.other, paper=paper).update(is_active=False)
+
+        response = self.client.delete(f'/scraping/papers/{paper.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(ResearchPaper.objects.filter(pk=paper.pk).exists())
+
+
+class CounterTests(PaperTestCase):
+    def bookmark_count(self, paper):
+        paper.refresh_from_db()
+        return paper.bookmark_count
+
+    def test_toggles_keep_bookmark_count(self):
+        self.create_papers(2)
+        paper = ResearchPaper.objects.get(title='Paper 1')
+        self.assertEqual(self.bookmark_count(paper), 2)
+
+        self.client.post(f'/scraping/papers/{paper.id}/bookmark/')
+        self.assertEqual(self.bookmark_count(paper), 1)
+        self.client.post('/scraping/papers/bookmarks/bulk/', {'paper_ids': [str(paper.id)]}, format='json')
+        self.assertEqual(self.bookmark_count(paper), 2)
+        self.client.post('/scraping/papers/bookmarks/bulk/', {'paper_ids': [str(paper.id)]}, format='json')
+        # Single toggle reactivates the row left inactive by the bulk removal
+        response = self.client.post(f'/scraping/papers/{paper.id}/bookmark/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.bookmark_count(paper), 2)
+        self.assertEqual(reconcile_counters(), {
+            'ResearchPaper.bookmark_count': 0, 'ResearchPaperCategory.like_count': 0
+        })
+
+    def test_reconcile_repairs_drift(self):
+        self.create_papers(2)
+        ResearchPaper.objects.update(bookmark_count=7)
+        report = reconcile_counters(repair=False)
+        self.assertEqual(report['ResearchPaper.bookmark_count'], 2)
+        self.assertEqual(reconcile_counters()['ResearchPaper.bookmark_count'], 2)
+        self.assertEqual(
+            sorted(ResearchPaper.objects.values_list('bookmark_count', flat=True)), [1, 2]
+        )
+
+
+class ReadingRollupTests(PaperTestCase):
+    def test_reconcile_repairs_rollups_of_changed_papers(self):
+        self.create_papers(2)
+        self.assertEqual(ReadingRollup.rebuild(), 1)
+        self.assertEqual(reconcile_reading_rollups(), [])
+
+        paper = ResearchPaper.objects.get(title='Paper 0')
+        read = ReadPaper.objects.create(user=self.user, paper=paper)
+        ReadingRollup.record(read, 1)
+        # Cited and recategorized after it was read, so removing the read
+        # subtracts values that were never added
+        ResearchPaper.objects.filter(pk=paper.pk).update(citation_count=40, categories=['bio'])
+        read.refresh_from_db()
+        read.soft_delete()
+
+        self.assertEqual(reconcile_reading_rollups(repair=False), [self.user.id])
+        self.assertEqual(reconcile_reading_rollups(), [self.user.id])
+        rollup = ReadingRollup.objects.get(user=self.user)
+        self.assertEqual((rollup.papers, rollup.citations, rollup.categories), (1, 0, {'ai': 1}))
+        self.assertEqual(reconcile_reading_rollups(), [])
+
+    def test_toggle_read_after_bulk_removal(self):
+        self.create_papers(2)
+        paper = ResearchPaper.objects.get(title='Paper 1')
+        self.client.post('/scraping/papers/readpaper/bulk/', {'paper_ids': [str(paper.id)]}, format='json')
+        self.assertFalse(ReadPaper.objects.filter(user=self.user, paper=paper).exists())
+        self.assertEqual(self.client.get('/scraping/papers/readpaper/').json(), [])
+
+        response = self.client.post(f'/scraping/papers/{paper.id}/readpaper/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(ReadPaper.objects.get(user=self.user, paper=paper).is_active)
+        self.assertEqual(reconcile_reading_rollups(repair=False), [])
+
+        response = self.client.post(f'/scraping/papers/{paper.id}/readpaper/')
+        self.assertEqual(response.json(), {'status': 'unRead'})
+        self.assertEqual(reconcile_reading_rollups(repair=False), [])
+
+
+class IngestionTests(PaperTestCase):
+    def record(self, url, title='Transformers for echocardiograms', **fields):
+        return {
+            'title': title,
+            'abstract': 'Deep learning on cardiac ultrasound',
+            'authors': ['A. Author'],
+            'url': url,
+            'categories': ['cs.CV', 'eess.IV'],
+            'publication_date': '2024-03-01T00:00:00Z',
+            **fields,
+        }
+
+    def test_ingest_deduplicates_and_upserts(self):
+        result = ingest([
+            self.record('http://arxiv.org/abs/2403.00001v1'),
+            # Same arXiv id in another version and form
+            self.record('https://arxiv.org/pdf/2403.00001v2.pdf'),
+            self.record('https://example.com/paper', title='Other', doi='10.1000/XYZ'),
+            self.record('https://example.com/other-url', title='Other again', doi='https://doi.org/10.1000/xyz'),
+            {'title': 'No url'},
+        ], 'arxiv', batch_size=3)
+        self.assertEqual(result.as_dict(), {'created': 2, 'updated': 1, 'duplicates': 1, 'skipped': 1})
+        self.assertEqual(ResearchPaper.objects.count(), 2)
+        self.assertEqual(CategoryStat.objects.get(name='cs.cv').paper_count, 2)
+
+        paper = ResearchPaper.objects.get(dedup_key='arxiv:2403.00001')
+        result = ingest([self.record('http://arxiv.org/abs/2403.00001v3', title='Renamed', categories=['cs.LG'])])
+        self.assertEqual(result.updated, 1)
+        renamed = ResearchPaper.objects.get(pk=paper.pk)
+        self.assertEqual(renamed.title, 'Renamed')
+        self.assertEqual(CategoryStat.objects.get(name='cs.cv').paper_count, 1)
+        self.assertEqual(CategoryStat.objects.get(name='cs.lg').paper_count, 1)
+
+        response = self.client.get('/scraping/papers/', {'search': 'renamed'})
+        self.assertEqual([row['id'] for row in response.json()['results']], [str(paper.pk)])
+
+    def test_save_follows_url_edits_without_taking_another_papers_key(self):
+        self.create_papers(2)
+        first, second = ResearchPaper.objects.order_by('title')
+        first.url = 'https://arxiv.org/abs/2403.00002'
+        first.save(update_fields=['url'])
+        self.assertEqual(ResearchPaper.objects.get(pk=first.pk).dedup_key, 'arxiv:2403.00002')
+
+        key = second.dedup_key
+        second.url = 'https://arxiv.org/pdf/2403.00002v2.pdf'
+        second.save()
+        self.assertEqual(ResearchPaper.objects.get(pk=second.pk).dedup_key, key)
+
+    def test_dedup_key_migration_keys_duplicates(self):
+        migration = import_module('scraping.migrations.0010_researchpaper_dedup_key')
+        self.create_papers(2)
+        ResearchPaper.objects.update(url='https://example.com/paper/0', dedup_key=None)
+        migration.populate_dedup_keys(apps, None)
+
+        first, second = ResearchPaper.objects.order_by('created_at')
+        self.assertEqual(first.dedup_key, paper_dedup_key(first.url))
+        self.assertEqual(second.dedup_key, f'dup:{second.pk}')
+        second.title = 'Edited'
+        second.save()
+
+
+def reference_score(paper, user_interests, user_keywords, user_authors, unexplored_categories):
+    """The per-paper scorer the vectorized one replaced, without the content term"""
+    categories = [cat.lower() for cat in paper.categories]
+    score = sum(user_interests.get(cat, 0) for cat in categories) * 0.3
+    words = {word for word in f"{paper.title.lower()} {paper.abstract.lower()}".split() if len(word) > 3}
+    score += sum(user_keywords.get(word, 0) for word in words) / (len(words) or 1) * 0.25
+    citation_score = min(math.log(paper.citation_count + 1) / 10, 1) if paper.citation_count else 0
+    score += citation_score * 0.1
+    days_old = (date.today() - paper.publication_date).days
+    score += (math.exp(-days_old / 365) if days_old >= 0 else 0) * 0.1
+    if any(author in paper.authors for author in user_authors):
+        score *= 1.2
+
+    diversity = 0
+    unexplored_matches = len(set(categories) & unexplored_categories)
+    if unexplored_matches:
+        citation_weight = citation_score if paper.citation_count else 0.1
+        diversity = unexplored_matches / len(set(categories)) * citation_weight
+    return score * 0.7 + diversity * 0.3
+
+
+class RecommendationScoringTests(TestCase):
+    def test_ranking_matches_reference_scorer(self):
+        topics = [['ai', 'ml'], ['ai'], ['bio'], ['bio', 'chem'], ['physics']]
+        words = ['neural', 'protein', 'graph', 'quantum', 'learning', 'molecule']
+        for i in range(30):
+            ResearchPaper.objects.create(
+                title=f'Paper {words[i % 6]} {words[(i * 5) % 6]}',
+                abstract=f'Study of {words[(i + 2) % 6]} methods number{i}',
+                authors=[f'Author {i % 7}'],
+                source='arxiv',
+                url=f'https://example.com/paper/{i}',
+                categories=topics[i % 5],
+                publication_date=date.today() - timedelta(days=37 * i),
+                citation_count=i * 13 % 50,
+            )
+        papers = list(ResearchPaper.objects.all())
+        seen = papers[:4]
+
+        user_interests = {'ai': 1.0, 'bio': 0.4}
+        user_authors = set()
+        user_keywords = {}
+        for paper in seen:
+            user_authors.update(paper.authors)
+            for word in {w for w in f"{paper.title} {paper.abstract}".lower().split() if len(w) > 3}:
+                user_keywords[word] = user_keywords.get(word, 0) + 1
+        all_categories = {cat for paper in papers for cat in paper.categories}
+        unexplored = all_categories - set(user_interests)
+
+        features = build_paper_features(corpus_fingerprint())
+        user_rows = features.rows_for([str(paper.id) for paper in seen])
+        scores = score_papers(features, user_rows, user_interests, user_authors, {})
+        scores[user_rows] = 0
+        ranked = features.paper_ids[top_k(scores, len(papers))].tolist()
+
+        expected = {
+            str(paper.id): reference_score(paper, user_interests, user_keywords, user_authors, unexplored)
+            for paper in papers[4:]
+        }
+        expected = [pid for pid, score in sorted(expected.items(), key=lambda item: -item[1]) if score > 0]
+        self.assertEqual(ranked, expected)
+        # The cap keeps the best papers in the same order
+        self.assertEqual(features.paper_ids[top_k(scores, 5)].tolist(), expected[:5])
+
+
+def index_paper(i, topic):
+    return {
+        'id': i,
+        'title': f'{topic} paper {i}',
+        # Enough distinct words to fill every dimension of the vectorizer
+        'abstract': f'We study {topic} systems and {topic} methods ' + ' '.join(f'w{i}x{j}' for j in range(20)),
+        'categories': [topic],
+        'authors': [f'Author {i}'],
+    }
+
+
+class PaperIndexTests(SimpleTestCase):
+    topics = ['genomics', 'robotics', 'cryptography', 'astronomy']
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.store_dir)
+        self.index = PaperIndexManager(self.store_dir)
+        self.index.build_index([index_paper(i, self.topics[i % 4]) for i in range(12)])
+
+    def nearest(self, index, paper_ids, k=3):
+        return list(index.search_similar(index.profile_vector(paper_ids), k))
+
+    def test_appended_papers_are_searchable_and_persisted(self):
+        self.index.add_papers([index_paper(100, 'robotics')])
+        self.assertEqual(self.index.delta.ntotal, 1)
+        self.assertIn('100', self.nearest(self.index, ['1']))
+
+        reloaded = PaperIndexManager(self.store_dir)
+        self.assertEqual(reloaded.size, 13)
+        self.assertIn('100', self.nearest(reloaded, ['1']))
+
+    def test_removed_and_reindexed_papers_are_tombstoned(self):
+        self.index.remove_papers(['5'])
+        # Paper 1 moves from robotics to astronomy; its old row is skipped
+        self.index.add_papers([index_paper(1, 'astronomy')])
+        self.assertEqual(len(self.index.tombstones), 2)
+
+        reloaded = PaperIndexManager(self.store_dir)
+        self.assertEqual(reloaded.size, 11)
+        self.assertNotIn('5', reloaded.id_to_row)
+        self.assertIn('1', self.nearest(reloaded, ['3'], k=4))
+        self.assertNotIn('1', self.nearest(reloaded, ['9'], k=2))
+
+    def test_compaction_folds_delta_and_drops_tombstones(self):
+        self.index.remove_papers(['5'])
+        self.index.add_papers([index_paper(100, 'genomics')])
+        before = self.nearest(self.index, ['0'], k=4)
+        self.index.compact()
+
+        reloaded = PaperIndexManager(self.store_dir)
+        self.assertEqual(reloaded.base_size, 12)
+        self.assertEqual(reloaded.delta.ntotal, 0)
+        self.assertEqual(reloaded.tombstones, set())
+        self.assertEqual(sorted(reloaded.id_to_row), sorted(str(i) for i in [*range(12), 100] if i != 5))
+        self.assertEqual(self.nearest(reloaded, ['0'], k=4), before)
+
+
+@skipUnless(fakeredis, "fakeredis is not installed")
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.cache = self.backend()
+        # The L1 outlives the backend instance; start each test empty
+        self.cache._l1.clear()
+        # Invalidations are delivered by hand instead of by the listener thread
+        self.cache._tier.listener = threading.current_thread()
+
+    def backend(self):
+        cache = TieredCache('redis://127.0.0.1:6379/1', {'OPTIONS': {'L1_TIMEOUT': 60}})
+        cache._l2._cache._client = lambda **kwargs: fakeredis.FakeRedis(server=self.server)
+        return cache
+
+    def l1_expiry(self, key):
+        return self.cache._l1._entries[self.cache.make_key(key)][0] - time.monotonic()
+
+    def test_l1_copy_expires_with_the_redis_key(self):
+        self.cache._l2.set('short', 'value', 2)
+        self.assertEqual(self.cache.get('short'), 'value')
+        self.assertLessEqual(self.l1_expiry('short'), 2)
+
+        self.cache._l2.set('forever', 'value', None)
+        self.assertEqual(self.cache.get_many(['forever']), {'forever': 'value'})
+        self.assertGreater(self.l1_expiry('forever'), 2)
+
+    def test_fill_racing_an_invalidation_is_not_cached(self):
+        self.cache._l2.set('key', 'old')
+        fetch = self.cache._fetch
+
+        def fetch_then_invalidate(full_keys):
+            fetched = fetch(full_keys)
+            # Another process rewrote the key while the value was in flight
+            self.cache._l1.discard(full_keys[0])
+            return fetched
+
+        self.cache._fetch = fetch_then_invalidate
+        self.assertEqual(self.cache.get('key'), 'old')
+        self.assertNotIn(self.cache.make_key('key'), self.cache._l1._entries)
+
+        self.cache._fetch = fetch
+        self.assertEqual(self.cache.get('key'), 'old')
+        self.assertIn(self.cache.make_key('key'), self.cache._l1._entries)
+
+    def test_threads_share_one_l1_and_writes_warm_it(self):
+        # Django builds one backend instance per thread
+        other = threading.Thread(target=lambda: setattr(self, 'other', self.backend()))
+        other.start()
+        other.join()
+        self.assertIs(self.other._tier, self.cache._tier)
+
+        self.other.set('key', 'value')
+        full_key = self.cache.make_key('key')
+        # The listener sees the write's own invalidation and ignores it
+        self.cache._tier.handle(self.cache._tier.message(full_key))
+        self.cache._fetch = None
+        self.assertEqual(self.cache.get('key'), 'value')
+
+        # Another process's write evicts it
+        self.cache._tier.handle(b'another-process ' + full_key.encode())
+        self.assertNotIn(full_key, self.cache._l1._entries)
+
+    def test_forked_child_starts_its_own_listener(self):
+        self.cache.set('key', 'value')
+        origin = self.cache._tier.origin
+        pid = os.fork()
+        if pid == 0:
+            tier = self.cache._tier
+            healthy = tier.listener is None and not tier.l1._entries and tier.origin != origin
+            os._exit(0 if healthy else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIsNotNone(self.cache._tier.listener)
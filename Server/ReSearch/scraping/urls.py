@@ -7,9 +7,13 @@ urlpatterns = [
     path('papers/research_focus/', views.research_focus),
     path('papers/', views.research_paper_list_withPage),
     path('papers/withoutpage/', views.research_paper_list_withoutPage),
+    path('papers/export/', views.research_paper_export),
     path('papers/dynamic/', views.dynamic_paper_list),
-    path('papers/<int:pk>/', views.research_paper_detail),
+    path('papers/dynamic/batch/', views.dynamic_paper_batch),
+    path('papers/<uuid:pk>/', views.research_paper_detail),
     path('papers/bookmarked/', views.bookmarked_papers),
+    path('papers/bookmarks/bulk/', views.bulk_toggle_bookmarks),
+    path('papers/readpaper/bulk/', views.bulk_toggle_reads),
     path('papers/<str:pk>/bookmark/', views.toggle_bookmark),
     path('papers/summarization/<str:url>/', views.summarization_paper),
     path('papers/readpaper/', views.readPaper),
@@ -22,5 +26,6 @@ urlpatterns = [
     path('categories/<int:pk>/', views.category_detail),
     path('categories/<int:pk>/like/', views.toggle_category_like),
     path('categories_like_list/', views.category_like_list),
+    path('categories/likes/bulk/', views.bulk_toggle_category_likes),
     path('recomendation_paper_list/', views.recommendation_paper),
 ]
\ No newline at end of file
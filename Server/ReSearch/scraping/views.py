@@ -1,10 +1,15 @@
 
 import json
+import uuid
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
+from ReSearch.pagination import KeysetPagination
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import QueryDict, StreamingHttpResponse
 from rest_framework.pagination import LimitOffsetPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Sum
@@ -14,9 +19,9 @@ import numpy as np
 import pandas as pd
 import asyncio
 from django.core.cache import cache
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q,Case, When, Value, IntegerField
-from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper
+from .models import ResearchPaper, BookmarkedPaper, ResearchPaperCategory, CategoryLike,ReadPaper, ReadingRollup
 from .serializers import (
     ResearchPaperSerializer, 
     BookmarkedPaperSerializer,
@@ -24,6 +29,16 @@ from .serializers import (
     CategoryLikeSerializer,
     ReadPaperSerializer
 )
+from .caching import CATEGORIES, PAPERS, versioned_key
+from .reading_stats import (
+    MONTH_NAMES, current_month, month_range, monthly_buckets, parse_month, shift_month, summarize
+)
+from .bulk_actions import (
+    bulk_bookmarks, bulk_category_likes, bulk_missing_ids, bulk_reads, parse_bulk_request
+)
+from .list_registry import TABLES, annotate_paper_list, list_table
+from .categories import MATCH_ANY, category_counts, filter_by_categories, requested_categories
+from .search import search_papers
 from collections import Counter
 
 from django.utils import timezone
@@ -48,44 +63,21 @@ def statsData(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    # Dates for current and previous month
-    now = datetime.now()
-    first_day_this_month = datetime(now.year, now.month, 1)
-    last_day_last_month = first_day_this_month - timedelta(days=1)
-    first_day_last_month = datetime(last_day_last_month.year, last_day_last_month.month, 1)
+    # Current and previous month, from the cached per-user monthly buckets
+    buckets = monthly_buckets(request.user.id)
+    this_month = current_month()
+    thisMonth = summarize(buckets, [this_month])
+    lastMonth = summarize(buckets, [shift_month(this_month, -1)])
 
-    # Filter papers for this month and last month
-    readPapersThisMonth = ReadPaper.objects.filter(
-        user=request.user, 
-        read_at__gte=first_day_this_month
-    )
-    readPapersLastMonth = ReadPaper.objects.filter(
-        user=request.user, 
-        read_at__gte=first_day_last_month,
-        read_at__lt=first_day_this_month
-    )
+    readPapersCountThisMonth = thisMonth['papers']
+    totalCitationCountThisMonth = thisMonth['citations']
+    avgReadingTimeThisMonth = thisMonth['avg_time']
+    impactScoreThisMonth = thisMonth['impact']
 
-    # Metrics for this month
-    readPapersCountThisMonth = readPapersThisMonth.count()
-    totalCitationCountThisMonth = readPapersThisMonth.aggregate(total=Sum('paper__citation_count'))['total'] or 0
-    avgReadingTimeThisMonth = readPapersThisMonth.aggregate(avg=Avg('paper__average_reading_time'))['avg'] or 0
-
-    # Metrics for last month
-    readPapersCountLastMonth = readPapersLastMonth.count()
-    totalCitationCountLastMonth = readPapersLastMonth.aggregate(total=Sum('paper__citation_count'))['total'] or 0
-    avgReadingTimeLastMonth = readPapersLastMonth.aggregate(avg=Avg('paper__average_reading_time'))['avg'] or 0
-
-    # Calculate Impact Score
-    impactScoreThisMonth = (
-        totalCitationCountThisMonth * 0.5
-        + avgReadingTimeThisMonth * 0.3
-        + readPapersCountThisMonth * 0.2
-    )
-    impactScoreLastMonth = (
-        totalCitationCountLastMonth * 0.5
-        + avgReadingTimeLastMonth * 0.3
-        + readPapersCountLastMonth * 0.2
-    )
+    readPapersCountLastMonth = lastMonth['papers']
+    totalCitationCountLastMonth = lastMonth['citations']
+    avgReadingTimeLastMonth = lastMonth['avg_time']
+    impactScoreLastMonth = lastMonth['impact']
 
     # Helper to calculate trend and percentage change
     def calculate_trend_and_percentage(current, previous):
@@ -155,7 +147,7 @@ def readPaper(request):
             {'error': 'Authentication required'}, 
             status=status.HTTP_401_UNAUTHORIZED
         )
-    queryset = ReadPaper.objects.filter(user=request.user)
+    queryset = ReadPaper.objects.filter(user=request.user, is_active=True).select_related('paper', 'user')
     serializer = ReadPaperSerializer(queryset, many=True, context={'request': request})
     return Response(serializer.data)
 
@@ -169,23 +161,33 @@ def toggle_readPaper(request, pk):
         )
     
     paper = get_object_or_404(ResearchPaper, pk=pk)
-    read = ReadPaper.objects.filter(
-        user=request.user,
-        paper=paper,
-        is_active=True
-    ).first()
-    if read:
-        read.hard_delete()
-        return Response({'status': 'unRead'})
-    else:
-        read = ReadPaper.objects.create(
+    with transaction.atomic():
+        # Locked so concurrent toggles serialize on the row and its rollup month
+        read = ReadPaper.objects.select_for_update().filter(
             user=request.user,
-            paper=paper,
-            notes=request.data.get('notes', ''),
-            is_active=True
-        )
-        serializer = ReadPaperSerializer(read)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+            paper=paper
+        ).first()
+
+        if read and read.is_active:
+            ReadingRollup.record(read, -1)
+            read.hard_delete()
+            return Response({'status': 'unRead'})
+        if read:
+            # Left inactive by a bulk removal
+            read.is_active = True
+            read.notes = request.data.get('notes', '')
+            read.read_at = timezone.now()
+            read.save()
+        else:
+            read = ReadPaper.objects.create(
+                user=request.user,
+                paper=paper,
+                notes=request.data.get('notes', ''),
+                is_active=True
+            )
+        ReadingRollup.record(read, 1)
+    serializer = ReadPaperSerializer(read)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
     
 # Helper function to apply filters to queryset
    
@@ -196,15 +198,13 @@ def apply_filters(queryset, request):
     """Apply filters to queryset based on request parameters."""
     filters = {}
     
-    # Text search across multiple fields
+    ordering = ['-publication_date', '-created_at']
+
+    # Ranked full-text search over title, abstract and authors
     if search_text := request.query_params.get('search'):
-        # Handle JSON field search for authors
-        queryset = queryset.filter(
-            Q(title__icontains=search_text) |
-            Q(abstract__icontains=search_text) |
-            # Search within the JSON array of authors
-            Q(authors__icontains=search_text)
-        )
+        queryset = search_papers(queryset, search_text)
+        if 'search_rank' in queryset.query.extra_select:
+            ordering = ['-search_rank'] + ordering
     
     # Publication date filters
     if date_gte := request.query_params.get('publication_date__gte'):
@@ -218,12 +218,11 @@ def apply_filters(queryset, request):
     if source := request.query_params.get('source'):
         filters['source__iexact'] = source
     
-    # Categories filter (JSON field)
-    if category := request.query_params.get('category'):
-        # Search for the category name in the JSON array
-        category_filters = Q()
-        category_filters |= Q(categories__icontains=category)
-        queryset = queryset.filter(category_filters)
+    # Exact category filter; repeat or comma-separate values, category_match=all for AND
+    if categories := requested_categories(request.query_params.getlist('category')):
+        queryset = filter_by_categories(
+            queryset, categories, request.query_params.get('category_match', MATCH_ANY)
+        )
     
     # Bookmark filter (if user is authenticated)
     if request.user.is_authenticated:
@@ -236,8 +235,8 @@ def apply_filters(queryset, request):
     # Apply remaining filters
     queryset = queryset.filter(**filters)
     
-    # Order by most recent first
-    queryset = queryset.order_by('-publication_date', '-created_at')
+    # Best match first when searching, otherwise most recent first
+    queryset = queryset.order_by(*ordering)
     
     return queryset.distinct()
 
@@ -246,6 +245,15 @@ class ResearchPaperPagination(LimitOffsetPagination):
     default_limit = 10
     max_limit = 5000
 
+class ResearchPaperCursorPagination(KeysetPagination):
+    ordering = ('-publication_date', '-created_at', 'id')
+
+def paper_paginator(request, queryset):
+    """Keyset pagination by default; ``offset`` and ranked search results keep limit/offset"""
+    if 'offset' in request.query_params or 'search_rank' in queryset.query.extra_select:
+        return ResearchPaperPagination()
+    return ResearchPaperCursorPagination()
+
 
 
 
@@ -255,9 +263,9 @@ class ResearchPaperPagination(LimitOffsetPagination):
 def research_paper_list_withPage(request):
     if request.method == 'GET':
         queryset = ResearchPaper.objects.all()
-        filtered_queryset = apply_filters(queryset, request)
+        filtered_queryset = annotate_paper_list(apply_filters(queryset, request), request)
        
-        paginator = ResearchPaperPagination()
+        paginator = paper_paginator(request, filtered_queryset)
         
         
         paginated_queryset = paginator.paginate_queryset(filtered_queryset, request)
@@ -279,210 +287,70 @@ def research_paper_list_withPage(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-def apply_dynamic_filters(queryset, request):
-    filters = {}
-    params = request.query_params
-    model_name = queryset.model.__name__
-
-    if model_name == 'ResearchPaper':
-        if params.get('search'):
-            queryset = queryset.filter(
-                Q(title__icontains=params['search']) |
-                Q(abstract__icontains=params['search']) |
-                Q(authors__icontains=params['search'])
-            )
-        
-        # Basic filters
-        if params.get('title'):
-            filters['title__icontains'] = params['title']
-        if params.get('source'):
-            filters['source'] = params['source']
-            
-        # Category filter with case-insensitive JSON handling
-        if params.get('category'):
-            category = params['category']
-            categories = [category] if isinstance(category, str) else category
-            q_objects = Q()
-            for cat in categories:
-                q_objects |= Q(categories__contains=f'"{cat}"')
-            queryset = queryset.filter(q_objects)
-                
-        # Date filters
-        if params.get('date_from'):
-            filters['publication_date__gte'] = params['date_from']
-        if params.get('date_to'):
-            filters['publication_date__lte'] = params['date_to']
-            
-    elif model_name in ['BookmarkedPaper', 'ReadPaper', 'CategoryLike']:
-        if params.get('search'):
-            queryset = queryset.filter(
-                Q(paper__title__icontains=params['search']) |
-                Q(paper__abstract__icontains=params['search']) |
-                Q(paper__authors__icontains=params['search'])
-            )
-
-        if params.get('user'):
-            filters['user_id'] = params['user']
-        if params.get('is_active') is not None:
-            filters['is_active'] = params['is_active'] == 'True'
-            
-        # Date field handling
-        date_field = {
-            'BookmarkedPaper': 'bookmarked_at',
-            'ReadPaper': 'read_at',
-            'CategoryLike': 'created_at'
-        }.get(model_name)
-        
-        if params.get('date_from'):
-            filters[f'{date_field}__gte'] = params['date_from']
-        if params.get('date_to'):
-            filters[f'{date_field}__lte'] = params['date_to']
-            
-    elif model_name == 'ResearchPaperCategory':
-        if params.get('title'):
-            filters['name__icontains'] = params['title']
-
-    # Apply remaining filters and sorting
-    queryset = queryset.filter(**filters)
-    
-    if params.get('sort'):
-        sort_field = params['sort'].lstrip('-')
-        if hasattr(queryset.model, sort_field):
-            queryset = queryset.order_by(params['sort'])
-            
-    return queryset
-
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def dynamic_paper_list(request):
-    Table= request.query_params.get('Table')
-    Topic= request.query_params.get('Topic')
-    Sort= request.query_params.get('Sort')
-    pagginated= request.query_params.get('pagginated')
-    limit= request.query_params.get('limit')
-    offset= request.query_params.get('offset')
-
-    if Table ==   'ResearchPaper':
-        queryset = ResearchPaper.objects.all()
-    elif Table == 'BookmarkedPaper':
-        queryset = BookmarkedPaper.objects.all()
-    elif Table == 'ResearchPaperCategory':
-        queryset = ResearchPaperCategory.objects.all()
-    elif Table == 'CategoryLike':
-        queryset = CategoryLike.objects.all()
-    elif Table == 'ReadPaper':
-        queryset = ReadPaper.objects.all()
-    else:
+    """List one registered table (``Table``) with its declared filters and sorts"""
+    table = request.query_params.get('Table')
+    if table not in TABLES:
         return Response({"error": "Table not found"}, status=status.HTTP_404_NOT_FOUND)
-    
-    filtered_queryset = apply_dynamic_filters(queryset, request)
-
-    if pagginated == 'True':
-        paginator = ResearchPaperPagination()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
-        if Table == 'ResearchPaper':
-            serializer = ResearchPaperSerializer(
-                paginated_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'BookmarkedPaper':
-            serializer = BookmarkedPaperSerializer(
-                paginated_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'ResearchPaperCategory':
-            serializer = CategorySerializer(
-                paginated_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'CategoryLike':
-            serializer = CategoryLikeSerializer(
-                paginated_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'ReadPaper':
-            serializer = ReadPaperSerializer(
-                paginated_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        return paginator.get_paginated_response(serializer.data)
-
-    else:
-        if Table == 'ResearchPaper':
-            serializer = ResearchPaperSerializer(
-                filtered_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'BookmarkedPaper':
-            serializer = BookmarkedPaperSerializer(
-                filtered_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'ResearchPaperCategory':
-            serializer = CategorySerializer(
-                filtered_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'CategoryLike':
-            serializer = CategoryLikeSerializer(
-                filtered_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        elif Table == 'ReadPaper':
-            serializer = ReadPaperSerializer(
-                filtered_queryset, 
-                many=True, 
-                context={'request': request}
-            )
-        return Response(serializer.data)
-
-        
-
-       
-    
-       
-
-    
-
 
-    
+    spec = TABLES[table]
+    queryset = spec.filter(spec.queryset(request), request.query_params)
 
-    
+    if request.query_params.get('pagginated') == 'True':
+        paginator = ResearchPaperPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(spec.serialize(page, request))
 
-   
+    return Response(spec.serialize(queryset, request))
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def dynamic_paper_batch(request):
+    """List several registered tables in one round trip.
 
+    ``tables`` names them (comma-separated or repeated); each table reads its
+    own parameters with a ``<Table>.`` prefix, e.g. ``ReadPaper.limit=5``.
+    """
+    tables = [
+        name for value in request.query_params.getlist('tables')
+        for name in value.split(',') if name
+    ]
+    if not tables:
+        return Response({"error": "tables is required"}, status=status.HTTP_400_BAD_REQUEST)
+    if unknown := [name for name in tables if name not in TABLES]:
+        return Response({"error": f"Table not found: {', '.join(unknown)}"}, status=status.HTTP_404_NOT_FOUND)
+
+    data = {}
+    for name in dict.fromkeys(tables):
+        params = QueryDict(mutable=True)
+        prefix = f'{name}.'
+        for key, values in request.query_params.lists():
+            if key.startswith(prefix):
+                params.setlist(key[len(prefix):], values)
+        data[name] = list_table(name, params, request)
+    return Response(data)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_paper_list_withoutPage(request):
-   cache_key = f"research_papers_{request.query_params}"
+   cache_key = versioned_key(PAPERS, 'list', params=request.query_params)
    cached_data = cache.get(cache_key)
    
-   if cached_data:
+   if cached_data is not None:
        return Response(cached_data)
    
-   # Track cache key
-   related_keys = cache.get("research_paper_cache_keys", set())
-   related_keys.add(cache_key)
-   cache.set("research_paper_cache_keys", related_keys)
-   
    queryset = ResearchPaper.objects.all()
    queryset = apply_filters(queryset, request)
    
    queryset = queryset.only(
        'id', 'title', 'abstract', 'authors', 'source', 'url',
-       'pdf_url', 'categories', 'publication_date', 'created_at'
+       'pdf_url', 'categories', 'publication_date', 'created_at',
+       'updated_at', 'citation_count', 'average_reading_time'
    )
+   # Shared across users, so no per-user bookmark/read state
+   queryset = annotate_paper_list(queryset, request, include_user_state=False)
    
    # More efficient chunking using iterator()
    chunk_size = 1000
@@ -495,6 +363,46 @@ def research_paper_list_withoutPage(request):
    cache.set(cache_key, all_data, timeout=604800)
    return Response(all_data)
 
+EXPORT_FIELDS = (
+    'id', 'title', 'abstract', 'authors', 'source', 'url', 'pdf_url',
+    'categories', 'publication_date', 'created_at', 'updated_at',
+    'citation_count', 'average_reading_time', 'active_bookmarks_count'
+)
+EXPORT_CHUNK_SIZE = 1000
+
+def export_lines(queryset):
+    for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def research_paper_export(request):
+    """Stream the (filtered) catalogue as NDJSON, one paper per line in id order.
+
+    Pass the id of the last line received as ``after`` to resume an interrupted
+    export, and ``limit`` to cap the number of lines per request.
+    """
+    queryset = apply_filters(ResearchPaper.objects.all(), request)
+
+    if after := request.query_params.get('after'):
+        try:
+            queryset = queryset.filter(id__gt=uuid.UUID(after))
+        except ValueError:
+            return Response({'error': 'after must be a paper id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = queryset.annotate(active_bookmarks_count=F('bookmark_count'))
+    queryset = queryset.order_by('id').values(*EXPORT_FIELDS)
+
+    if limit := request.query_params.get('limit'):
+        try:
+            queryset = queryset[:max(int(limit), 0)]
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(export_lines(queryset), content_type='application/x-ndjson')
+    response['Content-Disposition'] = 'attachment; filename="papers.ndjson"'
+    return response
+
 def capitalize_categories(category):
    words = category.lower().split()
    return ' '.join(word.capitalize() for word in words)
@@ -502,45 +410,27 @@ def capitalize_categories(category):
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_focus(request):
-   cache_key = "research_focus_stats"
-   cached_data = cache.get(cache_key)
-
-   if cached_data:
-       return Response(cached_data)
-
-   papers = ResearchPaper.objects.all()
-   total_papers = len(papers)
-   
-   category_counts = {}
-   for paper in papers:
-       for category in paper.categories:
-           formatted_category = capitalize_categories(category)
-           category_counts[formatted_category] = category_counts.get(formatted_category, 0) + 1
+   # Counts are maintained incrementally by the ResearchPaper signals, so no caching is needed
+   total_papers = ResearchPaper.objects.count()
+   counts = list(category_counts())
 
    distribution = [
        {
-           "category": cat,
+           "category": capitalize_categories(cat),
            "count": count,
            "percentage": round((count / total_papers) * 100, 1)
        }
-       for cat, count in sorted(category_counts.items(), 
-                              key=lambda x: x[1], 
-                              reverse=True)
+       for cat, count in counts
    ]
 
    response_data = {
        "research_focus": {
            "topic_distribution": distribution,
            "total_papers": total_papers,
-           "total_categories": len(category_counts)
+           "total_categories": len(counts)
        }
    }
 
-   cache.set(cache_key, response_data, timeout=604800)
-   related_keys = cache.get("research_focus_cache_keys", set())
-   related_keys.add(cache_key)
-   cache.set("research_focus_cache_keys", related_keys)
-
    return Response(response_data)
 
 
@@ -552,50 +442,34 @@ def reading_stats(request):
     Get reading statistics by month for the authenticated user.
     Query Parameters:
         - year: Optional. Filter stats by year (defaults to current year)
+        - start, end: Optional. Inclusive YYYY-MM month range, may span several years
     """
-    # Get the current year or specified year from query params
-    year = request.query_params.get('year', timezone.now().year)
-    
-    # Get reading stats for the user
-    monthly_stats = (
-        ReadPaper.objects
-        .filter(
-            user=request.user,
-            is_active=True,
-            read_at__year=year
-        )
-        .annotate(
-            month=TruncMonth('read_at')
-        )
-        .values('month')
-        .annotate(
-            papers=Count('id'),
-            avgTime=Avg('paper__average_reading_time')
+    try:
+        if start := request.query_params.get('start'):
+            start_month = parse_month(start)
+            end = request.query_params.get('end')
+            end_month = parse_month(end) if end else current_month()
+        else:
+            year = int(request.query_params.get('year', timezone.now().year))
+            start_month, end_month = (year, 1), (year, 12)
+        months = month_range(start_month, end_month)
+    except ValueError:
+        return Response(
+            {'error': 'year must be an integer and start/end must be YYYY-MM'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        .order_by('month')
-    )
 
-    # Format the data to match the required structure
+    buckets = monthly_buckets(request.user.id)
+
+    # Every month in the range, using 0 for months with no data
     formatted_stats = []
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-             'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    
-    # Create a dictionary of existing data
-    stats_dict = {
-        stat['month'].month: {
-            'papers': stat['papers'],
-            'avgTime': round(stat['avgTime'], 1) if stat['avgTime'] else 0
-        }
-        for stat in monthly_stats
-    }
-    
-    # Fill in all months, using 0 for months with no data
-    for month_num, month_name in enumerate(months, 1):
-        month_data = stats_dict.get(month_num, {'papers': 0, 'avgTime': 0})
+    for month in months:
+        stats = summarize(buckets, [month])
         formatted_stats.append({
-            'month': month_name,
-            'papers': month_data['papers'],
-            'avgTime': month_data['avgTime']
+            'month': MONTH_NAMES[month[1] - 1],
+            'year': month[0],
+            'papers': stats['papers'],
+            'avgTime': round(stats['avg_time'], 1)
         })
 
     return Response(formatted_stats, status=status.HTTP_200_OK)
@@ -603,7 +477,7 @@ def reading_stats(request):
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def research_paper_detail(request, pk):
-    paper = get_object_or_404(ResearchPaper, pk=pk)
+    paper = get_object_or_404(annotate_paper_list(ResearchPaper.objects.all(), request), pk=pk)
     
     if request.method == 'GET':
         serializer = ResearchPaperSerializer(paper, context={'request': request})
@@ -627,7 +501,16 @@ def research_paper_detail(request, pk):
                 {"error": "Cannot delete paper with active bookmarks"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        paper.delete()
+        if paper.paper_readers.filter(is_active=True).exists():
+            return Response(
+                {"error": "Cannot delete paper with active reads"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        with transaction.atomic():
+            # Rows deactivated in the admin would otherwise block the delete (PROTECT)
+            paper.paper_bookmarks.filter(is_active=False).delete()
+            paper.paper_readers.filter(is_active=False).delete()
+            paper.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 # New Category views
@@ -710,23 +593,27 @@ def toggle_category_like(request, pk):
         )
     
     category = get_object_or_404(ResearchPaperCategory, pk=pk)
-    like = CategoryLike.objects.filter(
-        user=request.user,
-        category=category,
-        is_active=True
-    ).first()
-    
-    if like:
-        like.delete()  # This will trigger the soft delete
-        return Response({'status': 'unliked'})
-    else:
-        like = CategoryLike.objects.create(
+    with transaction.atomic():
+        # Locked so concurrent toggles serialize on the row and its like_count
+        like = CategoryLike.objects.select_for_update().filter(
             user=request.user,
-            category=category,
-            is_active=True
-        )
-        serializer = CategoryLikeSerializer(like)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+            category=category
+        ).first()
+
+        if like and like.is_active:
+            like.delete()  # This will trigger the soft delete
+            return Response({'status': 'unliked'})
+        if like:
+            like.is_active = True
+            like.save(update_fields=['is_active'])
+        else:
+            like = CategoryLike.objects.create(
+                user=request.user,
+                category=category,
+                is_active=True
+            )
+    serializer = CategoryLikeSerializer(like)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 # Existing Bookmark views
 @api_view(['GET'])
@@ -739,7 +626,9 @@ def bookmarked_papers(request):
         )
     
     # Get the bookmarks for the authenticated user
-    bookmarks = BookmarkedPaper.objects.filter(user=request.user, is_active=True)
+    bookmarks = BookmarkedPaper.objects.filter(
+        user=request.user, is_active=True
+    ).select_related('paper', 'user')
     
     # Serialize the bookmarks using the BookmarkedPaperSerializer
     serializer = BookmarkedPaperSerializer(bookmarks, many=True)
@@ -757,40 +646,77 @@ def toggle_bookmark(request, pk):
         )
     
     paper = get_object_or_404(ResearchPaper, pk=pk)
-    bookmark = BookmarkedPaper.objects.filter(
-        user=request.user,
-        paper=paper,
-        is_active=True
-    ).first()
-    
-    if bookmark:
-        bookmark.hard_delete()
-        return Response({'status': 'unbookmarked'})
-    else:
-        bookmark = BookmarkedPaper.objects.create(
+    with transaction.atomic():
+        # Locked so concurrent toggles serialize on the row and its bookmark_count
+        bookmark = BookmarkedPaper.objects.select_for_update().filter(
             user=request.user,
-            paper=paper,
-            notes=request.data.get('notes', ''),
-            is_active=True
-        )
-        serializer = BookmarkedPaperSerializer(bookmark)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+            paper=paper
+        ).first()
+
+        if bookmark and bookmark.is_active:
+            bookmark.hard_delete()
+            return Response({'status': 'unbookmarked'})
+        if bookmark:
+            # Left inactive by a bulk removal
+            bookmark.is_active = True
+            bookmark.notes = request.data.get('notes', '')
+            bookmark.bookmarked_at = timezone.now()
+            bookmark.save()
+        else:
+            bookmark = BookmarkedPaper.objects.create(
+                user=request.user,
+                paper=paper,
+                notes=request.data.get('notes', ''),
+                is_active=True
+            )
+    serializer = BookmarkedPaperSerializer(bookmark)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
     
 
+def bulk_toggle_view(request, ids_key, apply, target_field):
+    try:
+        ids, action = parse_bulk_request(request.data, ids_key)
+        result = apply(request.user, ids, action)
+    except ValidationError as e:
+        return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result.as_dict(target_field), status=status.HTTP_200_OK)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_toggle_bookmarks(request):
+    """Bookmark/unbookmark many papers: ``{"paper_ids": [...], "action": "toggle"|"add"|"remove"}``"""
+    return bulk_toggle_view(request, 'paper_ids', bulk_bookmarks, 'paper')
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_toggle_reads(request):
+    """Mark many papers read/unread: ``{"paper_ids": [...], "action": ...}``"""
+    return bulk_toggle_view(request, 'paper_ids', bulk_reads, 'paper')
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_toggle_category_likes(request):
+    """Like/unlike many categories: ``{"category_ids": [...], "action": ...}``"""
+    return bulk_toggle_view(request, 'category_ids', bulk_category_likes, 'category')
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def category_listonly(request):
     """List all categories or create a new one"""
     if request.method == 'GET':
-        categories = ResearchPaperCategory.objects.all()
-        data = [{
-            'id': cat.id,
-            'name': cat.name,
-            'icon': cat.icon,
-            'description': cat.description,
-            'like_count': cat.like_count,
-            'created_at': cat.created_at
-        } for cat in categories]
+        cache_key = versioned_key(CATEGORIES, 'list')
+        data = cache.get(cache_key)
+        if data is None:
+            categories = ResearchPaperCategory.objects.all()
+            data = [{
+                'id': cat.id,
+                'name': cat.name,
+                'icon': cat.icon,
+                'description': cat.description,
+                'like_count': cat.like_count,
+                'created_at': cat.created_at
+            } for cat in categories]
+            cache.set(cache_key, data, timeout=604800)
         return Response(data)
 
     elif request.method == 'POST':
@@ -897,29 +823,18 @@ def category_like_list(request):
         if not category_ids or not isinstance(category_ids, list):
             return Response({"error": "category_ids must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
         
-        response_data = []
-        
-        for category_id in category_ids:
-            category = get_object_or_404(ResearchPaperCategory, pk=category_id)
-            like = CategoryLike.objects.filter(user=request.user, category=category, is_active=True).first()
-
-            if like:
-                # Unliking the category
-                like.hard_delete()
-                response_data.append({'category_id': category.id, 'status': 'unliked'})
-            else:
-                # Liking the category
-                like = CategoryLike.objects.create(user=request.user, category=category, is_active=True)
-                data = {
-                    'id': like.category.id,
-                    'name': like.category.name,
-                    'icon': like.category.icon,
-                    'description': like.category.description,
-                    'like_count': like.category.like_count,
-                    'created_at': like.category.created_at
-                }
-                response_data.append({'category_id': category.id, 'status': 'liked'})
-
+        try:
+            if missing := bulk_missing_ids(ResearchPaperCategory, category_ids):
+                return Response({"error": f"Categories not found: {', '.join(missing)}"}, status=status.HTTP_404_NOT_FOUND)
+            result = bulk_category_likes(request.user, category_ids)
+        except ValidationError as e:
+            return Response({"error": e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = [
+            {'category_id': like.category_id, 'status': 'liked'} for like in result.added
+        ] + [
+            {'category_id': like.category_id, 'status': 'unliked'} for like in result.removed
+        ]
         return Response(response_data, status=status.HTTP_200_OK)
     
 
@@ -957,234 +872,8 @@ def summarization_paper(request, pdf_url=None):
     return Response({"error": "Invalid request method"}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
 
-import numpy as np
-import faiss
-from typing import List, Dict, Tuple
-from collections import defaultdict
-import math
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-from django.db.models import Q, Count, F, Prefetch
-from django.core.cache import cache
-from sklearn.feature_extraction.text import TfidfVectorizer
-
-from functools import reduce
-import operator
-CHUNK_SIZE = 2000
-CACHE_TIMEOUT = 86400  # 24 hours
-INDEX_DIMENSIONS = 200
-MIN_INTERACTIONS = 5
-MAX_WORKERS = 4
-
-def process_categories(categories):
-    if not categories:
-        return ''
-    try:
-        return ','.join(str(cat).strip().lower() for cat in categories)
-    except:
-        return ''
-
-def chunks(queryset, size):
-    """Process queryset in chunks"""
-    start = 0
-    while True:
-        chunk = list(queryset[start:start + size])
-        if not chunk:
-            break
-        yield chunk
-        start += size
-
-class PaperIndexManager:
-    def __init__(self):
-        self.index = None
-        self.paper_ids = []
-        self.vectorizer = None
-        self.load_from_cache()
-    
-    def load_from_cache(self):
-        try:
-            cached_data = cache.get('paper_index_data')
-            if cached_data and isinstance(cached_data, dict):
-                self.index = cached_data.get('index')
-                self.paper_ids = cached_data.get('paper_ids', [])
-                self.vectorizer = cached_data.get('vectorizer')
-        except Exception as e:
-            print(f"Cache loading error: {str(e)}")
-    
-    def save_to_cache(self):
-        try:
-            if self.index and self.vectorizer:
-                cache.set('paper_index_data', {
-                    'index': self.index,
-                    'paper_ids': self.paper_ids,
-                    'vectorizer': self.vectorizer
-                }, CACHE_TIMEOUT)
-        except Exception as e:
-            print(f"Cache saving error: {str(e)}")
-
-    def build_vectors(self, papers: List[Dict]) -> np.ndarray:
-        texts = [
-            f"{str(p.get('title', '')).lower()} {str(p.get('abstract', '')).lower()} "
-            f"{process_categories(p.get('categories', []))} "
-            f"{' '.join(str(author).lower() for author in p.get('authors', []))}"
-            for p in papers
-        ]
-        
-        try:
-            if not self.vectorizer:
-                self.vectorizer = TfidfVectorizer(
-                    max_features=INDEX_DIMENSIONS,
-                    stop_words='english',
-                    ngram_range=(1, 3),
-                    lowercase=True
-                )
-                vectors = self.vectorizer.fit_transform(texts).toarray()
-            else:
-                vectors = self.vectorizer.transform(texts).toarray()
-                
-            vectors = vectors.astype('float32')
-            faiss.normalize_L2(vectors)
-            return vectors
-        except Exception as e:
-            print(f"Vector building error: {str(e)}")
-            raise
-
-    def build_index(self, papers: List[Dict]):
-        try:
-            if not self.index:
-                self.index = faiss.IndexFlatIP(INDEX_DIMENSIONS)
-                self.paper_ids = []
-            
-            for i in range(0, len(papers), CHUNK_SIZE):
-                chunk = papers[i:i + CHUNK_SIZE]
-                vectors = self.build_vectors(chunk)
-                self.index.add(vectors)
-                self.paper_ids.extend(str(p.get('id')) for p in chunk)
-            
-            self.save_to_cache()
-        except Exception as e:
-            print(f"Index building error: {str(e)}")
-
-def get_enhanced_content_recommendations(user_id: str) -> List[str]:
-    index_manager = PaperIndexManager()
-    
-    try:
-        # Get user interactions
-        user_papers = ResearchPaper.objects.filter(
-            Q(paper_bookmarks__user_id=user_id, paper_bookmarks__is_active=True) |
-            Q(paper_readers__user_id=user_id, paper_readers__is_active=True)
-        ).distinct()
-        
-        liked_categories = list(CategoryLike.objects.filter(
-            user_id=user_id, 
-            is_active=True
-        ).values_list('category__name', flat=True))
-        
-        # Build user profile
-        user_interests = defaultdict(float)
-        user_keywords = defaultdict(float)
-        user_authors = set()
-        
-        for paper in user_papers:
-            text = f"{paper.title} {paper.abstract}"
-            words = set(word.lower() for word in text.split() if len(word) > 3)
-            user_keywords.update({word: user_keywords.get(word, 0) + 1 for word in words})
-            
-            for category in paper.categories:
-                user_interests[category.lower()] += 0.4
-            user_authors.update(paper.authors)
-        
-        for category in liked_categories:
-            user_interests[category.lower()] += 0.6
-        
-        # Get unexplored categories
-        all_categories = set(
-            cat.lower() 
-            for cats in ResearchPaper.objects.values_list('categories', flat=True)
-            for cat in cats if cats
-        )
-        unexplored_categories = all_categories - set(user_interests.keys())
-        
-        # Initialize vectorizer if needed
-        if not index_manager.index or not index_manager.vectorizer:
-            papers = list(ResearchPaper.objects.values('id', 'title', 'abstract', 'categories', 'authors'))
-            if papers:
-                index_manager.build_index(papers)
-        
-        # Process recommendations
-        paper_scores = []
-        seen_papers = {str(p.id) for p in user_papers}
-        
-        for papers in chunks(ResearchPaper.objects.exclude(id__in=seen_papers), 1000):
-            for paper in papers:
-                # Calculate interest-based score (70%)
-                interest_score = calculate_interest_score(
-                    paper, user_interests, user_keywords, 
-                    user_authors, index_manager
-                )
-                
-                # Calculate diversity score (30%)
-                diversity_score = calculate_diversity_score(
-                    paper, unexplored_categories
-                )
-                
-                final_score = (interest_score * 0.7) + (diversity_score * 0.3)
-                if final_score > 0:
-                    paper_scores.append((str(paper.id), final_score))
-        
-        # Sort recommendations
-        return [pid for pid, _ in sorted(paper_scores, key=lambda x: x[1], reverse=True)]
-        
-    except Exception as e:
-        print(f"Recommendation error: {str(e)}")
-        return []
-
-def calculate_interest_score(paper, user_interests, user_keywords, user_authors, index_manager):
-    score = 0
-    
-    # Category match (30%)
-    paper_categories = [cat.lower() for cat in paper.categories]
-    category_score = sum(user_interests.get(cat, 0) for cat in paper_categories)
-    score += category_score * 0.3
-    
-    # Keyword similarity (25%)
-    text = f"{paper.title.lower()} {paper.abstract.lower()}"
-    words = set(word for word in text.split() if len(word) > 3)
-    keyword_score = sum(user_keywords.get(word, 0) for word in words) / (len(words) or 1)
-    score += keyword_score * 0.25
-    
-    # Content similarity (25%)
-    if str(paper.id) in index_manager.paper_ids:
-        try:
-            idx = index_manager.paper_ids.index(str(paper.id))
-            similarity_score = index_manager.index.reconstruct(idx).mean()
-            score += similarity_score * 0.25
-        except:
-            pass
-    
-    # Citation impact (10%)
-    citation_score = min(math.log(paper.citation_count + 1) / 10, 1) if paper.citation_count else 0
-    score += citation_score * 0.1
-    
-    # Recency (10%)
-    days_old = (datetime.now().date() - paper.publication_date).days
-    recency_score = math.exp(-days_old / 365) if days_old >= 0 else 0
-    score += recency_score * 0.1
-    
-    # Author overlap bonus
-    if any(author in paper.authors for author in user_authors):
-        score *= 1.2
-        
-    return score
-
-def calculate_diversity_score(paper, unexplored_categories):
-    paper_categories = set(cat.lower() for cat in paper.categories)
-    unexplored_matches = len(paper_categories & unexplored_categories)
-    
-    if unexplored_matches:
-        citation_weight = min(math.log(paper.citation_count + 1) / 10, 1) if paper.citation_count else 0.1
-        return (unexplored_matches / len(paper_categories)) * citation_weight
-    return 0
+from .recommendations import recommendations_cache_key
+from .tasks import schedule_recommendation_refresh
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -1196,15 +885,13 @@ def recommendation_paper(request):
         )
 
     search_query = request.GET.get('search', '').strip().lower()
-    categories = [cat.lower() for cat in request.GET.getlist('categories', [])]
+    categories = requested_categories(request.GET.getlist('categories', []))
     
-    cache_key = f'recommendations_{request.user.id}'
-    recommended_ids = cache.get(cache_key)
+    # Recommendations are precomputed by scraping.tasks; a miss only queues the work
+    recommended_ids = cache.get(recommendations_cache_key(request.user.id))
     
     if recommended_ids is None:
-        recommended_ids = get_enhanced_content_recommendations(str(request.user.id))
-        if recommended_ids:
-            cache.set(cache_key, recommended_ids, CACHE_TIMEOUT)
+        schedule_recommendation_refresh(request.user.id, countdown=0)
     
     if not recommended_ids:
         return Response([])
@@ -1212,35 +899,12 @@ def recommendation_paper(request):
     recommendations = ResearchPaper.objects.filter(id__in=recommended_ids)
     
     if search_query:
-        recommendations = recommendations.filter(
-            Q(title__icontains=search_query) |
-            Q(abstract__icontains=search_query)
-        )
+        recommendations = search_papers(recommendations, search_query)
     
     if categories:
-        recommendations = recommendations.filter(
-            reduce(operator.or_, 
-                  [Q(categories__icontains=cat) for cat in categories])
-        )
+        recommendations = filter_by_categories(recommendations, categories)
     
-    recommendations = recommendations.prefetch_related(
-        Prefetch(
-            'paper_bookmarks',
-            queryset=BookmarkedPaper.objects.filter(
-                user=request.user,
-                is_active=True
-            ),
-            to_attr='user_bookmarks'
-        ),
-        Prefetch(
-            'paper_readers',
-            queryset=ReadPaper.objects.filter(
-                user=request.user,
-                is_active=True
-            ),
-            to_attr='user_reads'
-        )
-    )
+    recommendations = annotate_paper_list(recommendations, request)
     
     id_map = {str(id): i for i, id in enumerate(recommended_ids)}
     recommendations = sorted(